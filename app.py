@@ -1,595 +1,633 @@
-# === CONFIG START =============================================================
-import streamlit as st
-from typing import List
-
-st.set_page_config(page_title="Better-Ball Caddie", page_icon="⛳", layout="centered")
-
-# Course / handicap config
-HOLE_HANDICAP = [15, 9, 7, 17, 1, 13, 5, 11, 3, 16, 10, 2, 18, 8, 14, 4, 6, 12]
-PAR =            [ 4,  4,  4,  3, 4,  4,  4,  3, 5,  3,  4,  4,  3, 5,  4,  4,  5,  4]
-
-# Letter-grade scoring (A best → F worst)
-GRADE_TO_SCORE = {"A": 5, "B": 4, "C": 3, "D": 2, "F": 1}
-SCORE_TO_GRADE = {v: k for k, v in GRADE_TO_SCORE.items()}
-GRADE_HELP = {
-    "A": "Best / Perfect",
-    "B": "Good / Green light",
-    "C": "Playable / Average",
-    "D": "Trouble / Recovery likely",
-    "F": "Penalty / Unplayable",
-}
-
-# Thresholds & overrides
-SAFE_SCORE = 4            # ≥ B is “safe”
-BAD_SCORE  = 2            # ≤ D is “trouble”
-BAD_STREAK_THRESHOLD = 3  # 3 bad shots in a row → damage control
-
-def strokes_for(hcp: int, hole_index: int) -> int:
-    """Standard stroke allocation by hole handicap number."""
-    rating = HOLE_HANDICAP[hole_index]  # 1..18 (1 hardest)
-    strokes = 1 if hcp >= rating else 0
-    extras  = max(0, hcp - 18)          # extra strokes beyond 18 start at HCP 1 upward
-    if extras > 0 and rating <= extras:
-        strokes += 1
-    return strokes
-
-def last(vals: List[int] | None):
-    return vals[-1] if vals else None
-
-def bad_streak(grades: List[int]) -> int:
-    """Count how many D/F in a row at the end."""
-    s = 0
-    for v in reversed(grades):
-        if v <= BAD_SCORE:
-            s += 1
-        else:
-            break
-    return s
-
-# ---- Embedded per-hole strength weights (0..1; higher = stronger on that hole) ----
-# Derived from your sheet’s tendencies you described:
-# Matt best: 8, 17, 1  | worst: 9, 16, 5
-# Mike best: 10, 3, 17 | worst: 12, 9, 14
-MATT_W = [0.85, 0.55, 0.55, 0.55, 0.25, 0.40, 0.55, 0.90, 0.25,
-          0.55, 0.55, 0.55, 0.55, 0.55, 0.55, 0.30, 0.85, 0.55]
-MIKE_W = [0.55, 0.55, 0.85, 0.55, 0.55, 0.55, 0.55, 0.55, 0.30,
-          0.90, 0.55, 0.30, 0.55, 0.30, 0.55, 0.55, 0.85, 0.55]
-# === CONFIG END ===============================================================
+# Streamlit UI. All decision logic lives in the `caddie` package; this script
+# only reads/writes session state and renders.
+#
+# Teams of 2..4 players play best ball or scramble. The Matt & Mike best-ball pair
+# is answered from the precomputed decision table; any other team from the team
+# engine (caddie.team).
+#
+# Reruns are scoped: a grade tap reruns only the keyed fragments it affects (the
+# live recommendation, that player's shot row and the explainability panel).
+# Hole changes and sidebar edits rerun the full app.
+#
+# Every render ends by computing advice for each possible next tap (caddie.lookahead)
+# in the explainability panel, after the recommendation has been sent. A tap into
+# that batch is answered from the session's cache. The same batch fills the
+# panel's what-if grid.
+#
+# Below it, the round plan (caddie.planner) picks each remaining hole's
+# aggressiveness for the round goal: stroke play, a Day-1 ringer card, or a match
+# standing. It is re-planned from the memoized suffix on every full run.
+#
+# The explainability panel shows the exact Markov-model EV (caddie.exact) next
+# to the heuristic one for the Matt & Mike pair.
+#
+# With "Learn weights" on, the "Next" buttons fold the pair's grades on the hole
+# they leave into per-hole weights learned online (caddie.learn). The learned
+# course then feeds the live engine instead of the course's precomputed table.
+#
+# Offline mode (Matt & Mike pair) swaps the recommendation, hole buttons and grade
+# grid for a browser component (caddie/web) that evaluates an exported decision
+# bundle locally and syncs its taps back through `sync_offline`.
+#
+# Shots, the current hole and offline acks are kept in a durable round log
+# (caddie.roundlog) named by the `?round=` query parameter, so a refresh or a
+# server restart resumes the round.
+#
+# Phones showing the same round share its log. Every write is tagged with the
+# session that made it and published to the round's hub (caddie.hub). Every
+# session runs the `partner` fragment: every SYNC_IDLE_SECONDS while alone on its
+# round, every SYNC_SECONDS while the hub has seen another phone within
+# SYNC_PARTNER_SECONDS. A tick that finds a partner joined or gone reruns the page
+# to switch rate. The fragment reruns the app only when another phone's delta
+# touches the hole shown here or moves the round to another hole. A partner
+# joins by typing this round's code.
+#
+# The course comes from the process-wide registry (caddie.courses) and is kept in
+# the `?course=` query parameter; switching it is a dict lookup plus that
+# course's cached decision table.
+#
+# With CADDIE_PROFILE=1 each session times the engine and every UI section
+# (caddie.metrics) and counts reruns and taps; ?diag=1 shows the numbers and they
+# are appended to a local metrics file every PROFILE_EXPORT_EVERY full reruns.
+#
+# Everything immutable (courses, decision tables, offline bundles) is cached once
+# per process and shared read-only by all sessions; a session only holds its round
+# id and sidebar settings. League mode (CADDIE_LEAGUE=1) loads every course's
+# table when the server starts, saving any it had to build so they are
+# memory-mapped.
+#
+# Cold start: a course's table loads on a background thread and the live engine
+# answers until it is ready. The simulator-backed modules (exact EV, planner,
+# learned weights, offline bundle) are imported on first use, and the "Why this?"
+# and "Round plan" expanders build their contents only while open
+# (benchmarks/bench_startup.py holds time to first recommendation to a budget).
+import re
+import threading
+import uuid
+from concurrent.futures import Future
+from typing import TYPE_CHECKING
 
+import streamlit as st
+import streamlit.components.v1 as components
+
+from caddie.config import (
+    DEFAULT_COURSE, FORMATS, GRADE_HELP, GRADE_TO_SCORE, LEAGUE_MODE, LEARN_WEIGHTS, MAX_PLAYERS, PARAMS_VERSION,
+    PROFILE, PROFILE_EXPORT_EVERY, ROUND_CACHE_ENTRIES, SCORE_TO_GRADE, SYNC_IDLE_SECONDS, SYNC_PARTNER_SECONDS,
+    SYNC_SECONDS, format_grades,
+)
+from caddie.courses import Course, get_course, registry
+from caddie.engine import HoleState, net_targets_text, role_advice_and_rules
+from caddie.lookahead import Lookahead, plan_label
+from caddie.metrics import Profiler
+from caddie.round import PLAYERS
+from caddie.roundlog import ACK, GRADE, HOLE, REDO, RESET, UNDO, RoundLog, find_round, round_path
+from caddie.team import TeamState, team_advice, team_targets_text
+
+if TYPE_CHECKING:        # imported on first use: they pull in numpy and the simulator
+    from caddie.learn import WeightLearner
+    from caddie.table import DecisionTable
+
+st.set_page_config(page_title="Better-Ball Caddie", page_icon=":material/golf_course:", layout="centered")
+
+DEFAULT_NAMES = ("Matt", "Mike", "Player 3", "Player 4")
+DEFAULT_HCPS = (19, 13, 18, 18)
+FORMAT_LABELS = {"best_ball": "Best ball", "scramble": "Scramble"}
+GRADES = ("A", "B", "C", "D", "F")
+# caddie.planner.GOALS, in order (not imported here: the planner loads the simulator)
+GOAL_LABELS = {"stroke": "Stroke play", "ringer": "Ringer (Day-1 card)", "match": "Match vs. another pair"}
+
+
+@st.cache_resource(max_entries=ROUND_CACHE_ENTRIES)
+def open_round(round_id: str) -> RoundLog:
+    """One log per round per process, shared by every session showing that round."""
+    return RoundLog(round_path(round_id))
+
+def round_log() -> RoundLog:
+    return open_round(st.session_state["round_id"])
+
+def origin() -> str:
+    """This session's id on the round's writes, so its own deltas don't trigger a sync rerun."""
+    return st.session_state["client_id"]
+
+def profiler() -> Profiler:
+    return st.session_state["profiler"]
+
+def partner_connected() -> bool:
+    """Whether live sync is on and another phone has shown this round recently."""
+    return bool(SYNC_SECONDS) and round_log().hub.partners(origin(), SYNC_PARTNER_SECONDS)
+
+def rerun(scope: list):
+    """Rerun `scope`, or the whole page when a partner joined since the last full run (to start syncing)."""
+    if not st.session_state["syncing"] and partner_connected():
+        st.rerun()
+    st.rerun(scope)
 
 
 # === SESSION STATE & HOLE INIT (must come first for mobile UI) ===
-if "hole" not in st.session_state:
+if "round_id" not in st.session_state:
+    rid = st.query_params.get("round", "")
+    st.session_state["round_id"] = rid if re.fullmatch(r"[0-9a-f]{32}", rid) else uuid.uuid4().hex
+    st.query_params["round"] = st.session_state["round_id"]
+st.session_state.setdefault("client_id", uuid.uuid4().hex)
+if "course" not in st.session_state:
+    key = st.query_params.get("course", DEFAULT_COURSE)
+    st.session_state["course"] = key if key in registry() else DEFAULT_COURSE
+st.session_state.setdefault("hole", round_log().state.hole)
+st.session_state.setdefault("format", "best_ball")
+st.session_state.setdefault("n_players", 2)
+for _p in range(MAX_PLAYERS):
+    st.session_state.setdefault(f"name_{_p}", DEFAULT_NAMES[_p])
+    st.session_state.setdefault(f"hcp_{_p}", DEFAULT_HCPS[_p])
+st.session_state.setdefault("day2", False)
+st.session_state.setdefault("improve_list", [])
+st.session_state.setdefault("offline", False)
+st.session_state.setdefault("lookahead", Lookahead())
+st.session_state.setdefault("goal", "stroke")
+st.session_state.setdefault("match_up", 0)
+st.session_state.setdefault("opp_hcp_0", 18)
+st.session_state.setdefault("opp_hcp_1", 18)
+st.session_state.setdefault("ringer_card", "")
+st.session_state.setdefault("learn", LEARN_WEIGHTS)
+st.session_state.setdefault("profiler", Profiler())
+st.session_state.setdefault("rendered", False)         # set once this session's first run has finished
+st.session_state["seen"] = round_log().hub.version     # this full run shows every delta up to here
+round_log().hub.seen(origin())
+st.session_state["syncing"] = partner_connected()      # poll at the fast rate only with a partner connected
+run_start = profiler().start()
+profiler().count("reruns")
+
+def course() -> Course:
+    """The selected course, with the learned weights when learning is on."""
+    key = st.session_state["course"]
+    return weight_learner(key).course if st.session_state["learn"] else get_course(key)
+
+@st.cache_resource
+def weight_learner(course_key: str) -> "WeightLearner":
+    """Online per-hole weights for the course, shared by every session (and saved next to the round logs)."""
+    from caddie.learn import WeightLearner
+    return WeightLearner(get_course(course_key))
+
+@st.cache_resource
+def table_loader(course_key: str) -> Future:
+    """Loads (or builds) the course's decision table on a background thread, once per server process.
+
+    A session first asks for it at the end of its first run, once the recommendation
+    is on screen; until the table is ready the pair is answered by the live engine,
+    which gives the same answers (python -m caddie.corpus diff --engine table). So a
+    cold start neither waits about a second for the build nor shares the GIL with it
+    during the first render.
+    """
+    future = Future()
+
+    def load():
+        from caddie.table import load_or_build
+        try:
+            future.set_result(load_or_build(course=get_course(course_key), save=LEAGUE_MODE))
+        except BaseException as e:                      # surfaced by decision_table()
+            future.set_exception(e)
+    threading.Thread(target=load, name=f"table-{course_key}", daemon=True).start()
+    return future
+
+def decision_table(course_key: str) -> "DecisionTable":
+    """One precomputed table per course per server process (memory-mapped when a saved file matches)."""
+    return table_loader(course_key).result()
+
+@st.cache_resource
+def warm_league() -> int:
+    """League mode: load every course's tables up front, not on some group's first tap."""
+    from caddie.exact import course_tables
+    for key in registry():
+        decision_table(key)
+        course_tables(get_course(key))
+    return len(registry())
+
+if LEAGUE_MODE:
+    warm_league()
+
+@st.cache_resource
+def offline_bundle(course_key: str) -> str:
+    """Write the course's bundle if stale; returns the fingerprint the component must match."""
+    from caddie.bundle import ensure_bundle
+    return ensure_bundle(table=decision_table(course_key), course=get_course(course_key))
+
+def offline_fingerprint(course_key: str) -> str | None:
+    """offline_bundle(), or None when it cannot be written (not cached, so a later run retries)."""
+    try:
+        return offline_bundle(course_key)
+    except OSError:
+        return None
+
+@st.cache_resource
+def offline_caddie():
+    """The offline browser component, declared on first use of offline mode."""
+    from caddie.bundle import web_dir
+    return components.declare_component("offline_caddie", path=web_dir())
+
+def team_names() -> tuple:
+    ss = st.session_state
+    return tuple(ss[f"name_{p}"].strip() or DEFAULT_NAMES[p] for p in range(ss["n_players"]))
+
+def team_hcps() -> tuple:
+    return tuple(st.session_state[f"hcp_{p}"] for p in range(st.session_state["n_players"]))
+
+def pair_team() -> bool:
+    """The tuned Matt & Mike best-ball pair, answered from the decision table (and offline bundle)."""
+    return st.session_state["format"] == "best_ball" and team_names() == ("Matt", "Mike")
+
+def shots(player: int, hole: int) -> tuple:
+    return round_log().state.shots(player, hole)
+
+def current_state() -> HoleState | TeamState:
+    ss = st.session_state
+    if pair_team():
+        matt_hcp, mike_hcp = team_hcps()
+        return round_log().state.hole_state(ss["hole"], matt_hcp=matt_hcp, mike_hcp=mike_hcp, day2=ss["day2"],
+                                            improve_list=ss["improve_list"], course=course())
+    return round_log().state.team_state(ss["hole"], team_names(), team_hcps(), day2=ss["day2"],
+                                        improve_list=ss["improve_list"], format=ss["format"], course=course())
+
+def advise(state: HoleState | TeamState) -> tuple:
+    """(recommendation, rules, EV, attacker, smart_peek, targets text) for either kind of state."""
+    with profiler().span("engine"):
+        if isinstance(state, HoleState):
+            table = table_loader(state.course.key) if st.session_state["rendered"] else None
+            # Learned weights (the table has the tuned ones), or the table isn't loaded yet
+            if state.course is not get_course(state.course.key) or table is None or not table.done():
+                return role_advice_and_rules(state) + (net_targets_text(state),)
+            return table.result().lookup(state) + (net_targets_text(state),)
+        return team_advice(state) + (team_targets_text(state),)
+
+def advice(state: HoleState | TeamState) -> tuple:
+    """advise(), answered from this session's lookahead batch when the last render predicted the tap."""
+    return st.session_state["lookahead"].advice(state, advise)
+
+
+# --- Callbacks (run before the rerun they trigger, so no st.rerun() round trip) ---
+def go_to_hole(hole: int):
+    ss = st.session_state
+    profiler().count("hole moves")
+    if ss["learn"] and pair_team() and hole > ss["hole"]:
+        left = ss["hole"]
+        grades = (shots(0, left), shots(1, left))
+        if any(grades) and round_log().claim_learn(left, origin()):     # each hole of a round counts once
+            weight_learner(ss["course"]).observe(left, grades)
+    ss["hole"] = min(18, max(1, hole))
+    round_log().goto(ss["hole"], origin())
+
+def add_grade(player: int, hole: int, grade: str):
+    state = round_log().state
+    undo_bar_changes = not state.can_undo or state.can_redo     # a tap enables Undo and clears Redo
+    profiler().count("taps")
+    round_log().grade(player, hole, GRADE_TO_SCORE[grade], origin())
+    rerun(["reco", f"row_{player}", "why"] + (["undo"] if undo_bar_changes else []))
+
+def undo_redo(action: str):
+    profiler().count(action)
+    tap = getattr(round_log(), action)(origin())
+    if tap:
+        player, hole, score = tap
+        name = team_names()[player] if player < st.session_state["n_players"] else f"Player {player + 1}"
+        st.toast(f"{'Undid' if action == 'undo' else 'Redid'} {name} {SCORE_TO_GRADE[score]} on hole {hole}")
+    rerun(["reco", "why", "undo"] + [f"row_{p}" for p in range(st.session_state["n_players"])])
+
+def offline_record(event: list) -> tuple | None:
+    """Log record for one queued component event, [seq, "grade", hole, who, grade] or [seq, "hole", hole]."""
+    if len(event) < 3 or type(event[2]) is not int:
+        return None
+    hole = min(18, max(1, event[2]))
+    if event[1] == "grade" and len(event) == 5 and event[3] in PLAYERS and event[4] in SCORE_TO_GRADE.values():
+        return GRADE, hole, PLAYERS.index(event[3]), GRADE_TO_SCORE[event[4]]
+    if event[1] == "hole" and len(event) == 3:
+        return HOLE, hole, -1, 0
+    return None
+
+def sync_offline():
+    """Apply the component's queued events past the logged ack, in order (resends are no-ops)."""
+    ss = st.session_state
+    value = ss.get("offline_sync")
+    if not isinstance(value, dict) or value.get("round") != ss["round_id"] or not isinstance(value.get("events"), list):
+        return
+    log = round_log()
+    acked = log.state.acked
+    records, hole = [], ss["hole"]
+    for event in value["events"]:
+        if not isinstance(event, list) or not event or type(event[0]) is not int or event[0] > 0xFFFFFFFF:
+            continue                   # no usable sequence number, so nothing to acknowledge
+        seq = event[0]
+        if seq <= acked:
+            continue
+        record = offline_record(event)
+        if record:
+            records.append(record)
+            if record[0] == HOLE:
+                hole = record[1]
+        acked = seq                    # a malformed event is acknowledged too, so the phone stops resending it
+    log.append(records + [(ACK, 0, -1, acked)], origin())      # one write for the whole sync
+    ss["hole"] = hole
+
+def set_course():
+    st.query_params["course"] = st.session_state["course"]
+
+def reset_hole(hole: int):
+    round_log().reset(hole, origin())
+
+def new_round():
+    st.session_state["round_id"] = uuid.uuid4().hex
+    st.query_params["round"] = st.session_state["round_id"]
     st.session_state["hole"] = 1
-hole = st.session_state["hole"]
-
-hole_idx = hole - 1
-
-# Per-hole state arrays
-if f"matt_{hole}" not in st.session_state: st.session_state[f"matt_{hole}"] = []
-if f"mike_{hole}" not in st.session_state: st.session_state[f"mike_{hole}"] = []
-matt_shots = st.session_state[f"matt_{hole}"]
-mike_shots = st.session_state[f"mike_{hole}"]
-
-hole_idx = hole - 1
-
-# Sidebar values (set in session state for top UI use)
-matt_hcp = st.session_state.get("matt_hcp", 19)
-mike_hcp = st.session_state.get("mike_hcp", 13)
-day2 = st.session_state.get("day2", False)
-improve_list = st.session_state.get("improve_list", [])
-matt_strokes = strokes_for(matt_hcp, hole_idx)
-mike_strokes = strokes_for(mike_hcp, hole_idx)
-
-# === CORE LOGIC (must be defined before UI code) ===
-def choose_attacker_candidate(m_last: int | None, k_last: int | None) -> str:
-    """Pick attacker using last grades + per-hole strengths + bad streak penalty."""
-    m_bad = bad_streak(matt_shots)
-    k_bad = bad_streak(mike_shots)
-    m_score = (m_last or 0) + MATT_W[hole_idx]*0.6 - m_bad*0.4
-    k_score = (k_last or 0) + MIKE_W[hole_idx]*0.6 - k_bad*0.4
-    return "Matt" if m_score >= k_score else "Mike"
-
-def expected_net_advantage(attacker: str, safe_ball: bool, day2_bias: bool) -> float:
-    """Heuristic EV(ATTACK − ANCHOR). Positive favors ATTACK."""
-    if attacker == "Matt":
-        w = MATT_W[hole_idx]; streak = bad_streak(matt_shots); strokes = matt_strokes
-    else:
-        w = MIKE_W[hole_idx]; streak = bad_streak(mike_shots); strokes = mike_strokes
-
-    base = w * 0.35
-    if day2_bias: base += 0.25
-    if safe_ball: base += 0.20
-    base += (0.05 if strokes > 0 else -0.05)  # slight boost if receiving a stroke
-    risk = 0.15 * min(streak, 3)              # rising risk with bad streak
-    if not safe_ball: risk += 0.20            # no safety net → conservative
-    return round(base - risk, 2)
-
-def is_deadband(ev: float) -> bool:
-    """Treat near-zero EV as 'no clear edge' (avoid fake precision)."""
-    return -0.05 <= ev <= 0.05
-
-def role_advice_and_rules(day2: bool, improve_list: List[int]):
-    """Return (recommendation, rules, EV, attacker, smart_peek_dict)."""
-    rules = []
-    m1 = last(matt_shots); k1 = last(mike_shots)
-
-    # Bad-streak guardrails
-    matt_bad_run = bad_streak(matt_shots); mike_bad_run = bad_streak(mike_shots)
-    if matt_bad_run >= BAD_STREAK_THRESHOLD: rules.append(f"Matt bad streak {matt_bad_run} → no green light.")
-    if mike_bad_run >= BAD_STREAK_THRESHOLD: rules.append(f"Mike bad streak {mike_bad_run} → no green light.")
-
-    # Tee order: prefer strokes/comfort to secure a safe ball early
-    if len(matt_shots) == 0 and len(mike_shots) == 0:
-        matt_pref = (matt_strokes > mike_strokes) or (MATT_W[hole_idx] > MIKE_W[hole_idx])
-        who_first = "Matt" if matt_pref else "Mike"
-        rules.append(f"Tee order by strokes/comfort → {who_first} tees first.")
-        smart_peek = dict(attacker=None, ev=0.0, safe="N/A", matt_w=MATT_W[hole_idx], mike_w=MIKE_W[hole_idx])
-        return (f"{who_first} tees first. First player: put a ball in play. Partner adjusts based on result.",
-                rules, 0.0, None, smart_peek)
-
-    # One tee shot taken
-    if len(matt_shots) + len(mike_shots) == 1:
-        first_who = "Matt" if len(matt_shots) else "Mike"
-        first_rating = m1 if len(matt_shots) else k1
-        other_who = "Mike" if first_who == "Matt" else "Matt"
-        day2_bias = day2 and (hole in improve_list)
-
-        if first_rating >= SAFE_SCORE:
-            rules.append(f"{first_who} safe (≥B).")
-            ev = expected_net_advantage(other_who, safe_ball=True, day2_bias=day2_bias)
-            downgrade = (
-                (other_who == "Matt" and matt_bad_run >= BAD_STREAK_THRESHOLD)
-                or (other_who == "Mike" and mike_bad_run >= BAD_STREAK_THRESHOLD)
-                or ev <= 0 or is_deadband(ev)
-            )
-            if downgrade:
-                rules.append(f"{other_who} attack downgraded (bad-streak or EV≤0 or deadband).")
-                smart_peek = dict(attacker=other_who, ev=ev, safe="Yes", matt_w=MATT_W[hole_idx], mike_w=MIKE_W[hole_idx])
-                return (f"{first_who} is safe. {other_who}: controlled target; no hero shots.",
-                        rules, ev, other_who, smart_peek)
-            smart_peek = dict(attacker=other_who, ev=ev, safe="Yes", matt_w=MATT_W[hole_idx], mike_w=MIKE_W[hole_idx])
-            return (f"{first_who} is safe. {other_who}: ATTACK for a birdie look.",
-                    rules, ev, other_who, smart_peek)
-
-        if first_rating <= BAD_SCORE:
-            rules.append(f"{first_who} in trouble (≤D).")
-            smart_peek = dict(attacker=None, ev=0.0, safe="No", matt_w=MATT_W[hole_idx], mike_w=MIKE_W[hole_idx])
-            return (f"{first_who} is in trouble. {other_who}: ANCHOR (fairway finder; center green).",
-                    rules, 0.0, None, smart_peek)
-
-        rules.append(f"{first_who} average (C).")
-        ev = expected_net_advantage(other_who, safe_ball=False, day2_bias=day2_bias)
-        smart_peek = dict(attacker=other_who, ev=ev, safe="No", matt_w=MATT_W[hole_idx], mike_w=MIKE_W[hole_idx])
-        if ev <= 0 or is_deadband(ev):
-            return (f"{first_who} is average. {other_who}: conservative line; favor fairway/center.",
-                    rules, ev, other_who, smart_peek)
-        return (f"{first_who} is average. {other_who}: medium risk line toward best angle.",
-                rules, ev, other_who, smart_peek)
-
-    # Both tee shots hit
-    if len(matt_shots) == 1 and len(mike_shots) == 1:
-        day2_bias = day2 and (hole in improve_list)
-        safe_balls = sum(1 for r in [m1, k1] if r is not None and r >= SAFE_SCORE)
-
-        if safe_balls >= 1:
-            rules.append("At least one safe tee ball.")
-            attacker = choose_attacker_candidate(m1, k1)
-            ev = expected_net_advantage(attacker, safe_ball=True, day2_bias=day2_bias)
-            partner = "Mike" if attacker == "Matt" else "Matt"
-            smart_peek = dict(attacker=attacker, ev=ev, safe="Yes", matt_w=MATT_W[hole_idx], mike_w=MIKE_W[hole_idx])
-
-            bad_run = bad_streak(matt_shots) if attacker == "Matt" else bad_streak(mike_shots)
-            if bad_run >= BAD_STREAK_THRESHOLD or ev <= 0 or is_deadband(ev):
-                rules.append(f"{attacker} attack downgraded (bad-streak or EV≤0 or deadband).")
-                return (f"Team has a safe ball. {attacker}: controlled target. {partner}: easy two-putt.",
-                        rules, ev, attacker, smart_peek)
-            return (f"Team has a safe ball. {attacker}: ATTACK. {partner}: easy two-putt.",
-                    rules, ev, attacker, smart_peek)
-
-        if (m1 or 0) <= BAD_SCORE and (k1 or 0) <= BAD_SCORE:
-            better_who = "Matt" if (m1 or 0) >= (k1 or 0) else "Mike"
-            rules.append("Both tee balls in trouble.")
-            smart_peek = dict(attacker=better_who, ev=0.0, safe="No", matt_w=MATT_W[hole_idx], mike_w=MIKE_W[hole_idx])
-            return (f"Both in trouble. Play from {better_who}'s better lie. Advance safely; protect bogey "
-                    f"(often net par for Matt on stroke holes).",
-                    rules, 0.0, better_who, smart_peek)
-
-        attacker = choose_attacker_candidate(m1, k1)
-        ev = expected_net_advantage(attacker, safe_ball=False, day2_bias=day2_bias)
-        smart_peek = dict(attacker=attacker, ev=ev, safe="No", matt_w=MATT_W[hole_idx], mike_w=MIKE_W[hole_idx])
-        rules.append("Mixed tee outcomes; attacker chosen by grades + hole strength.")
-        if ev <= 0 or is_deadband(ev):
-            return (f"Mixed results. Favor {attacker}'s lie but avoid high-risk lines; set up inside-15 ft if easy.",
-                    rules, ev, attacker, smart_peek)
-        return (f"Mixed results. Favor {attacker}'s lie; attacker aims for inside-15 ft.",
-                rules, ev, attacker, smart_peek)
-
-    # Approaches and beyond
-    m_last = (last(matt_shots) or 0); k_last = (last(mike_shots) or 0)
-    matt_safe = m_last >= SAFE_SCORE; mike_safe = k_last >= SAFE_SCORE
-    day2_bias = day2 and (hole in improve_list)
-
-    if matt_safe and not mike_safe:
-        rules.append("Matt safe; Mike not safe.")
-        ev = expected_net_advantage("Mike", safe_ball=True, day2_bias=day2_bias)
-        smart_peek = dict(attacker="Mike", ev=ev, safe="Yes", matt_w=MATT_W[hole_idx], mike_w=MIKE_W[hole_idx])
-        if bad_streak(mike_shots) >= BAD_STREAK_THRESHOLD or ev <= 0 or is_deadband(ev):
-            rules.append("Mike attack downgraded.")
-            return ("Matt is safe. Mike: smart center-green. Matt: avoid short-siding.",
-                    rules, ev, "Mike", smart_peek)
-        return ("Matt is safe. Mike: ATTACK pin if angle allows. Matt: avoid short-siding.",
-                rules, ev, "Mike", smart_peek)
-
-    if mike_safe and not matt_safe:
-        rules.append("Mike safe; Matt not safe.")
-        ev = expected_net_advantage("Matt", safe_ball=True, day2_bias=day2_bias)
-        smart_peek = dict(attacker="Matt", ev=ev, safe="Yes", matt_w=MATT_W[hole_idx], mike_w=MIKE_W[hole_idx])
-        if bad_streak(matt_shots) >= BAD_STREAK_THRESHOLD or ev <= 0 or is_deadband(ev):
-            rules.append("Matt attack downgraded to damage control.")
-            return ("Mike is safe. Matt: stop chasing par; advance; avoid hazard.",
-                    rules, ev, "Matt", smart_peek)
-        return ("Mike is safe. Matt: ATTACK with freedom. Mike: easy two-putt for par.",
-                rules, ev, "Matt", smart_peek)
-
-    if mike_safe and matt_safe:
-        rules.append("Both safe.")
-        attacker = choose_attacker_candidate(m_last, k_last)
-        ev = expected_net_advantage(attacker, safe_ball=True, day2_bias=day2_bias)
-        smart_peek = dict(attacker=attacker, ev=ev, safe="Yes", matt_w=MATT_W[hole_idx], mike_w=MIKE_W[hole_idx])
-        if ev <= 0 or is_deadband(ev):
-            return ("Both are safe. Choose best birdie look; both play controlled lines.",
-                    rules, ev, attacker, smart_peek)
-        return ("Both are safe. Choose best birdie look; one flag-hunts, the other locks par.",
-                rules, ev, attacker, smart_peek)
-
-    rules.append("No one safe yet → damage-control bias.")
-    smart_peek = dict(attacker=None, ev=0.0, safe="No", matt_w=MATT_W[hole_idx], mike_w=MIKE_W[hole_idx])
-    return ("Neither is safe yet. Advance to comfortable yardage; prioritize bogey (often net par for Matt on stroke holes).",
-            rules, 0.0, None, smart_peek)
-
-def net_targets_text() -> str:
-    par = PAR[hole_idx]
-    return f"Par {par}. Strokes — Matt: {matt_strokes}, Mike: {mike_strokes}. Matt bogey often equals net {par}."
-
-def scroll_to_top_js():
-    st.components.v1.html('''
-    <script>
-    window.scrollTo({top: 0, behavior: "smooth"});
-    </script>
-    ''', height=0)
-
-
-
 
-# --- MOBILE-FIRST HEADER & LIVE RECOMMENDATION ---
-st.markdown("<h4 style='margin-bottom:0.2em;'>Better-Ball Caddie for MKCC</h4>", unsafe_allow_html=True)
-
-# Compute recommendation after grading UI, before displaying it
-rec, rules, ev, attacker, peek = role_advice_and_rules(day2, improve_list)
-
-# Live Recommendation (smaller text, right under title)
-st.markdown("<div class='sticky-reco' style='font-size:1.05em;'>", unsafe_allow_html=True)
-st.markdown("#### Live Recommendation", unsafe_allow_html=True)
-st.write(rec)
-st.caption(net_targets_text())
-st.markdown('</div>', unsafe_allow_html=True)
-
-# Next/Prev buttons at top for thumb reach
-bprev, bnext = st.columns(2)
-if bprev.button("◀ Prev Hole", use_container_width=True, key=f"bprev_{hole}"):
-    st.session_state["hole"] = max(1, hole - 1)
-    st.rerun()
-if bnext.button("Next Hole ▶", use_container_width=True, key=f"bnext_{hole}"):
-    st.session_state["hole"] = min(18, hole + 1)
-    st.rerun()
-
-# Current hole info
-st.markdown(f"<div style='font-size:1.1em; margin-bottom:0.5em;'><b>Hole {hole}</b> (Par {PAR[hole_idx]}, HCP {HOLE_HANDICAP[hole_idx]})</div>", unsafe_allow_html=True)
-
-# Helper text (reduced margin for less whitespace)
-st.markdown("<div style='font-size:0.98em; color:#555; margin-bottom:0.15em;'>After you hit, grade your shot</div>", unsafe_allow_html=True)
-
-# --- SHOT ENTRY UI (mobile-friendly) ---
-c1, c2 = st.columns(2, gap="large")
-def scroll_to_top_js():
-    st.components.v1.html('''
-    <script>
-    window.scrollTo({top: 0, behavior: "smooth"});
-    </script>
-    ''', height=0)
-
-with c1:
-    st.markdown("#### Matt", unsafe_allow_html=True)
+def join_round():
+    """Switch this phone to the round whose code was typed in; both phones then share its log."""
+    ss = st.session_state
+    rid = find_round(ss["join_code"])
+    ss["join_code"] = ""
+    if rid is None:
+        st.toast("No round matches that code.")
+        return
+    ss["round_id"] = rid
+    st.query_params["round"] = rid
+    ss["hole"] = open_round(rid).state.hole
+
+
+# --- Fragments ---
+@st.fragment(key="reco")
+def live_recommendation():
+    with profiler().span("reco"):
+        rec, rules, ev, attacker, peek, targets = advice(current_state())
+        st.markdown("<div class='sticky-reco' style='font-size:1.05em;'>", unsafe_allow_html=True)
+        st.markdown("#### Live Recommendation", unsafe_allow_html=True)
+        st.write(rec)
+        st.caption(targets)
+        st.markdown('</div>', unsafe_allow_html=True)
+
+def shot_row(player: int):
+    hole = st.session_state["hole"]
+    name = team_names()[player]
+    st.markdown(f"#### {name}", unsafe_allow_html=True)
     st.markdown('<div class="grade-grid">', unsafe_allow_html=True)
-    for g in ["A","B","C","D","F"]:
-        if st.button(g, key=f"matt_{hole}_{g}", help=GRADE_HELP[g], use_container_width=True):
-            matt_shots.append(GRADE_TO_SCORE[g])
-            scroll_to_top_js()
-            st.rerun()
+    for g in GRADES:
+        st.button(g, key=f"p{player}_{hole}_{g}", help=GRADE_HELP[g], use_container_width=True,
+                  on_click=add_grade, args=(player, hole, g))
     st.markdown('</div>', unsafe_allow_html=True)
-    st.write("Matt shots:", " ".join(SCORE_TO_GRADE[s] for s in matt_shots) or "—")
+    st.write(f"{name} shots:", format_grades(shots(player, hole)))
+
+def _player_row(player: int):
+    @st.fragment(key=f"row_{player}")
+    def row():
+        with profiler().span("shot row"):
+            shot_row(player)
+    return row
+
+player_rows = [_player_row(p) for p in range(MAX_PLAYERS)]
+
+@st.fragment(key="undo")
+def undo_bar():
+    profiler().count("undo bar")
+    state = round_log().state
+    cu, cr = st.columns(2)
+    cu.button("↶ Undo last tap", key="undo_tap", use_container_width=True, disabled=not state.can_undo,
+              on_click=undo_redo, args=("undo",))
+    cr.button("↷ Redo", key="redo_tap", use_container_width=True, disabled=not state.can_redo,
+              on_click=undo_redo, args=("redo",))
+
+@st.fragment(key="why")
+def why_panel():
+    with profiler().span("why"):
+        explain()
+
+def explain():
+    state = current_state()
+    rec, rules, ev, attacker, peek, targets = advice(state)
+    hole, hole_idx, c = state.hole, state.hole_idx, state.course
+    names = team_names()
+    # Advice for every possible next tap; a tap into this batch is answered from it
+    with profiler().span("lookahead"):
+        batch = st.session_state["lookahead"].speculate(state, advise)
+    panel = st.expander("Why this? (full explainability)", key="why_open", on_change="rerun")
+    with panel:
+        if not panel.open:               # built on first open (a fragment rerun): exact EV and the what-if grid
+            return
+        st.markdown("- **Hole**: {} (Par {}, HCP {}) · {}".format(hole, c.par[hole_idx], c.hole_handicap[hole_idx],
+                                                                 c.label))
+        st.markdown("- **Format**: {} ({} players)".format(FORMAT_LABELS[st.session_state["format"]], len(names)))
+        for p, name in enumerate(names):
+            st.markdown("- **{} grades**: {}".format(name, format_grades(shots(p, hole))))
+        st.markdown("- **Per-hole strength**: {} (params {}{})".format(
+            " · ".join(f"{name} {c.weights_for(name)[hole_idx]:.2f}" for name in names), PARAMS_VERSION,
+            f", {weight_learner(c.key).label()}" if st.session_state["learn"] else ""))
+        st.markdown("- **Day-2 mode**: {} · Improve: {}".format("ON" if state.day2 else "OFF",
+                                                               list(state.improve_list) or "—"))
+        st.markdown("- **Expected Net Advantage (ATTACK vs ANCHOR)**: **{:+.2f}**{}".format(
+            ev, f" for {attacker}" if attacker else ""))
+        if isinstance(state, HoleState):
+            from caddie.exact import exact_ev
+            with profiler().span("exact ev"):
+                exact = exact_ev(state, attacker)
+            st.markdown("- **Exact EV (Markov model, strokes per hole)**: {}".format(
+                "—" if exact is None else f"**{exact:+.2f}** for {attacker}"))
+        st.markdown("- **Rules fired**:")
+        if rules:
+            for r in rules:
+                st.markdown(f"  - {r}")
+        else:
+            st.markdown("  - (none yet)")
+        now = plan_label(rec, ev, attacker)
+        grid = ["| What if… | " + " | ".join(GRADES) + " |", "|---|" + "---|" * len(GRADES)]
+        for p, name in enumerate(names):
+            cells = []
+            for g in GRADES:
+                next_rec, _, next_ev, next_attacker, *_ = batch[p, GRADE_TO_SCORE[g]]
+                label = plan_label(next_rec, next_ev, next_attacker)
+                cells.append(label if label == now else f"**{label}**")
+            grid.append(f"| {name} | " + " | ".join(cells) + " |")
+        st.markdown("- **What if the next shot is…** (bold: the plan changes)\n\n" + "\n".join(grid))
+
+
+def round_plan(hole: int):
+    """Whole-round plan for the Matt & Mike pair from this hole on (caddie.planner)."""
+    ss = st.session_state
+    panel = st.expander("Round plan", key="plan_open", on_change="rerun")
+    with panel:
+        if not panel.open:               # the planner's tables are built on first open
+            return
+        if not pair_team():
+            st.caption("The round planner covers the Matt & Mike best-ball pair.")
+            return
+        ringer = None
+        if ss["goal"] == "ringer":
+            card = ss["ringer_card"].replace(",", " ").split()
+            if len(card) != 18 or not all(v.lstrip("-").isdigit() for v in card):
+                st.caption("Enter the Day-1 card (18 team net scores) in the sidebar to plan for the ringer.")
+                return
+            ringer = tuple(int(v) for v in card)
+        standing = ss["match_up"] if ss["goal"] == "match" else 0
+        from caddie.planner import round_planner
+        with profiler().span("planner"):
+            planner = round_planner(course(), *team_hcps(), goal=ss["goal"],
+                                    opponent_hcps=(ss["opp_hcp_0"], ss["opp_hcp_1"]), ringer=ringer)
+            plan = planner.plan(hole, standing)
+        st.markdown(f"- **{GOAL_LABELS[ss['goal']]}**: {planner.describe(hole, standing)}")
+        st.markdown("- **This hole**: {} · **Then**: {}".format(
+            plan[0][1], " · ".join(f"{h} {policy}" for h, policy in plan[1:]) or "—"))
+
+def partner_changed(deltas, hole: int) -> bool:
+    """Whether other phones' deltas change what this phone shows for `hole` (None: fell behind the hub)."""
+    if deltas is None:
+        return True
+    return any(d.kind in (HOLE, UNDO, REDO) or (d.kind in (GRADE, RESET) and d.hole == hole)
+               for d in deltas if d.origin != origin())
+
+@st.fragment(key="partner", run_every=SYNC_SECONDS if st.session_state["syncing"] else SYNC_IDLE_SECONDS)
+def partner_watch():
+    """Live sync: one version check per tick; reruns the app for a partner's relevant change, arrival or exit."""
+    ss = st.session_state
+    log = round_log()
+    profiler().count("sync checks")
+    log.hub.seen(origin())
+    if log.hub.partners(origin(), SYNC_PARTNER_SECONDS) != ss["syncing"]:
+        st.rerun()                     # a partner joined or left: the full run switches the tick rate
+    if log.hub.version == ss["seen"]:
+        return
+    deltas = log.hub.since(ss["seen"])
+    ss["seen"] = deltas[-1].version if deltas else log.hub.version
+    if partner_changed(deltas, ss["hole"]):
+        ss["hole"] = log.state.hole
+        st.rerun()
 
-with c2:
-    st.markdown("#### Mike", unsafe_allow_html=True)
-    st.markdown('<div class="grade-grid">', unsafe_allow_html=True)
-    for g in ["A","B","C","D","F"]:
-        if st.button(g, key=f"mike_{hole}_{g}", help=GRADE_HELP[g], use_container_width=True):
-            mike_shots.append(GRADE_TO_SCORE[g])
-            scroll_to_top_js()
-            st.rerun()
-    st.markdown('</div>', unsafe_allow_html=True)
-    st.write("Mike shots:", " ".join(SCORE_TO_GRADE[s] for s in mike_shots) or "—")
 
+def diagnostics():
+    """This session's counters and span timings (CADDIE_PROFILE=1 and ?diag=1)."""
+    prof = profiler()
+    la = st.session_state["lookahead"]
+    with st.expander("Diagnostics"):
+        st.caption(" · ".join(f"{k} {v}" for k, v in sorted(prof.counters.items()))
+                   + f" · lookahead hits {la.hits} / misses {la.misses}")
+        cols = ("span", "count", "mean_ms", "p50_ms", "p95_ms", "max_ms")
+        table = ["| " + " | ".join(cols) + " |", "|---" * len(cols) + "|"]
+        table += ["| " + " | ".join(str(row[c]) for c in cols) + " |" for row in prof.rows()]
+        st.markdown("\n".join(table))
+        st.button("Export metrics", key="export_metrics", on_click=export_metrics)
+
+def export_metrics():
+    profiler().export(session=origin(), round=st.session_state["round_id"])
 
-# Keep “hole” in session for big buttons + slider to stay in sync
-if "hole" not in st.session_state:
-    st.session_state["hole"] = 1
-hole = st.session_state["hole"]
 
-# Sidebar (so rec appears at top of page)
-with st.sidebar:
+# Sidebar (rendered first so its values feed this run's recommendation)
+with st.sidebar, profiler().span("sidebar"):
     st.subheader("Round Controls")
+    st.selectbox("Course", options=list(registry()), key="course", on_change=set_course,
+                 format_func=lambda key: get_course(key).label)
     # Big Prev/Next for iPhone thumb reach
     cprev, cnext = st.columns(2)
-    if cprev.button("◀ Prev", use_container_width=True):
-        st.session_state["hole"] = max(1, hole - 1); st.rerun()
-    if cnext.button("Next ▶", use_container_width=True):
-        st.session_state["hole"] = min(18, hole + 1); st.rerun()
+    cprev.button("◀ Prev", use_container_width=True, on_click=go_to_hole, args=(st.session_state["hole"] - 1,))
+    cnext.button("Next ▶", use_container_width=True, on_click=go_to_hole, args=(st.session_state["hole"] + 1,))
 
     hole = st.slider("Hole", 1, 18, st.session_state["hole"])
     st.session_state["hole"] = hole
-
-    matt_hcp = st.number_input("Matt handicap", min_value=0, max_value=54, value=19)
-    mike_hcp = st.number_input("Mike handicap", min_value=0, max_value=54, value=13)
+    round_log().goto(hole, origin())
+
+    cfmt, cn = st.columns(2)
+    cfmt.selectbox("Format", options=FORMATS, key="format", format_func=FORMAT_LABELS.get)
+    cn.number_input("Players", min_value=2, max_value=MAX_PLAYERS, key="n_players")
+    for p in range(st.session_state["n_players"]):
+        cname, chcp = st.columns([3, 2])
+        cname.text_input(f"Player {p + 1}", key=f"name_{p}")
+        chcp.number_input("Handicap", min_value=0, max_value=54, key=f"hcp_{p}")
     st.write("Grades: A=Best, B=Good, C=Playable, D=Trouble, F=Penalty")
+    st.toggle("Learn weights", key="learn", help="Each hole you finish nudges Matt's and Mike's strength "
+              "on it toward how they played it.")
+    st.toggle("Offline mode", key="offline", help="Recommendations are computed on this phone; "
+              "taps sync to the server when there is signal.")
 
     # Day-2 Ringer
-    day2 = st.checkbox("Day-2 Ringer mode", value=False, help="Increases attack bias only on holes you pick.")
-    improve_list = st.multiselect(
+    st.checkbox("Day-2 Ringer mode", key="day2", help="Increases attack bias only on holes you pick.")
+    st.multiselect(
         "Holes to improve today",
         options=list(range(1,19)),
-        default=[],
+        key="improve_list",
         help="Engine pushes harder on these holes when safe."
     )
 
-    if st.button(f"Reset Hole {hole}", key=f"reset_{hole}", use_container_width=True):
-        st.session_state[f"matt_{hole}"] = []
-        st.session_state[f"mike_{hole}"] = []
-        st.rerun()
-
-# Per-hole state arrays
-if f"matt_{hole}" not in st.session_state: st.session_state[f"matt_{hole}"] = []
-if f"mike_{hole}" not in st.session_state: st.session_state[f"mike_{hole}"] = []
-matt_shots = st.session_state[f"matt_{hole}"]
-mike_shots = st.session_state[f"mike_{hole}"]
+    st.button(f"Reset Hole {hole}", key=f"reset_{hole}", use_container_width=True,
+              on_click=reset_hole, args=(hole,))
+    st.selectbox("Round goal", options=list(GOAL_LABELS), key="goal", format_func=GOAL_LABELS.get,
+                 help="The round plan picks each remaining hole's aggressiveness for this goal.")
+    if st.session_state["goal"] == "match":
+        cup, co1, co2 = st.columns(3)
+        cup.number_input("Holes up", min_value=-18, max_value=18, key="match_up")
+        co1.number_input("Opp. HCP", min_value=0, max_value=54, key="opp_hcp_0")
+        co2.number_input("Opp. HCP", min_value=0, max_value=54, key="opp_hcp_1", label_visibility="hidden")
+    elif st.session_state["goal"] == "ringer":
+        st.text_input("Day-1 card", key="ringer_card", placeholder="18 team net scores, e.g. 4 5 3 …")
+
+    st.button("New round", use_container_width=True, on_click=new_round,
+              help="Start an empty round; the old one stays in its link.")
+    st.text_input("Join round", key="join_code", on_change=join_round, placeholder="Partner's round code",
+                  help="Grade from two phones: enter the code shown on the other phone.")
+    st.caption(f"Round code: **{st.session_state['round_id'][:6]}**")
 
 hole_idx = hole - 1
-matt_strokes = strokes_for(matt_hcp, hole_idx)
-mike_strokes = strokes_for(mike_hcp, hole_idx)
-
-# === CORE LOGIC (kept near top so rec shows first and updates instantly) ====
-def choose_attacker_candidate(m_last: int | None, k_last: int | None) -> str:
-    """Pick attacker using last grades + per-hole strengths + bad streak penalty."""
-    m_bad = bad_streak(matt_shots)
-    k_bad = bad_streak(mike_shots)
-    m_score = (m_last or 0) + MATT_W[hole_idx]*0.6 - m_bad*0.4
-    k_score = (k_last or 0) + MIKE_W[hole_idx]*0.6 - k_bad*0.4
-    return "Matt" if m_score >= k_score else "Mike"
-
-def expected_net_advantage(attacker: str, safe_ball: bool, day2_bias: bool) -> float:
-    """Heuristic EV(ATTACK − ANCHOR). Positive favors ATTACK."""
-    if attacker == "Matt":
-        w = MATT_W[hole_idx]; streak = bad_streak(matt_shots); strokes = matt_strokes
-    else:
-        w = MIKE_W[hole_idx]; streak = bad_streak(mike_shots); strokes = mike_strokes
-
-    base = w * 0.35
-    if day2_bias: base += 0.25
-    if safe_ball: base += 0.20
-    base += (0.05 if strokes > 0 else -0.05)  # slight boost if receiving a stroke
-    risk = 0.15 * min(streak, 3)              # rising risk with bad streak
-    if not safe_ball: risk += 0.20            # no safety net → conservative
-    return round(base - risk, 2)
-
-def is_deadband(ev: float) -> bool:
-    """Treat near-zero EV as 'no clear edge' (avoid fake precision)."""
-    return -0.05 <= ev <= 0.05
-
-def role_advice_and_rules(day2: bool, improve_list: List[int]):
-    """Return (recommendation, rules, EV, attacker, smart_peek_dict)."""
-    rules = []
-    m1 = last(matt_shots); k1 = last(mike_shots)
-
-    # Bad-streak guardrails
-    matt_bad_run = bad_streak(matt_shots); mike_bad_run = bad_streak(mike_shots)
-    if matt_bad_run >= BAD_STREAK_THRESHOLD: rules.append(f"Matt bad streak {matt_bad_run} → no green light.")
-    if mike_bad_run >= BAD_STREAK_THRESHOLD: rules.append(f"Mike bad streak {mike_bad_run} → no green light.")
-
-    # Tee order: prefer strokes/comfort to secure a safe ball early
-    if len(matt_shots) == 0 and len(mike_shots) == 0:
-        matt_pref = (matt_strokes > mike_strokes) or (MATT_W[hole_idx] > MIKE_W[hole_idx])
-        who_first = "Matt" if matt_pref else "Mike"
-        rules.append(f"Tee order by strokes/comfort → {who_first} tees first.")
-        smart_peek = dict(attacker=None, ev=0.0, safe="N/A", matt_w=MATT_W[hole_idx], mike_w=MIKE_W[hole_idx])
-        return (f"{who_first} tees first. First player: put a ball in play. Partner adjusts based on result.",
-                rules, 0.0, None, smart_peek)
-
-    # One tee shot taken
-    if len(matt_shots) + len(mike_shots) == 1:
-        first_who = "Matt" if len(matt_shots) else "Mike"
-        first_rating = m1 if len(matt_shots) else k1
-        other_who = "Mike" if first_who == "Matt" else "Matt"
-        day2_bias = day2 and (hole in improve_list)
-
-        if first_rating >= SAFE_SCORE:
-            rules.append(f"{first_who} safe (≥B).")
-            ev = expected_net_advantage(other_who, safe_ball=True, day2_bias=day2_bias)
-            downgrade = (
-                (other_who == "Matt" and matt_bad_run >= BAD_STREAK_THRESHOLD)
-                or (other_who == "Mike" and mike_bad_run >= BAD_STREAK_THRESHOLD)
-                or ev <= 0 or is_deadband(ev)
-            )
-            if downgrade:
-                rules.append(f"{other_who} attack downgraded (bad-streak or EV≤0 or deadband).")
-                smart_peek = dict(attacker=other_who, ev=ev, safe="Yes", matt_w=MATT_W[hole_idx], mike_w=MIKE_W[hole_idx])
-                return (f"{first_who} is safe. {other_who}: controlled target; no hero shots.",
-                        rules, ev, other_who, smart_peek)
-            smart_peek = dict(attacker=other_who, ev=ev, safe="Yes", matt_w=MATT_W[hole_idx], mike_w=MIKE_W[hole_idx])
-            return (f"{first_who} is safe. {other_who}: ATTACK for a birdie look.",
-                    rules, ev, other_who, smart_peek)
-
-        if first_rating <= BAD_SCORE:
-            rules.append(f"{first_who} in trouble (≤D).")
-            smart_peek = dict(attacker=None, ev=0.0, safe="No", matt_w=MATT_W[hole_idx], mike_w=MIKE_W[hole_idx])
-            return (f"{first_who} is in trouble. {other_who}: ANCHOR (fairway finder; center green).",
-                    rules, 0.0, None, smart_peek)
-
-        rules.append(f"{first_who} average (C).")
-        ev = expected_net_advantage(other_who, safe_ball=False, day2_bias=day2_bias)
-        smart_peek = dict(attacker=other_who, ev=ev, safe="No", matt_w=MATT_W[hole_idx], mike_w=MIKE_W[hole_idx])
-        if ev <= 0 or is_deadband(ev):
-            return (f"{first_who} is average. {other_who}: conservative line; favor fairway/center.",
-                    rules, ev, other_who, smart_peek)
-        return (f"{first_who} is average. {other_who}: medium risk line toward best angle.",
-                rules, ev, other_who, smart_peek)
-
-    # Both tee shots hit
-    if len(matt_shots) == 1 and len(mike_shots) == 1:
-        day2_bias = day2 and (hole in improve_list)
-        safe_balls = sum(1 for r in [m1, k1] if r is not None and r >= SAFE_SCORE)
-
-        if safe_balls >= 1:
-            rules.append("At least one safe tee ball.")
-            attacker = choose_attacker_candidate(m1, k1)
-            ev = expected_net_advantage(attacker, safe_ball=True, day2_bias=day2_bias)
-            partner = "Mike" if attacker == "Matt" else "Matt"
-            smart_peek = dict(attacker=attacker, ev=ev, safe="Yes", matt_w=MATT_W[hole_idx], mike_w=MIKE_W[hole_idx])
-
-            bad_run = bad_streak(matt_shots) if attacker == "Matt" else bad_streak(mike_shots)
-            if bad_run >= BAD_STREAK_THRESHOLD or ev <= 0 or is_deadband(ev):
-                rules.append(f"{attacker} attack downgraded (bad-streak or EV≤0 or deadband).")
-                return (f"Team has a safe ball. {attacker}: controlled target. {partner}: easy two-putt.",
-                        rules, ev, attacker, smart_peek)
-            return (f"Team has a safe ball. {attacker}: ATTACK. {partner}: easy two-putt.",
-                    rules, ev, attacker, smart_peek)
-
-        if (m1 or 0) <= BAD_SCORE and (k1 or 0) <= BAD_SCORE:
-            better_who = "Matt" if (m1 or 0) >= (k1 or 0) else "Mike"
-            rules.append("Both tee balls in trouble.")
-            smart_peek = dict(attacker=better_who, ev=0.0, safe="No", matt_w=MATT_W[hole_idx], mike_w=MIKE_W[hole_idx])
-            return (f"Both in trouble. Play from {better_who}'s better lie. Advance safely; protect bogey "
-                    f"(often net par for Matt on stroke holes).",
-                    rules, 0.0, better_who, smart_peek)
-
-        attacker = choose_attacker_candidate(m1, k1)
-        ev = expected_net_advantage(attacker, safe_ball=False, day2_bias=day2_bias)
-        smart_peek = dict(attacker=attacker, ev=ev, safe="No", matt_w=MATT_W[hole_idx], mike_w=MIKE_W[hole_idx])
-        rules.append("Mixed tee outcomes; attacker chosen by grades + hole strength.")
-        if ev <= 0 or is_deadband(ev):
-            return (f"Mixed results. Favor {attacker}'s lie but avoid high-risk lines; set up inside-15 ft if easy.",
-                    rules, ev, attacker, smart_peek)
-        return (f"Mixed results. Favor {attacker}'s lie; attacker aims for inside-15 ft.",
-                rules, ev, attacker, smart_peek)
-
-    # Approaches and beyond
-    m_last = (last(matt_shots) or 0); k_last = (last(mike_shots) or 0)
-    matt_safe = m_last >= SAFE_SCORE; mike_safe = k_last >= SAFE_SCORE
-    day2_bias = day2 and (hole in improve_list)
-
-    if matt_safe and not mike_safe:
-        rules.append("Matt safe; Mike not safe.")
-        ev = expected_net_advantage("Mike", safe_ball=True, day2_bias=day2_bias)
-        smart_peek = dict(attacker="Mike", ev=ev, safe="Yes", matt_w=MATT_W[hole_idx], mike_w=MIKE_W[hole_idx])
-        if bad_streak(mike_shots) >= BAD_STREAK_THRESHOLD or ev <= 0 or is_deadband(ev):
-            rules.append("Mike attack downgraded.")
-            return ("Matt is safe. Mike: smart center-green. Matt: avoid short-siding.",
-                    rules, ev, "Mike", smart_peek)
-        return ("Matt is safe. Mike: ATTACK pin if angle allows. Matt: avoid short-siding.",
-                rules, ev, "Mike", smart_peek)
-
-    if mike_safe and not matt_safe:
-        rules.append("Mike safe; Matt not safe.")
-        ev = expected_net_advantage("Matt", safe_ball=True, day2_bias=day2_bias)
-        smart_peek = dict(attacker="Matt", ev=ev, safe="Yes", matt_w=MATT_W[hole_idx], mike_w=MIKE_W[hole_idx])
-        if bad_streak(matt_shots) >= BAD_STREAK_THRESHOLD or ev <= 0 or is_deadband(ev):
-            rules.append("Matt attack downgraded to damage control.")
-            return ("Mike is safe. Matt: stop chasing par; advance; avoid hazard.",
-                    rules, ev, "Matt", smart_peek)
-        return ("Mike is safe. Matt: ATTACK with freedom. Mike: easy two-putt for par.",
-                rules, ev, "Matt", smart_peek)
-
-    if mike_safe and matt_safe:
-        rules.append("Both safe.")
-        attacker = choose_attacker_candidate(m_last, k_last)
-        ev = expected_net_advantage(attacker, safe_ball=True, day2_bias=day2_bias)
-        smart_peek = dict(attacker=attacker, ev=ev, safe="Yes", matt_w=MATT_W[hole_idx], mike_w=MIKE_W[hole_idx])
-        if ev <= 0 or is_deadband(ev):
-            return ("Both are safe. Choose best birdie look; both play controlled lines.",
-                    rules, ev, attacker, smart_peek)
-        return ("Both are safe. Choose best birdie look; one flag-hunts, the other locks par.",
-                rules, ev, attacker, smart_peek)
-
-    rules.append("No one safe yet → damage-control bias.")
-    smart_peek = dict(attacker=None, ev=0.0, safe="No", matt_w=MATT_W[hole_idx], mike_w=MIKE_W[hole_idx])
-    return ("Neither is safe yet. Advance to comfortable yardage; prioritize bogey (often net par for Matt on stroke holes).",
-            rules, 0.0, None, smart_peek)
-
-def net_targets_text() -> str:
-    par = PAR[hole_idx]
-    return f"Par {par}. Strokes — Matt: {matt_strokes}, Mike: {mike_strokes}. Matt bogey often equals net {par}."
-st.markdown('</div>', unsafe_allow_html=True)
-st.markdown("---")
-st.markdown("---")
-c1, c2 = st.columns(2, gap="large")
-c1, c2 = st.columns(2, gap="large")
-def scroll_to_top_js():
-    st.components.v1.html('''
-    <script>
-    window.scrollTo({top: 0, behavior: "smooth"});
-    </script>
-    ''', height=0)
-
-with c1:
-    st.markdown("#### Matt", unsafe_allow_html=True)
-    st.markdown('<div class="grade-grid">', unsafe_allow_html=True)
-    for g in ["A","B","C","D","F"]:
-        if st.button(g, key=f"matt_{hole}_{g}", help=GRADE_HELP[g], use_container_width=True):
-            matt_shots.append(GRADE_TO_SCORE[g])
-            scroll_to_top_js()
-            st.rerun()
-    st.markdown('</div>', unsafe_allow_html=True)
-    st.write("Matt shots:", " ".join(SCORE_TO_GRADE[s] for s in matt_shots) or "—")
+active = course()
 
-with c2:
-    st.markdown("#### Mike", unsafe_allow_html=True)
-    st.markdown('<div class="grade-grid">', unsafe_allow_html=True)
-    for g in ["A","B","C","D","F"]:
-        if st.button(g, key=f"mike_{hole}_{g}", help=GRADE_HELP[g], use_container_width=True):
-            mike_shots.append(GRADE_TO_SCORE[g])
-            scroll_to_top_js()
-            st.rerun()
-    st.markdown('</div>', unsafe_allow_html=True)
-    st.write("Mike shots:", " ".join(SCORE_TO_GRADE[s] for s in mike_shots) or "—")
+
+# --- MOBILE-FIRST HEADER & LIVE RECOMMENDATION ---
+st.markdown(f"<h4 style='margin-bottom:0.2em;'>Better-Ball Caddie for {active.name}</h4>", unsafe_allow_html=True)
+
+offline_fp = offline_fingerprint(active.key) if st.session_state["offline"] and pair_team() else None
+if offline_fp:
+    # Recommendation, hole buttons and grade grid all run in the browser
+    ss = st.session_state
+    from caddie.bundle import bundle_name
+    with profiler().span("offline"):
+        offline_caddie()(key="offline_sync", default=None, on_change=sync_offline,
+                       round=ss["round_id"], acked=round_log().state.acked, bundle=bundle_name(active.key),
+                       fingerprint=offline_fp,
+                       hole=hole, matt_hcp=ss["hcp_0"], mike_hcp=ss["hcp_1"], day2=ss["day2"],
+                       improve_list=list(ss["improve_list"]),
+                       shots={who: [shots(p, h) for h in range(1, 19)] for p, who in enumerate(PLAYERS)})
+else:
+    if st.session_state["offline"] and not pair_team():
+        st.info("Offline mode covers the Matt & Mike best-ball pair; this team is advised online.")
+    elif st.session_state["offline"]:
+        st.warning("The offline bundle could not be written on this server; advising online.")
+
+    # Live Recommendation (smaller text, right under title)
+    live_recommendation()
+
+    # Next/Prev buttons at top for thumb reach
+    bprev, bnext = st.columns(2)
+    bprev.button("◀ Prev Hole", use_container_width=True, key=f"bprev_{hole}", on_click=go_to_hole, args=(hole - 1,))
+    bnext.button("Next Hole ▶", use_container_width=True, key=f"bnext_{hole}", on_click=go_to_hole, args=(hole + 1,))
+
+    # Current hole info
+    st.markdown(f"<div style='font-size:1.1em; margin-bottom:0.5em;'><b>Hole {hole}</b> (Par {active.par[hole_idx]}, HCP {active.hole_handicap[hole_idx]})</div>", unsafe_allow_html=True)
+
+    # Helper text (reduced margin for less whitespace)
+    st.markdown("<div style='font-size:0.98em; color:#555; margin-bottom:0.15em;'>After you hit, grade your shot</div>", unsafe_allow_html=True)
+
+    # --- SHOT ENTRY UI (mobile-friendly): two players per row ---
+    n_players = st.session_state["n_players"]
+    for first in range(0, n_players, 2):
+        for col, p in zip(st.columns(2, gap="large"), range(first, min(first + 2, n_players))):
+            with col:
+                player_rows[p]()
+
+    undo_bar()
 
 st.markdown("---")
 
-with st.expander("Why this? (full explainability)"):
-    st.markdown("- **Hole**: {} (Par {}, HCP {})".format(hole, PAR[hole_idx], HOLE_HANDICAP[hole_idx]))
-    st.markdown("- **Matt grades**: {}".format(" ".join(SCORE_TO_GRADE[s] for s in matt_shots) or "—"))
-    st.markdown("- **Mike grades**: {}".format(" ".join(SCORE_TO_GRADE[s] for s in mike_shots) or "—"))
-    st.markdown("- **Per-hole strength**: Matt {:.2f} · Mike {:.2f}".format(MATT_W[hole_idx], MIKE_W[hole_idx]))
-    st.markdown("- **Day-2 mode**: {} · Improve: {}".format("ON" if day2 else "OFF", improve_list or "—"))
-    st.markdown("- **Expected Net Advantage (ATTACK vs ANCHOR)**: **{:+.2f}**{}".format(
-        ev, f" for {attacker}" if attacker else ""))
-    st.markdown("- **Rules fired**:")
-    if rules:
-        for r in rules:
-            st.markdown(f"  - {r}")
-    else:
-        st.markdown("  - (none yet)")
-bprev, bnext = st.columns(2)
-if bprev.button("◀ Prev Hole", use_container_width=True, key=f"bprev_{hole}"):
-    st.session_state["hole"] = max(1, hole - 1); st.rerun()
-if bnext.button("Next Hole ▶", use_container_width=True, key=f"bnext_{hole}"):
-    st.session_state["hole"] = min(18, hole + 1); st.rerun()
+why_panel()
+
+round_plan(hole)
+
+if SYNC_SECONDS:
+    partner_watch()
+
+profiler().stop("full run", run_start)
+table_loader(active.key)               # background load, after the first recommendation was sent
+st.session_state["rendered"] = True
+if PROFILE:
+    if profiler().counters["reruns"] % PROFILE_EXPORT_EVERY == 0:
+        export_metrics()
+    if st.query_params.get("diag") == "1":
+        diagnostics()
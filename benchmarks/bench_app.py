@@ -0,0 +1,205 @@
+# === APP RERUN BENCHMARK ======================================================
+# Drives app.py headlessly with Streamlit's AppTest through scripted 18-hole
+# rounds and measures, per tap:
+#   wall_ms   time for the tap as seen by the test client (all reruns)
+#   exec_ms   time spent inside ScriptRunner._run_script (server work only)
+#   elements  elements rendered by the tap's rerun (whole page, or just the
+#             fragments a scoped rerun redrew)
+#   msgs      ForwardMsgs the server enqueued for the tap
+#   bytes     serialized size of those messages (pre-compression websocket payload)
+#
+# Results are reported as p50/p95 per tap kind against a stored baseline.
+#
+#   python benchmarks/bench_app.py                    compare with baseline.json
+#   python benchmarks/bench_app.py --save-baseline    record a new baseline
+#   python benchmarks/bench_app.py --check            exit 1 on a p95 regression
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, Iterator, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("CADDIE_ROUND_LOG_DIR", tempfile.mkdtemp(prefix="caddie-bench-"))   # before caddie.config
+
+from streamlit.runtime.scriptrunner.script_cache import ScriptCache  # noqa: E402
+from streamlit.runtime.scriptrunner.script_runner import ScriptRunner  # noqa: E402
+from streamlit.testing.v1 import AppTest, local_script_runner  # noqa: E402
+
+from caddie.config import PAR  # noqa: E402
+
+APP = os.path.join(ROOT, "app.py")
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+METRICS = ("wall_ms", "exec_ms", "elements", "msgs", "bytes")
+
+
+class Meter:
+    """Counts server work by wrapping two ScriptRunner methods (call-through only).
+
+    AppTest gives every run a fresh ScriptCache, so each tap would re-parse and
+    compile app.py; a server compiles it once per process. While metering, all
+    runs share one cache so exec_ms is script work, not compile time.
+    """
+
+    def __init__(self):
+        self.exec_s = 0.0
+        self.msgs = 0
+        self.bytes = 0
+        self._orig_run = ScriptRunner._run_script
+        self._orig_enqueue = ScriptRunner._enqueue_forward_msg
+        self._orig_cache = local_script_runner.ScriptCache
+
+    def __enter__(self):
+        meter = self
+
+        def _run_script(runner, rerun_data):
+            t0 = time.perf_counter()
+            try:
+                return meter._orig_run(runner, rerun_data)
+            finally:
+                meter.exec_s += time.perf_counter() - t0
+
+        def _enqueue_forward_msg(runner, msg):
+            meter.msgs += 1
+            meter.bytes += msg.ByteSize()
+            return meter._orig_enqueue(runner, msg)
+
+        shared = ScriptCache()
+        ScriptRunner._run_script = _run_script
+        ScriptRunner._enqueue_forward_msg = _enqueue_forward_msg
+        local_script_runner.ScriptCache = lambda: shared
+        return self
+
+    def __exit__(self, *exc):
+        ScriptRunner._run_script = self._orig_run
+        ScriptRunner._enqueue_forward_msg = self._orig_enqueue
+        local_script_runner.ScriptCache = self._orig_cache
+
+    def reset(self):
+        self.exec_s = 0.0
+        self.msgs = 0
+        self.bytes = 0
+
+
+def count_elements(node) -> int:
+    children = getattr(node, "children", None)
+    if not children:
+        return 1
+    return sum(count_elements(c) for c in children.values())
+
+
+def wait_for_tables() -> None:
+    """Let the background decision-table load finish: taps are measured warm (cold start: bench_startup.py)."""
+    for thread in threading.enumerate():
+        if thread.name.startswith("table-"):
+            thread.join()
+
+
+def scripted_round(seed: int, players: int = 2) -> Iterator[tuple]:
+    """(kind, widget key) taps for one round: grades for every player, then Next Hole."""
+    rng = random.Random(seed)
+    for hole in range(1, 19):
+        for _ in range(PAR[hole - 1] - 1):
+            for player in range(players):
+                yield "grade", f"p{player}_{hole}_{rng.choice('ABCDF')}"
+        if hole < 18:
+            yield "next", f"bnext_{hole}"
+
+
+def run_rounds(rounds: int, seed: int) -> Dict[str, List[dict]]:
+    samples = defaultdict(list)
+    with Meter() as meter:
+        for r in range(rounds):
+            at = AppTest.from_file(APP, default_timeout=30).run()     # first render, not a tap
+            wait_for_tables()
+            for kind, key in scripted_round(seed + r):
+                meter.reset()
+                t0 = time.perf_counter()
+                at.button(key=key).click().run()
+                wall = time.perf_counter() - t0
+                if at.exception:
+                    raise RuntimeError(f"app raised after tapping {key}: {at.exception[0].message}")
+                samples[kind].append(dict(wall_ms=wall * 1e3, exec_ms=meter.exec_s * 1e3,
+                                          elements=count_elements(at._tree), msgs=meter.msgs,
+                                          bytes=meter.bytes))
+                # AppTest only keeps what the last run drew; after a fragment-scoped
+                # rerun, redraw the page (unmeasured) so the next tap's widget exists,
+                # as it would in a browser.
+                at.run()
+    return samples
+
+
+def percentiles(values: List[float]) -> Dict[str, float]:
+    values = sorted(values)
+    q = statistics.quantiles(values, n=20, method="inclusive") if len(values) > 1 else values * 19
+    return {"p50": statistics.median(values), "p95": q[18]}
+
+
+def summarize(samples: Dict[str, List[dict]]) -> dict:
+    return {kind: {m: percentiles([s[m] for s in rows]) for m in METRICS} | {"taps": len(rows)}
+            for kind, rows in samples.items()}
+
+
+def report(current: dict, baseline: dict) -> List[str]:
+    lines = []
+    for kind, stats in current.items():
+        lines.append(f"{kind} ({stats['taps']} taps)")
+        for m in METRICS:
+            cur = stats[m]
+            base = baseline.get(kind, {}).get(m)
+            delta = ""
+            if base:
+                delta = "  vs baseline " + " ".join(
+                    f"{p} {(cur[p] / base[p] - 1) * 100:+.0f}%" if base[p] else f"{p} n/a" for p in ("p50", "p95"))
+            lines.append(f"  {m:9s} p50 {cur['p50']:10.2f}  p95 {cur['p95']:10.2f}{delta}")
+    return lines
+
+
+def regressions(current: dict, baseline: dict, tolerance: float) -> List[str]:
+    out = []
+    for kind, stats in current.items():
+        for m in METRICS:
+            base = baseline.get(kind, {}).get(m)
+            if base and stats[m]["p95"] > base["p95"] * (1 + tolerance):
+                out.append(f"{kind}.{m} p95 {stats[m]['p95']:.2f} > {base['p95']:.2f} × {1 + tolerance:.2f}")
+    return out
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Per-tap rerun latency and payload for app.py.")
+    ap.add_argument("--rounds", type=int, default=2)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--baseline", default=BASELINE)
+    ap.add_argument("--save-baseline", action="store_true")
+    ap.add_argument("--check", action="store_true", help="exit 1 if any p95 exceeds baseline × (1 + tolerance)")
+    ap.add_argument("--tolerance", type=float, default=0.25)
+    args = ap.parse_args(argv)
+
+    current = summarize(run_rounds(args.rounds, args.seed))
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+    print("\n".join(report(current, baseline)))
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(current, f, indent=1)
+        print(f"saved {args.baseline}")
+    if args.check:
+        bad = regressions(current, baseline, args.tolerance)
+        for line in bad:
+            print("REGRESSION", line)
+        return 1 if bad else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,116 @@
+# === COLD START BENCHMARK =====================================================
+# What a user waits for when a hosted deployment wakes up: each trial starts a
+# fresh Python process with no round logs (as on a new container; the decision
+# table is built unless one was saved), imports Streamlit's test client, then
+# renders app.py once for a first session and, once the decision table has loaded
+# in the background, once more for a second session in the same process.
+#
+#   import_ms    script start → st.set_page_config (app.py's own imports)
+#   ttfr_ms      script start → the recommendation text is sent (time to first recommendation)
+#   first_ms     the first session's whole first run (everything after the recommendation too)
+#   table_ms     end of that run → the background decision table is ready
+#   second_ms    a second session's first run in the warm process (process-wide caches hit)
+#
+# Times are p50/max over --trials processes. --check exits 1 when the p50 time to
+# first recommendation exceeds --budget-ms.
+#
+#   python benchmarks/bench_startup.py [--trials 5] [--check] [--budget-ms 200]
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP = os.path.join(ROOT, "app.py")
+BUDGET_MS = 200.0
+METRICS = ("import_ms", "ttfr_ms", "first_ms", "table_ms", "second_ms")
+RECO_HEADER = "#### Live Recommendation"
+
+
+def first_render() -> Dict[str, float]:
+    """One cold process: time the first and second sessions' first runs (runs in the child)."""
+    import streamlit as st
+    from streamlit.runtime.scriptrunner.script_runner import ScriptRunner
+    from streamlit.testing.v1 import AppTest
+
+    marks: Dict[str, float] = {}
+    run_script, enqueue, page_config = ScriptRunner._run_script, ScriptRunner._enqueue_forward_msg, st.set_page_config
+
+    def _run_script(runner, rerun_data):
+        marks.clear()
+        marks["start"] = time.perf_counter()
+        try:
+            return run_script(runner, rerun_data)
+        finally:
+            marks["end"] = time.perf_counter()
+
+    def _enqueue(runner, msg):
+        if "reco" in marks and "ttfr" not in marks and msg.HasField("delta"):
+            marks["ttfr"] = time.perf_counter()          # the first element after the header: the recommendation
+        elif msg.HasField("delta") and msg.delta.new_element.markdown.body == RECO_HEADER:
+            marks["reco"] = time.perf_counter()
+        return enqueue(runner, msg)
+
+    def _page_config(*args, **kwargs):
+        marks.setdefault("imported", time.perf_counter())
+        return page_config(*args, **kwargs)
+
+    ScriptRunner._run_script, ScriptRunner._enqueue_forward_msg, st.set_page_config = _run_script, _enqueue, _page_config
+    out = {}
+    for session in ("first", "second"):
+        at = AppTest.from_file(APP, default_timeout=60).run()
+        if at.exception:
+            raise RuntimeError(f"app raised on first render: {at.exception[0].message}")
+        out[f"{session}_ms"] = (marks["end"] - marks["start"]) * 1e3
+        if session == "first":
+            out.update(import_ms=(marks["imported"] - marks["start"]) * 1e3,
+                       ttfr_ms=(marks["ttfr"] - marks["start"]) * 1e3)
+            for thread in threading.enumerate():
+                if thread.name.startswith("table-"):
+                    thread.join()
+            out["table_ms"] = (time.perf_counter() - marks["end"]) * 1e3
+    return out
+
+
+def trial() -> Dict[str, float]:
+    """Run first_render in a fresh process with empty data directories."""
+    with tempfile.TemporaryDirectory(prefix="caddie-cold-") as tmp:
+        env = dict(os.environ, CADDIE_ROUND_LOG_DIR=os.path.join(tmp, "rounds"), PYTHONPATH=ROOT)
+        proc = subprocess.run([sys.executable, os.path.abspath(__file__), "--child"], env=env, cwd=tmp,
+                              capture_output=True, text=True, check=False)
+        if proc.returncode:
+            raise RuntimeError(f"trial failed:\n{proc.stderr}")
+        return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Cold-start time to first recommendation for app.py.")
+    ap.add_argument("--trials", type=int, default=5)
+    ap.add_argument("--budget-ms", type=float, default=BUDGET_MS)
+    ap.add_argument("--check", action="store_true", help="exit 1 if the p50 time to first recommendation is over budget")
+    ap.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = ap.parse_args(argv)
+
+    if args.child:
+        print(json.dumps(first_render()))
+        return 0
+    rows: List[Dict[str, float]] = [trial() for _ in range(args.trials)]
+    for m in METRICS:
+        values = [r[m] for r in rows]
+        print(f"  {m:10s} p50 {statistics.median(values):8.1f}  max {max(values):8.1f}")
+    ttfr = statistics.median(r["ttfr_ms"] for r in rows)
+    print(f"time to first recommendation {ttfr:.0f} ms (budget {args.budget_ms:.0f} ms)")
+    if args.check and ttfr > args.budget_ms:
+        print(f"OVER BUDGET by {ttfr - args.budget_ms:.0f} ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,144 @@
+# === LEAGUE LOAD TEST =========================================================
+# Simulates many groups tapping grades at the same time. Each group is one AppTest
+# session (its own round) playing a scripted round on a thread-pool worker. All
+# sessions run in this process, so they share the server's caches (course
+# registry, decision tables, open round logs) as sessions on one deployment do.
+#
+# For each concurrency level it reports per-tap latency (p50/p95/p99, grade and
+# Next Hole taps together) and total throughput, then names the level where the
+# process saturates: throughput grows less than --min-gain over the previous
+# level, or p95 passes --budget-ms.
+#
+# Taps are clicked through the session's last full page, so every widget value is
+# sent with the tap as a browser would, and no unmeasured redraw is needed between
+# fragment-scoped taps.
+#
+#   python benchmarks/load_test.py                              1..64 groups, 3 holes each
+#   python benchmarks/load_test.py --groups 8,16,32 --holes 18 --players 2
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Dict, List, Tuple
+
+os.environ.setdefault("CADDIE_ROUND_LOG_DIR", tempfile.mkdtemp(prefix="caddie-load-"))   # before caddie.config
+
+from bench_app import APP, Meter, scripted_round  # noqa: E402  (also puts the repo root on sys.path)
+
+from streamlit.runtime import Runtime  # noqa: E402
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+from caddie.config import PAR  # noqa: E402
+
+
+class SharedRuntime:
+    """Keeps a Runtime available to every concurrent session.
+
+    Each AppTest run installs a mock Runtime singleton and clears it when it
+    finishes, which would pull it out from under sessions still running. While
+    active, Runtime.instance() falls back to the last mock installed.
+    """
+
+    def __enter__(self):
+        self._orig = Runtime.__dict__["instance"], Runtime.__dict__["exists"]
+        latest = []
+
+        def instance(cls):
+            if cls._instance is not None:
+                latest[:] = [cls._instance]
+            if not latest:
+                raise RuntimeError("Runtime hasn't been created!")
+            return latest[0]
+
+        Runtime.instance = classmethod(instance)
+        Runtime.exists = classmethod(lambda cls: cls._instance is not None or bool(latest))
+        return self
+
+    def __exit__(self, *exc):
+        Runtime.instance, Runtime.exists = self._orig
+
+
+def play_group(group: int, players: int, holes: int, seed: int, start: threading.Barrier) -> Tuple[List[float], float, float]:
+    """One group's session: (tap latencies in ms, first tap start, last tap end)."""
+    at = AppTest.from_file(APP, default_timeout=600)         # a new session, so a new round
+    at.session_state["n_players"] = players
+    page = at.run()._tree
+    if at.exception:
+        raise RuntimeError(f"group {group}: first render raised {at.exception[0].message}")
+    taps = list(islice(scripted_round(seed + group, players),
+                       sum((PAR[h] - 1) * players + 1 for h in range(holes)) - 1))
+    start.wait()                                  # every group starts tapping together
+    latencies, t_start = [], time.perf_counter()
+    for kind, key in taps:
+        button = page.button(key=key)
+        t0 = time.perf_counter()
+        button.click().run()
+        latencies.append((time.perf_counter() - t0) * 1e3)
+        button.set_value(False)                   # the click stays on the reused page otherwise
+        if at.exception:
+            raise RuntimeError(f"group {group}: tapping {key} raised {at.exception[0].message}")
+        if kind == "next":
+            page = at._tree                       # full rerun: the new hole's page
+    return latencies, t_start, time.perf_counter()
+
+
+def run_level(groups: int, players: int, holes: int, seed: int) -> Dict[str, float]:
+    start = threading.Barrier(groups)
+    with ThreadPoolExecutor(max_workers=groups) as pool:
+        results = list(pool.map(lambda g: play_group(g, players, holes, seed, start), range(groups)))
+    latencies = sorted(ms for lat, _, _ in results for ms in lat)
+    wall = max(end for _, _, end in results) - min(t0 for _, t0, _ in results)
+    q = statistics.quantiles(latencies, n=100, method="inclusive")
+    return dict(groups=groups, taps=len(latencies), p50=statistics.median(latencies), p95=q[94], p99=q[98],
+                taps_per_s=len(latencies) / wall)
+
+
+def saturation(levels: List[dict], min_gain: float, budget_ms: float) -> List[str]:
+    notes = []
+    for prev, cur in zip(levels, levels[1:]):
+        if cur["taps_per_s"] < prev["taps_per_s"] * (1 + min_gain):
+            notes.append(f"throughput stops growing at {prev['groups']} groups "
+                         f"({prev['taps_per_s']:.0f} → {cur['taps_per_s']:.0f} taps/s at {cur['groups']})")
+            break
+    over = [lv["groups"] for lv in levels if lv["p95"] > budget_ms]
+    if over:
+        notes.append(f"p95 exceeds {budget_ms:.0f} ms from {over[0]} groups")
+    return notes or [f"no saturation up to {levels[-1]['groups']} groups"]
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Concurrent-session load test for app.py.")
+    ap.add_argument("--groups", default="1,2,4,8,16,32,64", help="comma-separated concurrency levels")
+    ap.add_argument("--players", type=int, default=4, help="players per group (4 = foursomes)")
+    ap.add_argument("--holes", type=int, default=3, help="holes each group plays per level")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--budget-ms", type=float, default=250.0, help="p95 tap latency considered saturated")
+    ap.add_argument("--min-gain", type=float, default=0.10, help="throughput gain per level below which it is flat")
+    ap.add_argument("--json", help="also write the results here")
+    args = ap.parse_args(argv)
+
+    levels = []
+    print(f"{'groups':>6} {'taps':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'taps/s':>8}")
+    with Meter(), SharedRuntime():                 # one compiled app.py for every session, as on a server
+        for groups in (int(g) for g in args.groups.split(",")):
+            lv = run_level(groups, args.players, args.holes, args.seed)
+            levels.append(lv)
+            print(f"{lv['groups']:6d} {lv['taps']:6d} {lv['p50']:8.1f} {lv['p95']:8.1f} {lv['p99']:8.1f} "
+                  f"{lv['taps_per_s']:8.1f}", flush=True)
+    notes = saturation(levels, args.min_gain, args.budget_ms)
+    for note in notes:
+        print(note)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(dict(levels=levels, saturation=notes, players=args.players, holes=args.holes), f, indent=1)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
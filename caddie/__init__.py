@@ -0,0 +1,9 @@
+"""Better-Ball Caddie decision engine (importable without Streamlit)."""
+from .config import (
+    BAD_SCORE, BAD_STREAK_THRESHOLD, GRADE_HELP, GRADE_TO_SCORE, HOLE_HANDICAP,
+    MATT_W, MIKE_W, PAR, SAFE_SCORE, SCORE_TO_GRADE, format_grades, parse_grades, strokes_for,
+)
+from .engine import (
+    HoleState, bad_streak, choose_attacker_candidate, expected_net_advantage,
+    is_deadband, last, net_targets_text, role_advice_and_rules,
+)
@@ -0,0 +1,282 @@
+# === SEASON ANALYTICS =========================================================
+# Season-level stats from an archive of round logs (caddie.roundlog), in
+# constant memory however many years of rounds there are:
+#
+#   grades      per player, per hole: how many F/D/C/B/A
+#   streaks     per player: completed D/F runs by length
+#   attack      per hole, for the Matt & Mike pair: holes where the engine said
+#               ATTACK at any point vs not, and their expected team net birdies
+#
+# Logs hold taps only, not the team or the sidebar settings. A round with taps
+# from players 1 and 2 only is taken as the Matt & Mike best-ball pair (a
+# two-player scramble can't be told apart); rounds with more players count
+# toward grades and streaks but not the pair stats. Handicaps, course and Day-2
+# holes are given for the whole archive (--matt-hcp, --course, --day2 --improve).
+#
+# Logs hold grades, not putts, so birdies are expected values: for each logged
+# hole, caddie.exact gives P(team net ≤ par − 1) from the graded shots (and, when
+# a hole was left unfinished, the rest of it played in control). The advice is
+# recomputed tap by tap with caddie.batch, as the app gave it.
+#
+# Pipeline: log paths are walked lazily, grouped into chunks, and each chunk is
+# replayed in a worker process one round at a time; a worker returns only a
+# fixed-size SeasonStats. Chunks are merged in submission order with a bounded
+# number in flight, so memory does not grow with the archive and the result does
+# not depend on the number of workers.
+#
+# Output is columnar (one .npz array per stat) plus a summary on stdout; --params
+# fits each pair player's per-hole weight to the logged grade mix and writes a
+# params file that caddie.config (CADDIE_PARAMS) or caddie.tune can start from.
+#
+#   python -m caddie.analytics caddie/data/rounds --out season.npz --params season_params.json
+import argparse
+import itertools
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+from . import config
+from .batch import evaluate
+from .config import BAD_SCORE, MAX_PLAYERS, current_params
+from .courses import N_HOLES, get_course
+from .exact import exact_model, min_distribution
+from .roundlog import replay
+from .round import RoundState
+from .simulate import ATTACK_CODES, MAX_SHOTS, implied_weight
+from .tune import write_params
+
+STREAK_BINS = MAX_SHOTS + 1         # run lengths 1..MAX_SHOTS (index = length, longer runs in the last bin)
+COLUMNS = ("rounds", "holes", "grades", "streaks", "attack_holes", "attack_birdies", "anchor_holes",
+           "anchor_birdies")
+
+
+@dataclass
+class SeasonStats:
+    """Fixed-size aggregate; merging two of these is the same as one pass over both archives."""
+    rounds: int = 0
+    holes: np.ndarray = field(default_factory=lambda: np.zeros((MAX_PLAYERS, N_HOLES), dtype=np.int64))
+    grades: np.ndarray = field(default_factory=lambda: np.zeros((MAX_PLAYERS, N_HOLES, 5), dtype=np.int64))
+    streaks: np.ndarray = field(default_factory=lambda: np.zeros((MAX_PLAYERS, STREAK_BINS), dtype=np.int64))
+    attack_holes: np.ndarray = field(default_factory=lambda: np.zeros(N_HOLES, dtype=np.int64))
+    attack_birdies: np.ndarray = field(default_factory=lambda: np.zeros(N_HOLES))
+    anchor_holes: np.ndarray = field(default_factory=lambda: np.zeros(N_HOLES, dtype=np.int64))
+    anchor_birdies: np.ndarray = field(default_factory=lambda: np.zeros(N_HOLES))
+
+    def merge(self, other: "SeasonStats") -> "SeasonStats":
+        self.rounds += other.rounds
+        for name in COLUMNS[1:]:
+            getattr(self, name).__iadd__(getattr(other, name))
+        return self
+
+    def columns(self) -> dict:
+        return {name: np.asarray(getattr(self, name)) for name in COLUMNS}
+
+    @classmethod
+    def from_columns(cls, cols) -> "SeasonStats":
+        return cls(**{name: (int(cols[name]) if name == "rounds" else np.array(cols[name])) for name in COLUMNS})
+
+    def birdie_rates(self):
+        """(P(birdie) after ATTACK advice, P(birdie) otherwise) over the season's pair holes."""
+        attack = self.attack_birdies.sum() / max(self.attack_holes.sum(), 1)
+        anchor = self.anchor_birdies.sum() / max(self.anchor_holes.sum(), 1)
+        return float(attack), float(anchor)
+
+    def summary(self) -> str:
+        attack, anchor = self.birdie_rates()
+        runs = self.streaks[:2].sum(axis=0)
+        longest = int(np.flatnonzero(runs)[-1]) if runs.any() else 0
+        return (f"{self.rounds} rounds · {int(self.grades.sum())} graded shots · "
+                f"ATTACK advised on {int(self.attack_holes.sum())} pair holes (team birdie {attack:.1%}) vs "
+                f"{int(self.anchor_holes.sum())} others ({anchor:.1%}) · "
+                f"D/F runs of 3+: {int(runs[3:].sum())} (longest {longest}{'+' if longest == STREAK_BINS - 1 else ''})")
+
+
+# --- Pipeline ---
+def log_paths(sources: Iterable[str]) -> Iterator[str]:
+    """Every <round>.log under the given files and directories, walked lazily in a stable order."""
+    for src in sources:
+        if os.path.isfile(src):
+            yield src
+            continue
+        for root, dirs, files in os.walk(src):
+            dirs.sort()
+            for name in sorted(files):
+                if name.endswith(".log"):
+                    yield os.path.join(root, name)
+
+
+def chunked(paths: Iterable[str], size: int) -> Iterator[List[str]]:
+    it = iter(paths)
+    while True:
+        chunk = list(itertools.islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _streak_runs(shots: Sequence[int]) -> Iterator[int]:
+    run = 0
+    for s in shots:
+        if s <= BAD_SCORE:
+            run += 1
+        elif run:
+            yield run
+            run = 0
+    if run:
+        yield run
+
+
+class _PairHoles:
+    """Pre-shot states of the pair's logged holes, evaluated in one batch per chunk."""
+
+    def __init__(self, course_key: str, matt_hcp: int, mike_hcp: int, day2: bool = False,
+                 improve: Sequence[int] = ()):
+        self.model = exact_model(get_course(course_key), matt_hcp, mike_hcp)
+        self.bias = [day2 and h + 1 in improve for h in range(N_HOLES)]
+        self.rows: List[tuple] = []
+        self.row_hole: List[int] = []          # index into self.holes
+        self.holes: List[tuple] = []           # (hole_idx, P(team net birdie))
+
+    def add(self, state: RoundState, hole: int, taps: np.ndarray) -> None:
+        """`taps`: the pair's (player, hole, score) taps on `hole`, in order."""
+        h = hole - 1
+        ms, ks = self.model.strokes[h]
+        count, last, streak = [0, 0], [0, 0], [0, 0]
+        for player, score in taps[:, [0, 2]].tolist():
+            self.rows.append((h, last[0], last[1], streak[0], streak[1], count[0], count[1], ms, ks, self.bias[h]))
+            self.row_hole.append(len(self.holes))
+            count[player] += 1
+            last[player] = score
+            streak[player] = streak[player] + 1 if score <= BAD_SCORE else 0
+        par = self.model.course.par[h]
+        lo, pmf = min_distribution(*self.model.position(0, h, 0, state.shots(0, hole)),
+                                   *self.model.position(1, h, 0, state.shots(1, hole)))
+        self.holes.append((h, float(pmf[:max(par - lo, 0)].sum())))
+
+    def fold(self, stats: SeasonStats) -> None:
+        if not self.holes:
+            return
+        cols = np.array(self.rows, dtype=np.int64).T
+        course = self.model.course
+        res = evaluate(*cols, matt_w=np.asarray(course.matt_w), mike_w=np.asarray(course.mike_w))
+        attacked = np.zeros(len(self.holes), dtype=bool)
+        np.logical_or.at(attacked, np.array(self.row_hole), np.isin(res.code, ATTACK_CODES))
+        for (h, birdie), attack in zip(self.holes, attacked):
+            if attack:
+                stats.attack_holes[h] += 1
+                stats.attack_birdies[h] += birdie
+            else:
+                stats.anchor_holes[h] += 1
+                stats.anchor_birdies[h] += birdie
+
+
+def analyze_chunk(paths: Sequence[str], course_key: str, matt_hcp: int, mike_hcp: int, day2: bool = False,
+                  improve: Sequence[int] = ()) -> SeasonStats:
+    """Replay a chunk of round logs one at a time; safe to run in a worker process."""
+    stats = SeasonStats()
+    pair = _PairHoles(course_key, matt_hcp, mike_hcp, day2, improve)
+    for path in paths:
+        state, events, _ = replay(path)
+        if not events:
+            continue
+        stats.rounds += 1
+        taps = np.array(list(state.taps()), dtype=np.int64).reshape(-1, 3)
+        np.add.at(stats.grades, (taps[:, 0], taps[:, 1] - 1, taps[:, 2] - 1), 1)
+        pair_round = bool(len(taps)) and taps[:, 0].max() < 2
+        for hole in np.unique(taps[:, 1]):
+            played = [state.shots(p, hole) for p in range(MAX_PLAYERS)]
+            for p, shots in enumerate(played):
+                if shots:
+                    stats.holes[p, hole - 1] += 1
+                    for run in _streak_runs(shots):
+                        stats.streaks[p, min(run, STREAK_BINS - 1)] += 1
+            if pair_round and played[0] and played[1]:
+                pair.add(state, int(hole), taps[(taps[:, 1] == hole) & (taps[:, 0] < 2)])
+    pair.fold(stats)
+    return stats
+
+
+def run(sources: Iterable[str], course_key: str, matt_hcp: int = 19, mike_hcp: int = 13,
+        workers: Optional[int] = None, chunk: int = 256, day2: bool = False,
+        improve: Sequence[int] = ()) -> SeasonStats:
+    """Stream every log under `sources` through a process pool and merge the partial aggregates."""
+    stats = SeasonStats()
+    jobs = chunked(log_paths(sources), chunk)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        for paths in jobs:
+            stats.merge(analyze_chunk(paths, course_key, matt_hcp, mike_hcp, day2, improve))
+        return stats
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # Bounded and in submission order: memory stays flat and float sums do not depend on scheduling.
+        pending = deque()
+        for paths in jobs:
+            pending.append(pool.submit(analyze_chunk, paths, course_key, matt_hcp, mike_hcp, day2, tuple(improve)))
+            if len(pending) >= 2 * workers:
+                stats.merge(pending.popleft().result())
+        while pending:
+            stats.merge(pending.popleft().result())
+    return stats
+
+
+# --- Weights ---
+def fit_weights(stats: SeasonStats, prior_weights=None, prior: float = 20.0) -> List[List[float]]:
+    """Per-hole strength weights for Matt and Mike that best match their logged grade mix.
+
+    Each hole's weight is implied_weight() of the logged mix, shrunk toward the current
+    weight (`prior_weights`, default the default course's) by `prior` pseudo-shots.
+    """
+    if prior_weights is None:
+        course = get_course()
+        prior_weights = (course.matt_w, course.mike_w)
+    out = []
+    for p, current in enumerate(prior_weights):
+        row = []
+        for h, w0 in enumerate(current):
+            n = int(stats.grades[p, h].sum())
+            if not n:
+                row.append(float(w0))
+                continue
+            row.append(round((n * implied_weight(stats.grades[p, h]) + prior * w0) / (n + prior), 3))
+        out.append(row)
+    return out
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m caddie.analytics", description="Season stats from round logs.")
+    ap.add_argument("sources", nargs="*", default=[config.ROUND_LOG_DIR], help="round logs or directories")
+    ap.add_argument("--out", default="season.npz", help="columnar summary (.npz)")
+    ap.add_argument("--params", default=None, help="also write fitted MATT_W/MIKE_W to this params file")
+    ap.add_argument("--prior", type=float, default=20.0, help="pseudo-shots at the current weight per hole")
+    ap.add_argument("--workers", type=int, default=None, help="default: all cores")
+    ap.add_argument("--chunk", type=int, default=256, help="round logs per task")
+    ap.add_argument("--matt-hcp", type=int, default=19)
+    ap.add_argument("--mike-hcp", type=int, default=13)
+    ap.add_argument("--course", default=None)
+    ap.add_argument("--day2", action="store_true", help="the archive's rounds were played in Day-2 mode")
+    ap.add_argument("--improve", type=int, nargs="*", default=[], help="Day-2 holes to improve")
+    args = ap.parse_args(argv)
+
+    course = get_course(args.course) if args.course else get_course()
+    stats = run(args.sources, course.key, args.matt_hcp, args.mike_hcp, args.workers, args.chunk,
+                args.day2, args.improve)
+    np.savez(args.out, **stats.columns())
+    print(stats.summary())
+    print(f"wrote {args.out}")
+    if args.params:
+        params = current_params()
+        matt_w, mike_w = fit_weights(stats, (course.matt_w, course.mike_w), prior=args.prior)
+        meta = dict(source="analytics", course=course.key, rounds=stats.rounds, prior=args.prior)
+        version = write_params(dict(matt_w=matt_w, mike_w=mike_w, coefficients=params["coefficients"]),
+                               args.params, meta)
+        print(f"wrote {args.params} (version {version})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,263 @@
+# === BATCH EVALUATION =========================================================
+# Vectorized version of role_advice_and_rules for re-scoring many logged holes at
+# once. Inputs are per-hole feature arrays instead of shot lists; every branch
+# of the scalar cascade is evaluated for all rows and combined with np.select.
+#
+#   python -m caddie.batch verify   compare against the scalar engine
+import argparse
+import random
+import sys
+from typing import Iterable, NamedTuple
+
+import numpy as np
+
+from .config import (
+    ATTACKER_STREAK_PENALTY, ATTACKER_STRENGTH, BAD_SCORE, BAD_STREAK_THRESHOLD, EV_DAY2_BONUS,
+    EV_DEADBAND, EV_NO_SAFE_RISK, EV_SAFE_BONUS, EV_STREAK_CAP, EV_STREAK_RISK, EV_STRENGTH,
+    EV_STROKE_EDGE, GRADE_TO_SCORE, MATT_W, MIKE_W, SAFE_SCORE,
+)
+from .engine import HoleState, role_advice_and_rules
+
+MATT_W_ARR = np.asarray(MATT_W, dtype=np.float64)
+MIKE_W_ARR = np.asarray(MIKE_W, dtype=np.float64)
+# [strength, day2 bonus, safe bonus, stroke edge, streak risk, streak cap, no-safe risk, deadband]
+EV_COEF_NAMES = ("EV_STRENGTH", "EV_DAY2_BONUS", "EV_SAFE_BONUS", "EV_STROKE_EDGE", "EV_STREAK_RISK",
+                 "EV_STREAK_CAP", "EV_NO_SAFE_RISK", "EV_DEADBAND")
+EV_COEF = np.asarray([EV_STRENGTH, EV_DAY2_BONUS, EV_SAFE_BONUS, EV_STROKE_EDGE, EV_STREAK_RISK,
+                      EV_STREAK_CAP, EV_NO_SAFE_RISK, EV_DEADBAND], dtype=np.float64)
+ATTACKER_COEF = np.asarray([ATTACKER_STRENGTH, ATTACKER_STREAK_PENALTY], dtype=np.float64)
+
+MATT, MIKE, NOBODY = 0, 1, -1
+NAMES = ("Matt", "Mike")
+
+# Recommendation codes, one per return site in role_advice_and_rules.
+REC_TEMPLATES = (
+    "{lead} tees first. First player: put a ball in play. Partner adjusts based on result.",
+    "{lead} is safe. {other}: controlled target; no hero shots.",
+    "{lead} is safe. {other}: ATTACK for a birdie look.",
+    "{lead} is in trouble. {other}: ANCHOR (fairway finder; center green).",
+    "{lead} is average. {other}: conservative line; favor fairway/center.",
+    "{lead} is average. {other}: medium risk line toward best angle.",
+    "Team has a safe ball. {attacker}: controlled target. {partner}: easy two-putt.",
+    "Team has a safe ball. {attacker}: ATTACK. {partner}: easy two-putt.",
+    "Both in trouble. Play from {attacker}'s better lie. Advance safely; protect bogey "
+    "(often net par for Matt on stroke holes).",
+    "Mixed results. Favor {attacker}'s lie but avoid high-risk lines; set up inside-15 ft if easy.",
+    "Mixed results. Favor {attacker}'s lie; attacker aims for inside-15 ft.",
+    "Matt is safe. Mike: smart center-green. Matt: avoid short-siding.",
+    "Matt is safe. Mike: ATTACK pin if angle allows. Matt: avoid short-siding.",
+    "Mike is safe. Matt: stop chasing par; advance; avoid hazard.",
+    "Mike is safe. Matt: ATTACK with freedom. Mike: easy two-putt for par.",
+    "Both are safe. Choose best birdie look; both play controlled lines.",
+    "Both are safe. Choose best birdie look; one flag-hunts, the other locks par.",
+    "Neither is safe yet. Advance to comfortable yardage; prioritize bogey (often net par for Matt on stroke holes).",
+)
+(TEE_FIRST, ONE_SAFE_CONTROLLED, ONE_SAFE_ATTACK, ONE_TROUBLE, ONE_AVERAGE_CONSERVATIVE,
+ ONE_AVERAGE_MEDIUM, TEE_SAFE_CONTROLLED, TEE_SAFE_ATTACK, TEE_BOTH_TROUBLE, TEE_MIXED_CONSERVATIVE,
+ TEE_MIXED_ATTACK, MATT_SAFE_CONTROLLED, MATT_SAFE_ATTACK, MIKE_SAFE_CONTROLLED, MIKE_SAFE_ATTACK,
+ BOTH_SAFE_CONTROLLED, BOTH_SAFE_ATTACK, NONE_SAFE) = range(len(REC_TEMPLATES))
+
+
+class BatchResult(NamedTuple):
+    ev: np.ndarray        # float64, identical to the scalar EV
+    attacker: np.ndarray  # int8: MATT, MIKE or NOBODY
+    code: np.ndarray      # int8 index into REC_TEMPLATES
+    lead: np.ndarray      # int8: player named first in tee/one-shot templates, else NOBODY
+
+
+def _round2(x: np.ndarray) -> np.ndarray:
+    """Python's round(x, 2) elementwise.
+
+    np.round scales by 100 and can land on the other side of a tie than
+    round() does, so apply round() to the (few) distinct values instead.
+    """
+    u, inv = np.unique(x, return_inverse=True)
+    return np.asarray([round(float(v), 2) for v in u], dtype=np.float64)[inv.reshape(x.shape)]
+
+
+def _ev(w, streak, strokes, safe_ball: bool, day2_bias, coef=EV_COEF):
+    """Vectorized expected_net_advantage, same operation order as the scalar path."""
+    strength, day2_bonus, safe_bonus, edge, streak_risk, cap, no_safe_risk, _ = coef
+    base = w * strength
+    base = np.where(day2_bias, base + day2_bonus, base)
+    if safe_ball:
+        base = base + safe_bonus
+    base = base + np.where(strokes > 0, edge, -edge)
+    risk = streak_risk * np.minimum(streak, int(cap))
+    if not safe_ball:
+        risk = risk + no_safe_risk
+    return _round2(base - risk)
+
+
+def _deadband(ev, coef=EV_COEF):
+    return (ev >= -coef[7]) & (ev <= coef[7])
+
+
+def evaluate(hole_idx, matt_last, mike_last, matt_streak, mike_streak, matt_count, mike_count,
+             matt_strokes, mike_strokes, day2_bias, coef=EV_COEF,
+             matt_w=MATT_W_ARR, mike_w=MIKE_W_ARR, attacker_coef=ATTACKER_COEF,
+             row_weights: bool = False) -> BatchResult:
+    """Score many hole states in one pass.
+
+    All arguments are broadcastable arrays. `*_last` is the last grade score
+    (0 when the player has no shot yet), `*_streak` the trailing D/F count,
+    `*_count` the number of shots taken and `*_strokes` the strokes received on
+    the hole; `day2_bias` is `day2 and hole in improve_list`. The coefficient
+    and weight arrays default to the live config and can be overridden for tuning
+    or another course. Weights are per hole (indexed by `hole_idx`), or with
+    `row_weights` one weight per row (rows from different courses).
+    """
+    h, ml, kl, mst, kst, mc, kc, ms, ks, bias = np.broadcast_arrays(*(np.asarray(a) for a in (
+        hole_idx, matt_last, mike_last, matt_streak, mike_streak, matt_count, mike_count,
+        matt_strokes, mike_strokes, day2_bias)))
+    bias = bias.astype(bool)
+    if row_weights:
+        mw, kw = np.broadcast_to(matt_w, h.shape), np.broadcast_to(mike_w, h.shape)
+    else:
+        mw = matt_w[h]; kw = mike_w[h]
+
+    # Every EV the cascade can ask for: attacker × safety net.
+    ev_m = {safe: _ev(mw, mst, ms, safe, bias, coef) for safe in (True, False)}
+    ev_k = {safe: _ev(kw, kst, ks, safe, bias, coef) for safe in (True, False)}
+
+    def ev_for(who, safe):
+        return np.where(who == MATT, ev_m[safe], ev_k[safe])
+
+    def weak(ev):
+        return (ev <= 0) | _deadband(ev, coef)
+
+    strength, streak_penalty = attacker_coef
+
+    def choose(m_last, k_last):
+        m_score = m_last + mw * strength - mst * streak_penalty
+        k_score = k_last + kw * strength - kst * streak_penalty
+        return np.where(m_score >= k_score, MATT, MIKE)
+
+    m_streaky = mst >= BAD_STREAK_THRESHOLD
+    k_streaky = kst >= BAD_STREAK_THRESHOLD
+    zero = np.zeros(h.shape)
+    nobody = np.full(h.shape, NOBODY)
+
+    # --- tee order
+    tee0 = (mc == 0) & (kc == 0)
+    tee_lead = np.where((ms > ks) | (mw > kw), MATT, MIKE)
+
+    # --- one tee shot taken
+    one = ~tee0 & (mc + kc == 1)
+    first = np.where(mc > 0, MATT, MIKE)
+    other = 1 - first
+    first_rating = np.where(first == MATT, ml, kl)
+    one_safe = first_rating >= SAFE_SCORE
+    one_trouble = first_rating <= BAD_SCORE
+    one_ev = np.where(one_safe, ev_for(other, True), np.where(one_trouble, zero, ev_for(other, False)))
+    other_streaky = np.where(other == MATT, m_streaky, k_streaky)
+    one_code = np.select(
+        [one_safe & (other_streaky | weak(one_ev)), one_safe, one_trouble, weak(one_ev)],
+        [ONE_SAFE_CONTROLLED, ONE_SAFE_ATTACK, ONE_TROUBLE, ONE_AVERAGE_CONSERVATIVE],
+        ONE_AVERAGE_MEDIUM)
+    one_att = np.where(one_trouble & ~one_safe, NOBODY, other)
+
+    # --- both tee shots hit
+    tee2 = (mc == 1) & (kc == 1)
+    tee2_safe = (ml >= SAFE_SCORE) | (kl >= SAFE_SCORE)
+    tee2_trouble = ~tee2_safe & (ml <= BAD_SCORE) & (kl <= BAD_SCORE)
+    chosen = choose(ml, kl)
+    tee2_att = np.where(tee2_trouble, np.where(ml >= kl, MATT, MIKE), chosen)
+    tee2_ev = np.where(tee2_safe, ev_for(chosen, True), np.where(tee2_trouble, zero, ev_for(chosen, False)))
+    att_streaky = np.where(chosen == MATT, m_streaky, k_streaky)
+    tee2_code = np.select(
+        [tee2_safe & (att_streaky | weak(tee2_ev)), tee2_safe, tee2_trouble, weak(tee2_ev)],
+        [TEE_SAFE_CONTROLLED, TEE_SAFE_ATTACK, TEE_BOTH_TROUBLE, TEE_MIXED_CONSERVATIVE],
+        TEE_MIXED_ATTACK)
+
+    # --- approaches and beyond
+    m_safe = ml >= SAFE_SCORE
+    k_safe = kl >= SAFE_SCORE
+    app_att = np.select([m_safe & ~k_safe, k_safe & ~m_safe, m_safe & k_safe], [MIKE, MATT, chosen], NOBODY)
+    app_ev = np.where(app_att == NOBODY, zero, ev_for(app_att, True))
+    app_code = np.select(
+        [m_safe & ~k_safe & (k_streaky | weak(app_ev)), m_safe & ~k_safe,
+         k_safe & ~m_safe & (m_streaky | weak(app_ev)), k_safe & ~m_safe,
+         m_safe & k_safe & weak(app_ev), m_safe & k_safe],
+        [MATT_SAFE_CONTROLLED, MATT_SAFE_ATTACK, MIKE_SAFE_CONTROLLED, MIKE_SAFE_ATTACK,
+         BOTH_SAFE_CONTROLLED, BOTH_SAFE_ATTACK],
+        NONE_SAFE)
+
+    branches = [tee0, one, tee2]
+    return BatchResult(
+        ev=np.select(branches, [zero, one_ev, tee2_ev], app_ev),
+        attacker=np.select(branches, [nobody, one_att, tee2_att], app_att).astype(np.int8),
+        code=np.select(branches, [TEE_FIRST, one_code, tee2_code], app_code).astype(np.int8),
+        lead=np.select(branches[:2], [tee_lead, first], NOBODY).astype(np.int8),
+    )
+
+
+def render(code: int, attacker: int, lead: int) -> str:
+    """Recommendation text for one batch row (same string as the scalar engine)."""
+    return REC_TEMPLATES[code].format(
+        lead=NAMES[lead] if lead >= 0 else "", other=NAMES[1 - lead] if lead >= 0 else "",
+        attacker=NAMES[attacker] if attacker >= 0 else "",
+        partner=NAMES[1 - attacker] if attacker >= 0 else "")
+
+
+def features(states: Iterable[HoleState]) -> dict:
+    """Turn HoleStates into evaluate() keyword arrays (weights per row, from each state's course)."""
+    cols = {k: [] for k in ("hole_idx", "matt_last", "mike_last", "matt_streak", "mike_streak",
+                            "matt_count", "mike_count", "matt_strokes", "mike_strokes", "day2_bias",
+                            "matt_w", "mike_w")}
+    for s in states:
+        cols["hole_idx"].append(s.hole_idx)
+        cols["matt_last"].append(s.matt_shots[-1] if s.matt_shots else 0)
+        cols["mike_last"].append(s.mike_shots[-1] if s.mike_shots else 0)
+        cols["matt_streak"].append(s.matt_streak)
+        cols["mike_streak"].append(s.mike_streak)
+        cols["matt_count"].append(len(s.matt_shots))
+        cols["mike_count"].append(len(s.mike_shots))
+        cols["matt_strokes"].append(s.matt_strokes)
+        cols["mike_strokes"].append(s.mike_strokes)
+        cols["day2_bias"].append(s.day2 and s.hole in s.improve_list)
+        cols["matt_w"].append(s.course.matt_w[s.hole_idx])
+        cols["mike_w"].append(s.course.mike_w[s.hole_idx])
+    return {k: np.asarray(v) for k, v in cols.items()}
+
+
+def evaluate_states(states: Iterable[HoleState]) -> BatchResult:
+    return evaluate(**features(states), row_weights=True)
+
+
+def verify_batch(samples: int = 100_000, seed: int = 0) -> int:
+    """Number of random states where the batch path disagrees with the scalar engine."""
+    rng = random.Random(seed)
+    grades = list(GRADE_TO_SCORE.values())
+    states = [HoleState(hole=rng.randint(1, 18),
+                        matt_shots=tuple(rng.choices(grades, k=rng.randint(0, 6))),
+                        mike_shots=tuple(rng.choices(grades, k=rng.randint(0, 6))),
+                        matt_hcp=rng.randint(0, 54), mike_hcp=rng.randint(0, 54),
+                        day2=rng.random() < 0.5, improve_list=tuple(rng.sample(range(1, 19), rng.randint(0, 6))))
+              for _ in range(samples)]
+    res = evaluate_states(states)
+    bad = 0
+    for i, s in enumerate(states):
+        rec, _, ev, attacker, _ = role_advice_and_rules(s)
+        got_att = NAMES[res.attacker[i]] if res.attacker[i] >= 0 else None
+        got_rec = render(int(res.code[i]), int(res.attacker[i]), int(res.lead[i]))
+        if (got_rec, float(res.ev[i]), got_att) != (rec, ev, attacker) or \
+                np.signbit(res.ev[i]) != np.signbit(ev):
+            bad += 1
+            if bad <= 10:
+                print(f"{s}: batch {got_rec!r} {res.ev[i]} {got_att} vs engine {rec!r} {ev} {attacker}")
+    return bad
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m caddie.batch", description="Vectorized recommendation checks.")
+    ap.add_argument("command", choices=["verify"])
+    ap.add_argument("--samples", type=int, default=100_000)
+    args = ap.parse_args(argv)
+    bad = verify_batch(args.samples)
+    print(f"{bad} mismatches in {args.samples} random states")
+    return 1 if bad else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,248 @@
+# === OFFLINE BUNDLE ===========================================================
+# Serializes everything a recommendation depends on into one static JSON file so
+# the browser can answer grade taps without a server round trip:
+#
+#   course           par, hole handicaps, the per-hole weights (one bundle per course)
+#   stroke table     strokes received for HCP 0..54 on every hole
+#   decision table   one entry per equivalence class (see caddie.table), stored as
+#                    zlib-compressed columns: outcome (u2), EV index (u1),
+#                    attacker (i1), safe label (u1)
+#
+# caddie/web/caddie.js evaluates the bundle; caddie/web/golden.json is a corpus
+# of engine answers that both the Python paths and the JS evaluator are checked
+# against.
+#
+# The app serves the component from web_dir(): caddie/web itself, or on a
+# read-only install a copy of its page and evaluator in a private temporary
+# directory (or WEB_CACHE_DIR), where the bundles are rewritten instead.
+#
+#   python -m caddie.bundle export [path] [--course KEY]
+#                                            write the bundle (default caddie/web/bundle[-KEY].json)
+#   python -m caddie.bundle golden           regenerate the golden corpus from the engine
+#   python -m caddie.bundle verify           engine, table and JS evaluator vs the corpus
+import argparse
+import base64
+import functools
+import json
+import math
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import zlib
+from typing import List, Optional
+
+import numpy as np
+
+from . import config
+from .config import (
+    BAD_SCORE, BAD_STREAK_THRESHOLD, DEFAULT_COURSE, GRADE_TO_SCORE, SAFE_SCORE, SCORE_TO_GRADE, WEB_CACHE_DIR,
+)
+from .courses import MAX_HCP, Course, get_course
+from .engine import HoleState, net_targets_text, role_advice_and_rules
+from .table import (
+    ATTACKERS, N_CLASSES, SAFE_LABELS, SHAPE, DecisionTable, _representative_state, fingerprint,
+    load_or_build,
+)
+
+BUNDLE_FORMAT = 1
+WEB_DIR = os.path.join(os.path.dirname(__file__), "web")
+DEFAULT_BUNDLE = os.path.join(WEB_DIR, "bundle.json")
+GOLDEN_PATH = os.path.join(WEB_DIR, "golden.json")
+JS_CHECK = os.path.join(WEB_DIR, "check_golden.js")
+WEB_ASSETS = ("index.html", "caddie.js")     # what the component page loads besides a bundle
+
+
+def bundle_name(course_key: str = DEFAULT_COURSE) -> str:
+    """File name of a course's bundle inside WEB_DIR."""
+    return "bundle.json" if course_key == DEFAULT_COURSE else f"bundle-{course_key}.json"
+
+
+@functools.lru_cache(maxsize=None)
+def web_dir() -> str:
+    """Directory to serve the offline component from: WEB_DIR, or a writable copy when it is read-only.
+
+    The copy goes to a fresh mode-0700 temporary directory unless WEB_CACHE_DIR is set, so other
+    local users cannot plant the page the browser loads. Computed once per process.
+    """
+    if os.access(WEB_DIR, os.W_OK):
+        return WEB_DIR
+    if WEB_CACHE_DIR:
+        os.makedirs(WEB_CACHE_DIR, mode=0o700, exist_ok=True)
+        path = WEB_CACHE_DIR
+    else:
+        path = tempfile.mkdtemp(prefix="caddie-web-")
+    for name in WEB_ASSETS:
+        shutil.copyfile(os.path.join(WEB_DIR, name), os.path.join(path, name))
+    return path
+
+
+def stroke_table(course: Optional[Course] = None) -> List[List[int]]:
+    """strokes[hole_idx][hcp] for HCP 0..MAX_HCP."""
+    return [list(row) for row in (course or get_course()).strokes]
+
+
+def export_bundle(table: Optional[DecisionTable] = None, course: Optional[Course] = None) -> dict:
+    course = course or get_course()
+    table = table or load_or_build(course=course)
+    flat = table.entries.reshape(-1)
+    bits, ev_index = np.unique(flat["ev"].view("<u8"), return_inverse=True)   # by bit pattern: keeps -0.0
+    if len(bits) > 256:
+        raise ValueError(f"{len(bits)} distinct EVs do not fit a u1 index")
+    columns = b"".join([flat["outcome"].astype("<u2").tobytes(), ev_index.astype("u1").tobytes(),
+                        flat["attacker"].astype("i1").tobytes(), flat["safe"].astype("u1").tobytes()])
+    return dict(
+        format=BUNDLE_FORMAT, fingerprint=table.meta["fingerprint"], params_version=config.PARAMS_VERSION,
+        course=course.key, course_name=course.label, par=list(course.par),
+        hole_handicap=list(course.hole_handicap), matt_w=list(course.matt_w), mike_w=list(course.mike_w),
+        strokes=stroke_table(course),
+        grades=GRADE_TO_SCORE, safe_score=SAFE_SCORE, bad_score=BAD_SCORE,
+        bad_streak_threshold=BAD_STREAK_THRESHOLD, shape=list(SHAPE),
+        attackers=list(ATTACKERS), safe_labels=list(SAFE_LABELS),
+        outcomes=[[rec, list(rules)] for rec, rules in table.outcomes],
+        evs=bits.view("<f8").tolist(),
+        entries=base64.b64encode(zlib.compress(columns, 9)).decode("ascii"),
+    )
+
+
+def write_bundle(path: str = DEFAULT_BUNDLE, table: Optional[DecisionTable] = None,
+                 course: Optional[Course] = None) -> dict:
+    bundle = export_bundle(table, course)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(bundle, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp, path)
+    return bundle
+
+
+def ensure_bundle(path: Optional[str] = None, table: Optional[DecisionTable] = None,
+                  course: Optional[Course] = None) -> str:
+    """Rewrite the bundle if it is missing or was built from other config; returns its fingerprint.
+
+    The default path is in web_dir(). OSError when the bundle must be rewritten and cannot be.
+    """
+    course = course or get_course()
+    path = path or os.path.join(web_dir(), bundle_name(course.key))
+    try:
+        with open(path, encoding="utf-8") as f:
+            current = json.load(f)
+        if current.get("format") == BUNDLE_FORMAT and current.get("fingerprint") == fingerprint(course):
+            return current["fingerprint"]
+    except (OSError, ValueError):
+        pass
+    return write_bundle(path, table, course)["fingerprint"]
+
+
+# --- Golden corpus (default course) ---
+def _case(state: HoleState) -> dict:
+    rec, rules, ev, attacker, peek = role_advice_and_rules(state)
+    return dict(hole=state.hole,
+                matt="".join(SCORE_TO_GRADE[s] for s in state.matt_shots),
+                mike="".join(SCORE_TO_GRADE[s] for s in state.mike_shots),
+                matt_hcp=state.matt_hcp, mike_hcp=state.mike_hcp, day2=state.day2,
+                improve=list(state.improve_list),
+                expect=dict(rec=rec, rules=rules, ev=ev, attacker=attacker, safe=peek["safe"],
+                            targets=net_targets_text(state)))
+
+
+def case_state(case: dict) -> HoleState:
+    return HoleState(hole=case["hole"],
+                     matt_shots=tuple(GRADE_TO_SCORE[g] for g in case["matt"]),
+                     mike_shots=tuple(GRADE_TO_SCORE[g] for g in case["mike"]),
+                     matt_hcp=case["matt_hcp"], mike_hcp=case["mike_hcp"], day2=case["day2"],
+                     improve_list=tuple(case["improve"]))
+
+
+def golden_corpus(random_cases: int = 600, seed: int = 0) -> dict:
+    """Every Matt × Mike class pair once (random hole, strokes and bias), then random states."""
+    rng = random.Random(seed)
+    states = []
+    for mc in range(N_CLASSES):
+        for kc in range(N_CLASSES):
+            states.append(_representative_state((rng.randrange(SHAPE[0]), rng.randrange(SHAPE[1]),
+                                                 rng.randrange(SHAPE[2]), rng.randrange(2), mc, kc)))
+    grades = list(GRADE_TO_SCORE.values())
+    for _ in range(random_cases):
+        states.append(HoleState(hole=rng.randint(1, 18),
+                                matt_shots=tuple(rng.choices(grades, k=rng.randint(0, 8))),
+                                mike_shots=tuple(rng.choices(grades, k=rng.randint(0, 8))),
+                                matt_hcp=rng.randint(0, MAX_HCP), mike_hcp=rng.randint(0, MAX_HCP),
+                                day2=rng.random() < 0.5,
+                                improve_list=tuple(rng.sample(range(1, 19), rng.randint(0, 6)))))
+    return dict(fingerprint=fingerprint(), cases=[_case(s) for s in states])
+
+
+def write_golden(path: str = GOLDEN_PATH, **kw) -> int:
+    corpus = golden_corpus(**kw)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('{"fingerprint": %s, "cases": [\n' % json.dumps(corpus["fingerprint"]))
+        f.write(",\n".join(json.dumps(c, ensure_ascii=False) for c in corpus["cases"]))   # one case per line
+        f.write("\n]}\n")
+    return len(corpus["cases"])
+
+
+def verify_golden(path: str = GOLDEN_PATH, table: Optional[DecisionTable] = None) -> List[str]:
+    """Compare the live engine and the decision table with the stored corpus."""
+    with open(path, encoding="utf-8") as f:
+        corpus = json.load(f)
+    if corpus["fingerprint"] != fingerprint():
+        return [f"corpus fingerprint {corpus['fingerprint']} != current config {fingerprint()} "
+                f"(regenerate with `python -m caddie.bundle golden`)"]
+    table = table or load_or_build()
+    problems = []
+    for i, case in enumerate(corpus["cases"]):
+        state, want = case_state(case), case["expect"]
+        for label, (rec, rules, ev, attacker, peek) in (("engine", role_advice_and_rules(state)),
+                                                          ("table", table.lookup(state))):
+            got = dict(rec=rec, rules=rules, ev=ev, attacker=attacker, safe=peek["safe"],
+                       targets=net_targets_text(state))
+            if got != want or math.copysign(1, ev) != math.copysign(1, want["ev"]):
+                problems.append(f"case {i} ({label}): {got['rec']!r} / {ev} vs corpus {want['rec']!r} / {want['ev']}")
+    return problems
+
+
+def verify_js(bundle_path: str = DEFAULT_BUNDLE, path: str = GOLDEN_PATH) -> Optional[subprocess.CompletedProcess]:
+    """Run the JS evaluator over the corpus with node; None when node is not installed."""
+    node = shutil.which("node")
+    if node is None:
+        return None
+    return subprocess.run([node, JS_CHECK, bundle_path, path], capture_output=True, text=True)
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m caddie.bundle", description="Offline decision bundle for the browser.")
+    ap.add_argument("command", choices=["export", "golden", "verify"])
+    ap.add_argument("path", nargs="?", default=None, help="bundle (export) or corpus (golden/verify) path")
+    ap.add_argument("--cases", type=int, default=600, help="random cases in a regenerated corpus")
+    ap.add_argument("--course", default=DEFAULT_COURSE, help="course key (export only)")
+    args = ap.parse_args(argv)
+
+    if args.command == "export":
+        path = args.path or os.path.join(WEB_DIR, bundle_name(args.course))
+        write_bundle(path, course=get_course(args.course))
+        print(f"wrote {path} ({os.path.getsize(path)} bytes)")
+        return 0
+    if args.command == "golden":
+        path = args.path or GOLDEN_PATH
+        print(f"wrote {path} ({write_golden(path, random_cases=args.cases)} cases)")
+        return 0
+
+    path = args.path or GOLDEN_PATH
+    problems = verify_golden(path)
+    for p in problems[:20]:
+        print(p)
+    print(f"python: {len(problems)} mismatches")
+    ensure_bundle(DEFAULT_BUNDLE)
+    js = verify_js(DEFAULT_BUNDLE, path)
+    if js is None:
+        print("js: skipped (node not found)")
+        return 1 if problems else 0
+    print(f"js: {(js.stdout + js.stderr).strip()}")
+    return 1 if problems or js.returncode else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,137 @@
+# === HEADLESS CLI =============================================================
+# Recommendations without a browser, for the scoring kiosk and scripts. Only the
+# engine is imported (no Streamlit, no numpy), so it loads in a few tens of
+# milliseconds, and every answer is role_advice_and_rules itself.
+#
+#   python -m caddie.cli advise --hole 5 --matt AB --mike DDF [--matt-hcp 19 --mike-hcp 13 --day2 --improve 5 9]
+#   python -m caddie.cli serve          JSON lines: one query per stdin line, one answer per stdout line
+#
+# A query is {"hole": 5, "matt": "AB", "mike": "DDF"} plus optional "matt_hcp",
+# "mike_hcp", "day2", "improve", "course" and "id" (echoed back). Grades are a
+# string or a list of scores (1..5). Values are checked against their JSON types:
+# hole, handicaps, scores and improve holes must be integers and day2 a boolean
+# ("false" or 1.5 is an error, not coerced). An answer is
+#
+#   {"id": ..., "recommendation": str, "rules": [str], "ev": float, "attacker": "Matt" | "Mike" | null,
+#    "peek": {...}, "targets": str}
+#
+# or {"id": ..., "error": str} for a query that can't be answered; the server keeps going.
+import argparse
+import json
+import sys
+from typing import IO, Sequence
+
+from .config import GRADE_TO_SCORE, parse_grades
+from .courses import MAX_HCP, N_HOLES, registry
+from .engine import HoleState, net_targets_text, role_advice_and_rules
+
+
+def _int(value, name: str) -> int:
+    if type(value) is not int:          # bool is an int subclass; floats and strings are not coerced
+        raise TypeError(f"{name} must be an integer, got {json.dumps(value)}")
+    return value
+
+
+def _shots(value, name: str) -> tuple:
+    if isinstance(value, str):
+        return parse_grades(value)
+    if not isinstance(value, list):
+        raise TypeError(f"{name} must be a grade string or a list of scores, got {json.dumps(value)}")
+    scores = tuple(_int(v, f"{name} scores") for v in value)
+    if any(s not in GRADE_TO_SCORE.values() for s in scores):
+        raise ValueError(f"scores must be 1..5, got {list(value)}")
+    return scores
+
+
+def query_state(query: dict) -> HoleState:
+    """HoleState for one query; ValueError/KeyError/TypeError on a malformed one."""
+    if not isinstance(query, dict):
+        raise TypeError(f"a query must be a JSON object, got {json.dumps(query)}")
+    hole = _int(query["hole"], "hole")
+    if not 1 <= hole <= N_HOLES:
+        raise ValueError(f"hole must be 1..{N_HOLES}, got {hole}")
+    hcps = _int(query.get("matt_hcp", 19), "matt_hcp"), _int(query.get("mike_hcp", 13), "mike_hcp")
+    if not all(0 <= h <= MAX_HCP for h in hcps):
+        raise ValueError(f"handicaps must be 0..{MAX_HCP}, got {hcps}")
+    courses = registry()
+    key = query.get("course")
+    if key is not None and key not in courses:
+        raise ValueError(f"unknown course {key!r}; known: {', '.join(courses)}")
+    day2 = query.get("day2", False)
+    if not isinstance(day2, bool):
+        raise TypeError(f"day2 must be true or false, got {json.dumps(day2)}")
+    improve = query.get("improve", [])
+    if not isinstance(improve, list):
+        raise TypeError(f"improve must be a list of holes, got {json.dumps(improve)}")
+    return HoleState(hole=hole, matt_shots=_shots(query.get("matt", ""), "matt"),
+                     mike_shots=_shots(query.get("mike", ""), "mike"),
+                     matt_hcp=hcps[0], mike_hcp=hcps[1], day2=day2,
+                     improve_list=tuple(_int(h, "improve holes") for h in improve),
+                     course=courses[key] if key is not None else None)
+
+
+def answer(state: HoleState) -> dict:
+    rec, rules, ev, attacker, peek = role_advice_and_rules(state)
+    return dict(recommendation=rec, rules=list(rules), ev=ev, attacker=attacker, peek=peek,
+                targets=net_targets_text(state))
+
+
+def serve(stdin: IO[str], stdout: IO[str]) -> int:
+    """Answer queries until stdin closes; returns the number answered (errors included)."""
+    n = 0
+    for line in stdin:
+        if not line.strip():
+            continue
+        n += 1
+        query = {}
+        try:
+            query = json.loads(line)
+            out = answer(query_state(query))
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            out = dict(error=f"{type(e).__name__}: {e}")
+        if isinstance(query, dict) and "id" in query:
+            out = dict(id=query["id"], **out)
+        stdout.write(json.dumps(out, ensure_ascii=False) + "\n")
+        stdout.flush()                   # one answer per query, as soon as it is ready
+    return n
+
+
+def main(argv: Sequence[str] = None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m caddie.cli", description="Headless recommendations.")
+    sub = ap.add_subparsers(dest="command", required=True)
+    adv = sub.add_parser("advise", help="one recommendation")
+    adv.add_argument("--hole", type=int, required=True)
+    adv.add_argument("--matt", default="", help="Matt's grades so far, e.g. AB")
+    adv.add_argument("--mike", default="", help="Mike's grades so far, e.g. DDF")
+    adv.add_argument("--matt-hcp", type=int, default=19)
+    adv.add_argument("--mike-hcp", type=int, default=13)
+    adv.add_argument("--day2", action="store_true")
+    adv.add_argument("--improve", type=int, nargs="*", default=[], help="holes to improve (Day-2)")
+    adv.add_argument("--course", default=None)
+    adv.add_argument("--json", action="store_true", help="print the answer as one JSON line")
+    sub.add_parser("serve", help="JSON-lines queries on stdin, answers on stdout")
+    args = ap.parse_args(argv)
+
+    if args.command == "serve":
+        serve(sys.stdin, sys.stdout)
+        return 0
+    query = dict(hole=args.hole, matt=args.matt, mike=args.mike, matt_hcp=args.matt_hcp, mike_hcp=args.mike_hcp,
+                 day2=args.day2, improve=args.improve, course=args.course)
+    try:
+        out = answer(query_state({k: v for k, v in query.items() if v is not None}))
+    except (ValueError, KeyError, TypeError) as e:
+        ap.error(str(e))
+    if args.json:
+        print(json.dumps(out, ensure_ascii=False))
+        return 0
+    print(out["recommendation"])
+    print(f"EV {out['ev']:+.2f}" + (f" for {out['attacker']}" if out["attacker"] else ""))
+    print(out["targets"])
+    print("Rules fired:")
+    for rule in out["rules"] or ["(none yet)"]:
+        print(f"  - {rule}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,164 @@
+# === CONFIG ===================================================================
+import json
+import os
+from typing import List, Tuple
+
+# Course / handicap config
+HOLE_HANDICAP = [15, 9, 7, 17, 1, 13, 5, 11, 3, 16, 10, 2, 18, 8, 14, 4, 6, 12]
+PAR =            [ 4,  4,  4,  3, 4,  4,  4,  3, 5,  3,  4,  4,  3, 5,  4,  4,  5,  4]
+
+# Letter-grade scoring (A best → F worst)
+GRADE_TO_SCORE = {"A": 5, "B": 4, "C": 3, "D": 2, "F": 1}
+SCORE_TO_GRADE = {v: k for k, v in GRADE_TO_SCORE.items()}
+GRADE_HELP = {
+    "A": "Best / Perfect",
+    "B": "Good / Green light",
+    "C": "Playable / Average",
+    "D": "Trouble / Recovery likely",
+    "F": "Penalty / Unplayable",
+}
+
+# Thresholds & overrides
+SAFE_SCORE = 4            # ≥ B is “safe”
+BAD_SCORE  = 2            # ≤ D is “trouble”
+BAD_STREAK_THRESHOLD = 3  # 3 bad shots in a row → damage control
+
+# Heuristic EV(ATTACK − ANCHOR) coefficients, see engine.expected_net_advantage
+EV_STRENGTH     = 0.35    # × attacker's per-hole strength weight
+EV_DAY2_BONUS   = 0.25    # Day-2 Ringer hole on the improve list
+EV_SAFE_BONUS   = 0.20    # partner already has a safe ball
+EV_STROKE_EDGE  = 0.05    # + if receiving a stroke, − if not
+EV_STREAK_RISK  = 0.15    # per bad shot in the attacker's trailing streak…
+EV_STREAK_CAP   = 3       # …counted up to this many
+EV_NO_SAFE_RISK = 0.20    # no safety net
+EV_DEADBAND     = 0.05    # |EV| ≤ this → "no clear edge"
+
+# Attacker choice: last grade + strength × this − bad streak × penalty
+ATTACKER_STRENGTH = 0.6
+ATTACKER_STREAK_PENALTY = 0.4
+
+# ---- Embedded per-hole strength weights (0..1; higher = stronger on that hole) ----
+# Derived from your sheet’s tendencies you described:
+# Matt best: 8, 17, 1  | worst: 9, 16, 5
+# Mike best: 10, 3, 17 | worst: 12, 9, 14
+MATT_W = [0.85, 0.55, 0.55, 0.55, 0.25, 0.40, 0.55, 0.90, 0.25,
+          0.55, 0.55, 0.55, 0.55, 0.55, 0.55, 0.30, 0.85, 0.55]
+MIKE_W = [0.55, 0.55, 0.85, 0.55, 0.55, 0.55, 0.55, 0.55, 0.30,
+          0.90, 0.55, 0.30, 0.55, 0.30, 0.55, 0.55, 0.85, 0.55]
+BASELINE_W = (tuple(MATT_W), tuple(MIKE_W))    # as embedded, before a params file replaces them
+
+# ---- Teams and formats (caddie.team) ----
+MAX_PLAYERS = 4
+FORMATS = ("best_ball", "scramble")
+# Scramble team handicap = these shares of the players' handicaps, lowest first.
+SCRAMBLE_ALLOWANCE = {2: (0.35, 0.15), 3: (0.20, 0.15, 0.10), 4: (0.25, 0.20, 0.15, 0.10)}
+
+# ---- Round log (caddie.roundlog) ----
+ROUND_LOG_DIR = os.environ.get("CADDIE_ROUND_LOG_DIR") or os.path.join(os.path.dirname(__file__), "data", "rounds")
+ROUND_LOG_FSYNC_EVERY = int(os.environ.get("CADDIE_ROUND_LOG_FSYNC_EVERY", 8))            # events…
+ROUND_LOG_FSYNC_SECONDS = float(os.environ.get("CADDIE_ROUND_LOG_FSYNC_SECONDS", 2.0))    # …or seconds
+ROUND_LOG_SNAPSHOT_EVERY = 128     # events between snapshots; bounds replay on resume
+
+# ---- Offline bundle (caddie.bundle) ----
+# When the installed caddie/web is read-only, the offline component and its bundles
+# are served from a copy here instead ("": a private temporary directory per process).
+WEB_CACHE_DIR = os.environ.get("CADDIE_WEB_CACHE_DIR", "")
+
+# ---- Online weights (caddie.learn) ----
+# With learning on, each hole Matt & Mike finish nudges their weight for that hole
+# toward the one their grades imply, by LEARN_ALPHA (an exponentially weighted
+# average); the learned weights are kept next to the round logs.
+LEARN_WEIGHTS = os.environ.get("CADDIE_LEARN_WEIGHTS", "") not in ("", "0")
+LEARN_ALPHA = float(os.environ.get("CADDIE_LEARN_ALPHA", 0.1))
+
+# ---- Shared rounds (caddie.hub) ----
+# While a partner is connected, a phone checks the round's change feed this often
+# and reruns only when the partner's change touches what it shows; 0 turns live
+# sync off. A phone alone on a round checks every SYNC_IDLE_SECONDS instead, which
+# is how it notices a partner joining. A partner counts as connected if its phone
+# checked or wrote the round in the last SYNC_PARTNER_SECONDS.
+SYNC_SECONDS = float(os.environ.get("CADDIE_SYNC_SECONDS", 0.3))
+SYNC_IDLE_SECONDS = float(os.environ.get("CADDIE_SYNC_IDLE_SECONDS", 2.0))
+SYNC_PARTNER_SECONDS = float(os.environ.get("CADDIE_SYNC_PARTNER_SECONDS", 30))
+
+# ---- League server mode (CADDIE_LEAGUE=1) ----
+# One process serving many groups at once: every course's decision table is loaded
+# (built and saved if missing) when the server starts and shared read-only by all
+# sessions, and more rounds stay open.
+LEAGUE_MODE = os.environ.get("CADDIE_LEAGUE", "") not in ("", "0")
+ROUND_CACHE_ENTRIES = int(os.environ.get("CADDIE_ROUND_CACHE_ENTRIES", 1024 if LEAGUE_MODE else 256))
+
+# ---- Profiling (caddie.metrics, CADDIE_PROFILE=1) ----
+# Times the engine calls and each UI section per session; every PROFILE_EXPORT_EVERY
+# full reruns a session appends its totals to PROFILE_PATH (JSON lines).
+PROFILE = os.environ.get("CADDIE_PROFILE", "") not in ("", "0")
+PROFILE_PATH = os.environ.get("CADDIE_PROFILE_PATH") or os.path.join(os.path.dirname(__file__), "data", "metrics.jsonl")
+PROFILE_EXPORT_EVERY = int(os.environ.get("CADDIE_PROFILE_EXPORT_EVERY", 50))
+
+# ---- Course registry (caddie.courses) ----
+# The course above is built in as "mkcc"; every *.json file here adds another.
+COURSES_DIR = os.environ.get("CADDIE_COURSES_DIR") or os.path.join(os.path.dirname(__file__), "data", "courses")
+DEFAULT_COURSE = "mkcc"
+
+# ---- Tuned parameters (python -m caddie.tune) ----
+# A params file overrides the weights and coefficients above when this module is
+# first imported, so every engine path (scalar, table, batch) sees the same values.
+COEFFICIENT_NAMES = ("EV_STRENGTH", "EV_DAY2_BONUS", "EV_SAFE_BONUS", "EV_STROKE_EDGE", "EV_STREAK_RISK",
+                     "EV_STREAK_CAP", "EV_NO_SAFE_RISK", "EV_DEADBAND",
+                     "ATTACKER_STRENGTH", "ATTACKER_STREAK_PENALTY")
+PARAMS_FORMAT = 1
+PARAMS_PATH = os.environ.get("CADDIE_PARAMS") or os.path.join(os.path.dirname(__file__), "data", "params.json")
+PARAMS_VERSION = "builtin"
+
+
+def current_params() -> dict:
+    """The active weights and coefficients in params-file form."""
+    return dict(format=PARAMS_FORMAT, version=PARAMS_VERSION, matt_w=list(MATT_W), mike_w=list(MIKE_W),
+                coefficients={k: globals()[k] for k in COEFFICIENT_NAMES})
+
+
+def _apply_params(params: dict) -> None:
+    global PARAMS_VERSION
+    if params.get("format") != PARAMS_FORMAT:
+        raise ValueError(f"unsupported params format {params.get('format')!r}")
+    for name, weights in (("matt_w", MATT_W), ("mike_w", MIKE_W)):
+        if name in params:
+            if len(params[name]) != 18:
+                raise ValueError(f"{name} must have 18 entries")
+            weights[:] = [float(w) for w in params[name]]      # in place: importers share the list
+    for k, v in params.get("coefficients", {}).items():
+        if k not in COEFFICIENT_NAMES:
+            raise ValueError(f"unknown coefficient {k!r}")
+        globals()[k] = type(globals()[k])(v)
+    PARAMS_VERSION = str(params.get("version", "unversioned"))
+
+
+if os.path.exists(PARAMS_PATH):
+    with open(PARAMS_PATH, encoding="utf-8") as _f:
+        _apply_params(json.load(_f))
+
+
+def strokes_for(hcp: int, hole_index: int, hole_handicap: List[int] = HOLE_HANDICAP) -> int:
+    """Standard stroke allocation by hole handicap number."""
+    rating = hole_handicap[hole_index]  # 1..18 (1 hardest)
+    strokes = 1 if hcp >= rating else 0
+    extras  = max(0, hcp - 18)          # extra strokes beyond 18 start at HCP 1 upward
+    if extras > 0 and rating <= extras:
+        strokes += 1
+    return strokes
+
+
+def format_grades(scores: List[int]) -> str:
+    return " ".join(SCORE_TO_GRADE[s] for s in scores) or "—"
+
+
+def parse_grades(text: str) -> Tuple[int, ...]:
+    """Scores for a grade string such as "AB", "d d f" or "—" (spaces, commas and dashes ignored)."""
+    scores = []
+    for ch in text.upper():
+        if ch in " ,-—":
+            continue
+        if ch not in GRADE_TO_SCORE:
+            raise ValueError(f"unknown grade {ch!r} in {text!r}; expected A, B, C, D or F")
+        scores.append(GRADE_TO_SCORE[ch])
+    return tuple(scores)
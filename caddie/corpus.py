@@ -0,0 +1,357 @@
+# === DIFFERENTIAL CORPUS ======================================================
+# Proof that a faster engine gives the same advice as role_advice_and_rules.
+# Every reachable pair state up to a depth bound is enumerated:
+#
+#   hole (18) × Matt strokes (0..2) × Mike strokes (0..2) × Day-2 (off | on, hole
+#     improved | on, another hole improved) × Matt's grades × Mike's grades
+#
+# where each player's grades are every sequence of 0..depth grades (156 per player
+# at depth 3). Handicaps are the smallest that receive the strokes on that hole,
+# as in caddie.table. Each state's index follows from its coordinates, so the
+# corpus stores only the answers in enumeration order:
+#
+#   outcome[i]   index into the (recommendation, rules, attacker, safe label) list
+#   ev[i]        float64, bit for bit (rounding and -0.0 included)
+#
+# `record` runs the reference engine hole by hole in a process pool and writes
+# the corpus; `diff` runs another engine over the same states and compares every
+# field it returns. A mismatch is shrunk greedily (fewer shots, simpler grades, no
+# strokes, no Day-2, hole 1) while it still disagrees with the corpus, and the
+# smallest failing state is reported.
+#
+# The course is a registry key or a course JSON file (a path, or a file name in
+# caddie/data). Besides MKCC, a corpus is kept for caddie/data/test_course.json,
+# a course with its own par, stroke order and weights, so engines that fall back
+# to MKCC's data show up. `diff` without --corpus checks every corpus in
+# caddie/data.
+#
+#   python -m caddie.corpus record [--depth 2] [--course KEY | FILE.json]
+#   python -m caddie.corpus diff --engine table|batch|team|engine|module:function [--corpus FILE]
+import argparse
+import glob
+import importlib
+import itertools
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .config import DEFAULT_COURSE, GRADE_TO_SCORE
+from .courses import N_HOLES, Course, load_course, registry
+from .engine import HoleState, role_advice_and_rules
+from .table import fingerprint, hcp_for_strokes
+
+CORPUS_FORMAT = 1
+DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+DEFAULT_PATH = os.path.join(DATA_DIR, "corpus.npz")
+BIAS = ("off", "improved", "other")      # Day-2 variants
+SIMPLEST = 3                             # grade C, what shrinking replaces other grades with
+
+# (recommendation, rules, EV, attacker, safe label); None where an engine has no such field
+Answer = Tuple[Optional[str], Optional[Tuple[str, ...]], float, Optional[str], Optional[str]]
+Coords = Tuple[int, int, int, int, int, int]      # (hole_idx, Matt strokes, Mike strokes, bias, Matt seq, Mike seq)
+
+
+def sequences(depth: int) -> List[Tuple[int, ...]]:
+    """Every grade sequence of length 0..depth: by length, then in score order."""
+    scores = sorted(GRADE_TO_SCORE.values())
+    return [seq for n in range(depth + 1) for seq in itertools.product(scores, repeat=n)]
+
+
+def course_for(spec: str) -> Course:
+    """A registry key, or a course JSON file (resolved against caddie/data first)."""
+    if spec in registry():
+        return registry()[spec]
+    in_data = os.path.join(DATA_DIR, spec)
+    return load_course(in_data if os.path.exists(in_data) else spec)
+
+
+def corpus_path(spec: str) -> str:
+    """Where a course's corpus lives: corpus.npz for MKCC, corpus-<key>.npz otherwise."""
+    key = course_for(spec).key
+    return DEFAULT_PATH if key == DEFAULT_COURSE else os.path.join(DATA_DIR, f"corpus-{key}.npz")
+
+
+class Space:
+    """The enumerated states for one course and depth, and the index of each."""
+
+    def __init__(self, depth: int, course: str = DEFAULT_COURSE):
+        self.depth = depth
+        self.course_spec = course
+        self.course = course_for(course)
+        self.seqs = sequences(depth)
+        self.seq_index = {seq: i for i, seq in enumerate(self.seqs)}
+        self.shape = (N_HOLES, 3, 3, len(BIAS), len(self.seqs), len(self.seqs))
+        self.size = int(np.prod(self.shape))
+        self.per_hole = self.size // N_HOLES
+
+    def index(self, coords: Coords) -> int:
+        return int(np.ravel_multi_index(coords, self.shape))
+
+    def coords(self, index: int) -> Coords:
+        return tuple(int(c) for c in np.unravel_index(index, self.shape))
+
+    def state(self, coords: Coords) -> HoleState:
+        h, ms, ks, bias, mi, ki = coords
+        improve = () if bias == 0 else (h + 1,) if bias == 1 else (h + 2 if h + 1 < N_HOLES else 1,)
+        return HoleState(hole=h + 1, matt_shots=self.seqs[mi], mike_shots=self.seqs[ki],
+                         matt_hcp=hcp_for_strokes(ms, h, self.course), mike_hcp=hcp_for_strokes(ks, h, self.course),
+                         day2=bias > 0, improve_list=improve, course=self.course)
+
+    def hole_states(self, h: int) -> Iterator[HoleState]:
+        for rest in np.ndindex(*self.shape[1:]):
+            yield self.state((h,) + rest)
+
+
+# --- Engines under test ---
+def _reference(states: Sequence[HoleState]) -> List[Answer]:
+    out = []
+    for s in states:
+        rec, rules, ev, attacker, peek = role_advice_and_rules(s)
+        out.append((rec, tuple(rules), ev, attacker, peek["safe"]))
+    return out
+
+
+def _table(states: Sequence[HoleState]) -> List[Answer]:
+    from .table import load_or_build
+    table = load_or_build(course=states[0].course) if states else None
+    out = []
+    for s in states:
+        rec, rules, ev, attacker, peek = table.lookup(s)
+        out.append((rec, tuple(rules), ev, attacker, peek["safe"]))
+    return out
+
+
+def _batch(states: Sequence[HoleState]) -> List[Answer]:
+    from .batch import NAMES, evaluate_states, render
+    res = evaluate_states(states)
+    return [(render(int(c), int(a), int(l)), None, float(ev), NAMES[a] if a >= 0 else None, None)
+            for c, a, l, ev in zip(res.code, res.attacker, res.lead, res.ev)]
+
+
+def _team(states: Sequence[HoleState]) -> List[Answer]:
+    from .team import TeamState, team_advice
+    out = []
+    for s in states:
+        team = TeamState(hole=s.hole, names=("Matt", "Mike"), shots=(s.matt_shots, s.mike_shots),
+                         hcps=(s.matt_hcp, s.mike_hcp), day2=s.day2, improve_list=s.improve_list, course=s.course)
+        _, _, ev, attacker, peek = team_advice(team)
+        out.append((None, None, ev, attacker, peek["safe"]))      # its wording is the team engine's own
+    return out
+
+
+ENGINES: Dict[str, Callable[[Sequence[HoleState]], List[Answer]]] = {
+    "engine": _reference, "table": _table, "batch": _batch, "team": _team}
+
+
+def resolve(name: str) -> Callable[[Sequence[HoleState]], List[Answer]]:
+    """A named engine, or `module:function` taking a HoleState and returning role_advice_and_rules' tuple."""
+    if name in ENGINES:
+        return ENGINES[name]
+    module, _, attr = name.partition(":")
+    if not attr:
+        raise ValueError(f"unknown engine {name!r}; use one of {', '.join(ENGINES)} or module:function")
+    fn = getattr(importlib.import_module(module), attr)
+
+    def run(states):
+        out = []
+        for s in states:
+            rec, rules, ev, attacker, peek = fn(s)
+            out.append((rec, tuple(rules), ev, attacker, peek["safe"]))
+        return out
+    return run
+
+
+def run_hole(engine: str, depth: int, course: str, h: int) -> Tuple[List[tuple], np.ndarray, np.ndarray]:
+    """One hole's answers in enumeration order as (distinct keys, key id per state, EVs); worker-safe."""
+    space = Space(depth, course)
+    answers = resolve(engine)(list(space.hole_states(h)))
+    keys: Dict[tuple, int] = {}
+    ids = np.empty(len(answers), dtype=np.uint32)
+    ev = np.empty(len(answers), dtype=np.float64)
+    for i, (rec, rules, e, attacker, safe) in enumerate(answers):
+        ids[i] = keys.setdefault((rec, rules, attacker, safe), len(keys))
+        ev[i] = e
+    return list(keys), ids, ev
+
+
+def _holes(engine: str, depth: int, course: str, workers: Optional[int]):
+    """run_hole for every hole, in hole order."""
+    workers = workers or os.cpu_count() or 1
+    args = [(engine, depth, course, h) for h in range(N_HOLES)]
+    if workers == 1:
+        yield from (run_hole(*a) for a in args)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from pool.map(run_hole, *zip(*args))
+
+
+# --- Corpus ---
+class Corpus:
+    def __init__(self, space: Space, outcome: np.ndarray, ev: np.ndarray, keys: List[tuple], meta: dict):
+        self.space, self.outcome, self.ev, self.keys, self.meta = space, outcome, ev, keys, meta
+
+    def answer(self, index: int) -> Answer:
+        rec, rules, attacker, safe = self.keys[self.outcome[index]]
+        return rec, rules, float(self.ev[index]), attacker, safe
+
+    def save(self, path: str = DEFAULT_PATH) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        side = json.dumps(dict(meta=self.meta, keys=[[r, list(rs), a, s] for r, rs, a, s in self.keys]),
+                          ensure_ascii=False)
+        dtype = np.uint16 if len(self.keys) <= np.iinfo(np.uint16).max else np.uint32
+        with open(path, "wb") as f:                         # np.savez would append ".npz" to other names
+            np.savez_compressed(f, outcome=self.outcome.astype(dtype), ev=self.ev, side=np.array(side))
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_PATH) -> "Corpus":
+        with np.load(path) as data:
+            side = json.loads(str(data["side"]))
+            outcome, ev = data["outcome"], data["ev"]
+        meta = side["meta"]
+        if meta.get("format") != CORPUS_FORMAT:
+            raise ValueError(f"{path}: unsupported corpus format {meta.get('format')!r}")
+        keys = [(r, tuple(rs), a, s) for r, rs, a, s in side["keys"]]
+        return cls(Space(meta["depth"], meta["course"]), outcome, ev, keys, meta)
+
+
+def record(depth: int = 2, course: str = DEFAULT_COURSE, workers: Optional[int] = None) -> Corpus:
+    """Answers of the reference engine for every enumerated state."""
+    space = Space(depth, course)
+    keys: Dict[tuple, int] = {}
+    outcome = np.empty(space.size, dtype=np.uint32)
+    ev = np.empty(space.size, dtype=np.float64)
+    for h, (local, ids, hole_ev) in enumerate(_holes("engine", depth, course, workers)):
+        remap = np.array([keys.setdefault(k, len(keys)) for k in local], dtype=np.uint32)
+        outcome[h * space.per_hole:(h + 1) * space.per_hole] = remap[ids]
+        ev[h * space.per_hole:(h + 1) * space.per_hole] = hole_ev
+    meta = dict(format=CORPUS_FORMAT, depth=depth, course=course, states=space.size,
+                fingerprint=fingerprint(space.course))
+    return Corpus(space, outcome, ev, list(keys), meta)
+
+
+def _differs(got: Answer, want: Answer) -> bool:
+    for i, (g, w) in enumerate(zip(got, want)):
+        if g is None and i != 3:                          # field not provided (attacker None is an answer)
+            continue
+        if i == 2 and np.float64(g).tobytes() != np.float64(w).tobytes():
+            return True
+        if i != 2 and g != w:
+            return True
+    return False
+
+
+def diff(corpus: Corpus, engine: str, workers: Optional[int] = None) -> List[int]:
+    """Indices of the states where `engine` disagrees with the corpus."""
+    space = corpus.space
+    bad = []
+    for h, (local, ids, hole_ev) in enumerate(_holes(engine, space.depth, space.course_spec, workers)):
+        base = h * space.per_hole
+        want_ids = corpus.outcome[base:base + space.per_hole]
+        pairs = np.unique(np.stack([ids, want_ids.astype(np.uint32)]), axis=1)
+        wrong = {(int(j), int(g)) for j, g in pairs.T
+                 if _differs(local[j][:2] + (0.0,) + local[j][2:], corpus.keys[g][:2] + (0.0,) + corpus.keys[g][2:])}
+        mask = np.zeros(space.per_hole, dtype=bool)
+        for j, g in wrong:
+            mask |= (ids == j) & (want_ids == g)
+        mask |= hole_ev.view(np.int64) != corpus.ev[base:base + space.per_hole].view(np.int64)
+        bad.extend(int(i) + base for i in np.flatnonzero(mask))
+    return bad
+
+
+def _smaller(space: Space, coords: Coords) -> Iterator[Coords]:
+    """Candidate states one step simpler than `coords`, all inside the enumeration."""
+    h, ms, ks, bias, mi, ki = coords
+    for which in (4, 5):
+        seq = space.seqs[coords[which]]
+        variants = [seq[:i] + seq[i + 1:] for i in range(len(seq))]
+        variants += [seq[:i] + (SIMPLEST,) + seq[i + 1:] for i in range(len(seq)) if seq[i] != SIMPLEST]
+        for v in variants:
+            yield coords[:which] + (space.seq_index[v],) + coords[which + 1:]
+    if ms:
+        yield (h, 0, ks, bias, mi, ki)
+    if ks:
+        yield (h, ms, 0, bias, mi, ki)
+    if bias:
+        yield (h, ms, ks, 0, mi, ki)
+    if h:
+        yield (0, ms, ks, bias, mi, ki)
+
+
+def shrink(corpus: Corpus, engine: str, index: int) -> Coords:
+    """Greedily simplify a failing state while `engine` still disagrees with the corpus."""
+    run = resolve(engine)
+    space = corpus.space
+    coords = space.coords(index)
+    improved = True
+    while improved:
+        improved = False
+        for cand in _smaller(space, coords):
+            if _differs(run([space.state(cand)])[0], corpus.answer(space.index(cand))):
+                coords, improved = cand, True
+                break
+    return coords
+
+
+def describe(corpus: Corpus, engine: str, coords: Coords) -> str:
+    state = corpus.space.state(coords)
+    got = resolve(engine)([state])[0]
+    want = corpus.answer(corpus.space.index(coords))
+    fields = ("recommendation", "rules", "ev", "attacker", "safe")
+    delta = "; ".join(f"{f}: {g!r} vs {w!r}" for f, g, w in zip(fields, got, want)
+                      if g is not None and (g != w if f != "ev" else np.float64(g).tobytes() != np.float64(w).tobytes()))
+    return (f"hole {state.hole} · Matt {state.matt_shots} (hcp {state.matt_hcp}) · Mike {state.mike_shots} "
+            f"(hcp {state.mike_hcp}) · day2 {state.day2} improve {list(state.improve_list)} — {delta}")
+
+
+def diff_report(corpus: Corpus, engine: str, workers: Optional[int], report: int) -> int:
+    """Print the diff of one corpus with its shrunk failures; returns the number of differing states."""
+    if corpus.meta["fingerprint"] != fingerprint(corpus.space.course):
+        print("note: config changed since the corpus was recorded; differences may be intended "
+              "(re-record with `record` once the new behaviour is right)")
+    bad = diff(corpus, engine, workers)
+    print(f"{len(bad)} of {corpus.space.size} states differ ({engine} vs corpus, {corpus.space.course.label}, "
+          f"depth {corpus.space.depth})")
+    seen = set()
+    step = max(1, len(bad) // (report * 4))             # spread over the failures; many shrink to the same state
+    for index in bad[::step][:report * 4]:
+        if len(seen) >= report:
+            break
+        coords = shrink(corpus, engine, index)
+        if coords not in seen:
+            seen.add(coords)
+            print("  minimal: " + describe(corpus, engine, coords))
+    return len(bad)
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m caddie.corpus", description="Exhaustive differential corpus.")
+    ap.add_argument("command", choices=["record", "diff"])
+    ap.add_argument("--depth", type=int, default=2, help="record: grades per player, 0..depth")
+    ap.add_argument("--course", default=DEFAULT_COURSE, help="record: registry key or course JSON file")
+    ap.add_argument("--engine", default="table", help=f"diff: {', '.join(ENGINES)} or module:function")
+    ap.add_argument("--corpus", default=None, help="record: default per course; diff: default every corpus*.npz")
+    ap.add_argument("--workers", type=int, default=None, help="default: all cores")
+    ap.add_argument("--report", type=int, default=5, help="diff: failing states to shrink and print")
+    args = ap.parse_args(argv)
+
+    if args.command == "record":
+        path = args.corpus or corpus_path(args.course)
+        corpus = record(args.depth, args.course, args.workers)
+        corpus.save(path)
+        print(f"recorded {corpus.space.size} states ({len(corpus.keys)} distinct answers) to {path} "
+              f"({os.path.getsize(path) / 1024:.0f} kB)")
+        return 0
+
+    paths = [args.corpus] if args.corpus else sorted(glob.glob(os.path.join(DATA_DIR, "corpus*.npz")))
+    failed = 0
+    for path in paths:
+        failed += diff_report(Corpus.load(path), args.engine, args.workers, args.report)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,116 @@
+# === COURSE REGISTRY ==========================================================
+# Every course and tee set the league plays, loaded once per process and shared
+# by all sessions. Each Course precomputes what the engine reads per rerun:
+#
+#   strokes[hole_idx][hcp]       strokes received, HCP 0..54 (18 × 55)
+#   targets[hole_idx][ms][ks]    net_targets_text for Matt/Mike receiving ms/ks strokes
+#
+# The course in caddie.config is built in as DEFAULT_COURSE (its weights follow
+# the tuned params file). Other courses are JSON files in COURSES_DIR, keyed by
+# file name:
+#
+#   {"name": "Oak Hills", "tees": "White",
+#    "par": [4, 5, ...], "hole_handicap": [7, 1, ...],
+#    "weights": {"matt": [...], "mike": [...]}}      weights optional (0.55 flat)
+#
+# Weights are keyed by lower-cased player name, so a course file can carry rows
+# for any team member (caddie.team); players without a row get 0.55 everywhere.
+import functools
+import glob
+import json
+import os
+from dataclasses import dataclass, replace
+from types import MappingProxyType
+from typing import Mapping, Optional, Sequence, Tuple
+
+from . import config
+from .config import COURSES_DIR, DEFAULT_COURSE, strokes_for
+
+MAX_HCP = 54
+N_HOLES = 18
+NEUTRAL_WEIGHT = 0.55
+NEUTRAL_ROW = (NEUTRAL_WEIGHT,) * N_HOLES
+
+
+@dataclass(frozen=True, eq=False)     # identity equality: one shared instance per course
+class Course:
+    key: str
+    name: str
+    tees: str
+    par: Tuple[int, ...]
+    hole_handicap: Tuple[int, ...]
+    matt_w: Tuple[float, ...]
+    mike_w: Tuple[float, ...]
+    strokes: Tuple[Tuple[int, ...], ...]
+    targets: Tuple[Tuple[Tuple[str, ...], ...], ...]
+    player_w: Mapping[str, Tuple[float, ...]]       # lower-cased name -> per-hole weights
+
+    @property
+    def label(self) -> str:
+        return f"{self.name} ({self.tees})" if self.tees else self.name
+
+    def strokes_for(self, hcp: int, hole_idx: int) -> int:
+        return self.strokes[hole_idx][min(max(hcp, 0), MAX_HCP)]    # allocation is flat outside 0..54
+
+    def weights_for(self, name: str) -> Tuple[float, ...]:
+        return self.player_w.get(name.lower(), NEUTRAL_ROW)
+
+    # Picklable (a mappingproxy is not), so a Course can go to worker processes with caddie.simulate.
+    def __getstate__(self) -> dict:
+        return dict(self.__dict__, player_w=dict(self.player_w))
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state, player_w=MappingProxyType(state["player_w"]))
+
+
+def make_course(key: str, name: str, par: Sequence[int], hole_handicap: Sequence[int],
+                matt_w: Sequence[float] = NEUTRAL_ROW, mike_w: Sequence[float] = NEUTRAL_ROW, tees: str = "",
+                weights: Optional[Mapping[str, Sequence[float]]] = None) -> Course:
+    """`weights` adds rows for other players; Matt's and Mike's always come from matt_w / mike_w."""
+    player_w = {k.lower(): tuple(float(w) for w in v) for k, v in (weights or {}).items()}
+    player_w.update(matt=tuple(float(w) for w in matt_w), mike=tuple(float(w) for w in mike_w))
+    for label, values in (("par", par), ("hole_handicap", hole_handicap), *player_w.items()):
+        if len(values) != N_HOLES:
+            raise ValueError(f"course {key!r}: {label} must have {N_HOLES} entries")
+    if sorted(hole_handicap) != list(range(1, N_HOLES + 1)):
+        raise ValueError(f"course {key!r}: hole_handicap must rank holes 1..{N_HOLES}")
+    hole_handicap = list(hole_handicap)
+    strokes = tuple(tuple(strokes_for(hcp, h, hole_handicap) for hcp in range(MAX_HCP + 1)) for h in range(N_HOLES))
+    most = max(max(row) for row in strokes)
+    targets = tuple(tuple(tuple(f"Par {p}. Strokes — Matt: {ms}, Mike: {ks}. Matt bogey often equals net {p}."
+                                for ks in range(most + 1)) for ms in range(most + 1)) for p in par)
+    return Course(key=key, name=name, tees=tees, par=tuple(par), hole_handicap=tuple(hole_handicap),
+                  matt_w=player_w["matt"], mike_w=player_w["mike"], strokes=strokes, targets=targets,
+                  player_w=MappingProxyType(player_w))
+
+
+def with_weights(course: Course, matt_w: Sequence[float], mike_w: Sequence[float]) -> Course:
+    """The same course (key, strokes and targets shared) with Matt's and Mike's weights replaced."""
+    player_w = dict(course.player_w, matt=tuple(float(w) for w in matt_w), mike=tuple(float(w) for w in mike_w))
+    return replace(course, matt_w=player_w["matt"], mike_w=player_w["mike"], player_w=MappingProxyType(player_w))
+
+
+def load_course(path: str) -> Course:
+    with open(path, encoding="utf-8") as f:
+        spec = json.load(f)
+    weights = spec.get("weights", {})
+    key = os.path.splitext(os.path.basename(path))[0]
+    return make_course(key, spec.get("name", key), spec["par"], spec["hole_handicap"], tees=spec.get("tees", ""),
+                       matt_w=weights.get("matt", NEUTRAL_ROW), mike_w=weights.get("mike", NEUTRAL_ROW),
+                       weights=weights)
+
+
+@functools.lru_cache(maxsize=None)
+def registry(directory: str = COURSES_DIR) -> Mapping[str, Course]:
+    """All courses by key, built once per process (read-only)."""
+    courses = {DEFAULT_COURSE: make_course(DEFAULT_COURSE, "MKCC", config.PAR, config.HOLE_HANDICAP,
+                                           config.MATT_W, config.MIKE_W)}
+    for path in sorted(glob.glob(os.path.join(directory, "*.json"))):
+        course = load_course(path)
+        courses[course.key] = course
+    return MappingProxyType(courses)
+
+
+def get_course(key: str = DEFAULT_COURSE) -> Course:
+    return registry()[key]
+
@@ -0,0 +1,242 @@
+# === CORE LOGIC ===============================================================
+# Pure decision engine: no Streamlit, no module-level round state. Everything a
+# recommendation depends on is passed in through a HoleState.
+from dataclasses import dataclass, field
+from typing import List, Optional, Sequence
+
+from .config import (
+    ATTACKER_STREAK_PENALTY, ATTACKER_STRENGTH, BAD_SCORE, BAD_STREAK_THRESHOLD, EV_DAY2_BONUS,
+    EV_DEADBAND, EV_NO_SAFE_RISK, EV_SAFE_BONUS, EV_STREAK_CAP, EV_STREAK_RISK, EV_STRENGTH,
+    EV_STROKE_EDGE, SAFE_SCORE,
+)
+from .courses import Course, get_course
+
+
+@dataclass(frozen=True)
+class HoleState:
+    """Everything the engine needs to advise on one hole."""
+    hole: int                                   # 1..18
+    matt_shots: Sequence[int] = ()
+    mike_shots: Sequence[int] = ()
+    matt_hcp: int = 19
+    mike_hcp: int = 13
+    day2: bool = False
+    improve_list: Sequence[int] = field(default_factory=tuple)
+    # Trailing D/F streaks. Filled from the shots when not given; callers that
+    # track them incrementally (caddie.round.RoundState) pass them in.
+    matt_streak: Optional[int] = field(default=None, compare=False, repr=False)
+    mike_streak: Optional[int] = field(default=None, compare=False, repr=False)
+    # Par, stroke allocation and hole weights; the default course when not given.
+    course: Optional[Course] = field(default=None, repr=False)
+
+    def __post_init__(self):
+        if self.course is None:
+            object.__setattr__(self, "course", get_course())
+        if self.matt_streak is None:
+            object.__setattr__(self, "matt_streak", bad_streak(self.matt_shots))
+        if self.mike_streak is None:
+            object.__setattr__(self, "mike_streak", bad_streak(self.mike_shots))
+
+    @property
+    def hole_idx(self) -> int:
+        return self.hole - 1
+
+    @property
+    def matt_strokes(self) -> int:
+        return self.course.strokes_for(self.matt_hcp, self.hole_idx)
+
+    @property
+    def mike_strokes(self) -> int:
+        return self.course.strokes_for(self.mike_hcp, self.hole_idx)
+
+
+def last(vals: List[int] | None):
+    return vals[-1] if vals else None
+
+def bad_streak(grades: List[int]) -> int:
+    """Count how many D/F in a row at the end."""
+    s = 0
+    for v in reversed(grades):
+        if v <= BAD_SCORE:
+            s += 1
+        else:
+            break
+    return s
+
+def attacker_score(last_grade: int | None, w: float, streak: int) -> float:
+    """One player's claim to the attacker role: last grade + hole strength − bad streak."""
+    return (last_grade or 0) + w*ATTACKER_STRENGTH - streak*ATTACKER_STREAK_PENALTY
+
+def choose_attacker_candidate(state: HoleState, m_last: int | None, k_last: int | None) -> str:
+    """Pick attacker using last grades + per-hole strengths + bad streak penalty."""
+    hole_idx = state.hole_idx
+    m_score = attacker_score(m_last, state.course.matt_w[hole_idx], state.matt_streak)
+    k_score = attacker_score(k_last, state.course.mike_w[hole_idx], state.mike_streak)
+    return "Matt" if m_score >= k_score else "Mike"
+
+def expected_net_advantage(state: HoleState, attacker: str, safe_ball: bool, day2_bias: bool) -> float:
+    """Heuristic EV(ATTACK − ANCHOR). Positive favors ATTACK."""
+    hole_idx = state.hole_idx
+    if attacker == "Matt":
+        return net_advantage(state.course.matt_w[hole_idx], state.matt_streak, state.matt_strokes,
+                             safe_ball, day2_bias)
+    return net_advantage(state.course.mike_w[hole_idx], state.mike_streak, state.mike_strokes,
+                         safe_ball, day2_bias)
+
+def net_advantage(w: float, streak: int, strokes: int, safe_ball: bool, day2_bias: bool) -> float:
+    """expected_net_advantage for one would-be attacker's hole strength, streak and strokes."""
+    base = w * EV_STRENGTH
+    if day2_bias: base += EV_DAY2_BONUS
+    if safe_ball: base += EV_SAFE_BONUS
+    base += (EV_STROKE_EDGE if strokes > 0 else -EV_STROKE_EDGE)  # slight boost if receiving a stroke
+    risk = EV_STREAK_RISK * min(streak, EV_STREAK_CAP)            # rising risk with bad streak
+    if not safe_ball: risk += EV_NO_SAFE_RISK                     # no safety net → conservative
+    return round(base - risk, 2)
+
+def is_deadband(ev: float) -> bool:
+    """Treat near-zero EV as 'no clear edge' (avoid fake precision)."""
+    return -EV_DEADBAND <= ev <= EV_DEADBAND
+
+def role_advice_and_rules(state: HoleState):
+    """Return (recommendation, rules, EV, attacker, smart_peek_dict)."""
+    hole = state.hole; hole_idx = state.hole_idx
+    matt_shots = state.matt_shots; mike_shots = state.mike_shots
+    matt_strokes = state.matt_strokes; mike_strokes = state.mike_strokes
+    matt_w = state.course.matt_w[hole_idx]; mike_w = state.course.mike_w[hole_idx]
+    rules = []
+    m1 = last(matt_shots); k1 = last(mike_shots)
+
+    # Bad-streak guardrails
+    matt_bad_run = state.matt_streak; mike_bad_run = state.mike_streak
+    if matt_bad_run >= BAD_STREAK_THRESHOLD: rules.append(f"Matt bad streak {matt_bad_run} → no green light.")
+    if mike_bad_run >= BAD_STREAK_THRESHOLD: rules.append(f"Mike bad streak {mike_bad_run} → no green light.")
+
+    # Tee order: prefer strokes/comfort to secure a safe ball early
+    if len(matt_shots) == 0 and len(mike_shots) == 0:
+        matt_pref = (matt_strokes > mike_strokes) or (matt_w > mike_w)
+        who_first = "Matt" if matt_pref else "Mike"
+        rules.append(f"Tee order by strokes/comfort → {who_first} tees first.")
+        smart_peek = dict(attacker=None, ev=0.0, safe="N/A", matt_w=matt_w, mike_w=mike_w)
+        return (f"{who_first} tees first. First player: put a ball in play. Partner adjusts based on result.",
+                rules, 0.0, None, smart_peek)
+
+    day2_bias = state.day2 and (hole in state.improve_list)
+
+    # One tee shot taken
+    if len(matt_shots) + len(mike_shots) == 1:
+        first_who = "Matt" if len(matt_shots) else "Mike"
+        first_rating = m1 if len(matt_shots) else k1
+        other_who = "Mike" if first_who == "Matt" else "Matt"
+
+        if first_rating >= SAFE_SCORE:
+            rules.append(f"{first_who} safe (≥B).")
+            ev = expected_net_advantage(state, other_who, safe_ball=True, day2_bias=day2_bias)
+            smart_peek = dict(attacker=other_who, ev=ev, safe="Yes", matt_w=matt_w, mike_w=mike_w)
+            downgrade = (
+                (other_who == "Matt" and matt_bad_run >= BAD_STREAK_THRESHOLD)
+                or (other_who == "Mike" and mike_bad_run >= BAD_STREAK_THRESHOLD)
+                or ev <= 0 or is_deadband(ev)
+            )
+            if downgrade:
+                rules.append(f"{other_who} attack downgraded (bad-streak or EV≤0 or deadband).")
+                return (f"{first_who} is safe. {other_who}: controlled target; no hero shots.",
+                        rules, ev, other_who, smart_peek)
+            return (f"{first_who} is safe. {other_who}: ATTACK for a birdie look.",
+                    rules, ev, other_who, smart_peek)
+
+        if first_rating <= BAD_SCORE:
+            rules.append(f"{first_who} in trouble (≤D).")
+            smart_peek = dict(attacker=None, ev=0.0, safe="No", matt_w=matt_w, mike_w=mike_w)
+            return (f"{first_who} is in trouble. {other_who}: ANCHOR (fairway finder; center green).",
+                    rules, 0.0, None, smart_peek)
+
+        rules.append(f"{first_who} average (C).")
+        ev = expected_net_advantage(state, other_who, safe_ball=False, day2_bias=day2_bias)
+        smart_peek = dict(attacker=other_who, ev=ev, safe="No", matt_w=matt_w, mike_w=mike_w)
+        if ev <= 0 or is_deadband(ev):
+            return (f"{first_who} is average. {other_who}: conservative line; favor fairway/center.",
+                    rules, ev, other_who, smart_peek)
+        return (f"{first_who} is average. {other_who}: medium risk line toward best angle.",
+                rules, ev, other_who, smart_peek)
+
+    # Both tee shots hit
+    if len(matt_shots) == 1 and len(mike_shots) == 1:
+        safe_balls = sum(1 for r in [m1, k1] if r is not None and r >= SAFE_SCORE)
+
+        if safe_balls >= 1:
+            rules.append("At least one safe tee ball.")
+            attacker = choose_attacker_candidate(state, m1, k1)
+            ev = expected_net_advantage(state, attacker, safe_ball=True, day2_bias=day2_bias)
+            partner = "Mike" if attacker == "Matt" else "Matt"
+            smart_peek = dict(attacker=attacker, ev=ev, safe="Yes", matt_w=matt_w, mike_w=mike_w)
+
+            bad_run = matt_bad_run if attacker == "Matt" else mike_bad_run
+            if bad_run >= BAD_STREAK_THRESHOLD or ev <= 0 or is_deadband(ev):
+                rules.append(f"{attacker} attack downgraded (bad-streak or EV≤0 or deadband).")
+                return (f"Team has a safe ball. {attacker}: controlled target. {partner}: easy two-putt.",
+                        rules, ev, attacker, smart_peek)
+            return (f"Team has a safe ball. {attacker}: ATTACK. {partner}: easy two-putt.",
+                    rules, ev, attacker, smart_peek)
+
+        if (m1 or 0) <= BAD_SCORE and (k1 or 0) <= BAD_SCORE:
+            better_who = "Matt" if (m1 or 0) >= (k1 or 0) else "Mike"
+            rules.append("Both tee balls in trouble.")
+            smart_peek = dict(attacker=better_who, ev=0.0, safe="No", matt_w=matt_w, mike_w=mike_w)
+            return (f"Both in trouble. Play from {better_who}'s better lie. Advance safely; protect bogey "
+                    f"(often net par for Matt on stroke holes).",
+                    rules, 0.0, better_who, smart_peek)
+
+        attacker = choose_attacker_candidate(state, m1, k1)
+        ev = expected_net_advantage(state, attacker, safe_ball=False, day2_bias=day2_bias)
+        smart_peek = dict(attacker=attacker, ev=ev, safe="No", matt_w=matt_w, mike_w=mike_w)
+        rules.append("Mixed tee outcomes; attacker chosen by grades + hole strength.")
+        if ev <= 0 or is_deadband(ev):
+            return (f"Mixed results. Favor {attacker}'s lie but avoid high-risk lines; set up inside-15 ft if easy.",
+                    rules, ev, attacker, smart_peek)
+        return (f"Mixed results. Favor {attacker}'s lie; attacker aims for inside-15 ft.",
+                rules, ev, attacker, smart_peek)
+
+    # Approaches and beyond
+    m_last = (m1 or 0); k_last = (k1 or 0)
+    matt_safe = m_last >= SAFE_SCORE; mike_safe = k_last >= SAFE_SCORE
+
+    if matt_safe and not mike_safe:
+        rules.append("Matt safe; Mike not safe.")
+        ev = expected_net_advantage(state, "Mike", safe_ball=True, day2_bias=day2_bias)
+        smart_peek = dict(attacker="Mike", ev=ev, safe="Yes", matt_w=matt_w, mike_w=mike_w)
+        if mike_bad_run >= BAD_STREAK_THRESHOLD or ev <= 0 or is_deadband(ev):
+            rules.append("Mike attack downgraded.")
+            return ("Matt is safe. Mike: smart center-green. Matt: avoid short-siding.",
+                    rules, ev, "Mike", smart_peek)
+        return ("Matt is safe. Mike: ATTACK pin if angle allows. Matt: avoid short-siding.",
+                rules, ev, "Mike", smart_peek)
+
+    if mike_safe and not matt_safe:
+        rules.append("Mike safe; Matt not safe.")
+        ev = expected_net_advantage(state, "Matt", safe_ball=True, day2_bias=day2_bias)
+        smart_peek = dict(attacker="Matt", ev=ev, safe="Yes", matt_w=matt_w, mike_w=mike_w)
+        if matt_bad_run >= BAD_STREAK_THRESHOLD or ev <= 0 or is_deadband(ev):
+            rules.append("Matt attack downgraded to damage control.")
+            return ("Mike is safe. Matt: stop chasing par; advance; avoid hazard.",
+                    rules, ev, "Matt", smart_peek)
+        return ("Mike is safe. Matt: ATTACK with freedom. Mike: easy two-putt for par.",
+                rules, ev, "Matt", smart_peek)
+
+    if mike_safe and matt_safe:
+        rules.append("Both safe.")
+        attacker = choose_attacker_candidate(state, m_last, k_last)
+        ev = expected_net_advantage(state, attacker, safe_ball=True, day2_bias=day2_bias)
+        smart_peek = dict(attacker=attacker, ev=ev, safe="Yes", matt_w=matt_w, mike_w=mike_w)
+        if ev <= 0 or is_deadband(ev):
+            return ("Both are safe. Choose best birdie look; both play controlled lines.",
+                    rules, ev, attacker, smart_peek)
+        return ("Both are safe. Choose best birdie look; one flag-hunts, the other locks par.",
+                rules, ev, attacker, smart_peek)
+
+    rules.append("No one safe yet → damage-control bias.")
+    smart_peek = dict(attacker=None, ev=0.0, safe="No", matt_w=matt_w, mike_w=mike_w)
+    return ("Neither is safe yet. Advance to comfortable yardage; prioritize bogey (often net par for Matt on stroke holes).",
+            rules, 0.0, None, smart_peek)
+
+def net_targets_text(state: HoleState) -> str:
+    return state.course.targets[state.hole_idx][state.matt_strokes][state.mike_strokes]
@@ -0,0 +1,235 @@
+# === EXACT EV =================================================================
+# Exact expected better-ball net score for ATTACK vs ANCHOR under the shot model
+# in caddie.simulate. The app shows it next to the linear heuristic in
+# engine.expected_net_advantage.
+#
+# Each player's rest of the hole is a Markov chain over (progress, shots taken,
+# last grade). Every shot draws a grade from that player's mix for the hole and
+# role and advances progress (A/B/C 1, D ½, F 0 plus a penalty stroke). Once the
+# player is on the green, the putts depend on the grade of the shot that got there.
+# After MAX_SHOTS the player picks up. In this model a D/F streak does not change
+# the grade mix, so streaks drop out of the state. Strokes received only shift
+# the net score. Backward induction over the chain gives, for every state, the
+# distribution of strokes still to come:
+#
+#   tables[player, hole, role, progress in half steps, shots taken, k] = P(k more strokes)
+#
+# ATTACK: the attacker plays the rest of the hole attacking, the partner in control.
+# ANCHOR: both play in control. Given their roles the two balls are independent,
+# so the team's expected net score min(net_matt, net_mike) is an exact sum:
+#
+#   E[team] = lo + Σ_{t > lo} P(net_matt ≥ t) · P(net_mike ≥ t)
+#   exact_ev(state, attacker) = E[team | ANCHOR] − E[team | ATTACK]      (+ favors ATTACK, in strokes)
+#
+# Tables depend only on the course (its par and per-hole weights) and are cached
+# per Course instance, so a course with learned weights (caddie.learn) gets its
+# own tables instead of the base course's. exact_model() adds one handicap pair's
+# strokes per hole, so a live lookup is two table reads and a ~25-element dot
+# product.
+#
+#   python -m caddie.exact verify --samples 20000     exact values vs Monte Carlo
+import argparse
+import functools
+import sys
+import time
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+
+from .courses import N_HOLES, Course
+from .engine import HoleState
+from .simulate import ATTACK, CONTROL, MAX_SHOTS, ONE_PUTT, PENALTY, PROGRESS, THREE_PUTT, SimConfig, grade_cdf
+
+ROLES = (CONTROL, ATTACK)                   # role axis of the tables
+HALF_STEPS = (PROGRESS * 2).astype(int)     # progress per grade in half steps: F 0, D 1, C/B/A 2
+BINS = 2 * MAX_SHOTS + 4                    # remaining strokes: shots + penalties + up to 3 putts
+PICKUP_GRADE = 2                            # putting after a pick-up, as in simulate (C)
+
+
+def _putts(green_grade: int) -> np.ndarray:
+    dist = np.zeros(BINS)
+    dist[1], dist[3] = ONE_PUTT[green_grade], THREE_PUTT[green_grade]
+    dist[2] = 1.0 - dist[1] - dist[3]
+    return dist
+
+PUTTS = np.array([_putts(g) for g in range(5)])
+
+
+def remaining_table(pmf: Sequence[float], needed: int) -> np.ndarray:
+    """P(k more strokes) from every (progress, shots) short of the green: shape (needed, MAX_SHOTS + 1, BINS).
+
+    `pmf` is the grade mix (F..A) for the role; `needed` is the progress to the green in half steps.
+    """
+    out = np.zeros((needed, MAX_SHOTS + 1, BINS))
+    for shots in range(MAX_SHOTS - 1, -1, -1):          # later shots first: each state only looks ahead
+        for prog in range(needed):
+            acc = out[prog, shots]
+            for g in range(5):
+                after, cost = prog + HALF_STEPS[g], 1 + PENALTY[g]
+                if after >= needed:
+                    tail = PUTTS[g]
+                elif shots + 1 >= MAX_SHOTS:
+                    tail = PUTTS[PICKUP_GRADE]
+                else:
+                    tail = out[after, shots + 1]
+                acc[cost:] += pmf[g] * tail[:BINS - cost]
+    return out
+
+
+def needed_steps(par: int) -> int:
+    return 2 * (par - 2)
+
+
+@functools.lru_cache(maxsize=64)       # registry courses plus recent learned-weight versions
+def course_tables(course: Course) -> np.ndarray:
+    """Remaining-stroke tables for Matt (0) and Mike (1) on every hole and role (read-only)."""
+    cdf = grade_cdf(SimConfig(course=course))
+    pmf = np.diff(cdf, axis=-1, prepend=0.0)            # (player, hole, mode, F..A)
+    needed = [needed_steps(p) for p in course.par]
+    out = np.zeros((2, N_HOLES, len(ROLES), max(needed), MAX_SHOTS + 1, BINS))
+    for player in range(2):
+        for h in range(N_HOLES):
+            for r, mode in enumerate(ROLES):
+                out[player, h, r, :needed[h]] = remaining_table(pmf[player, h, mode], needed[h])
+    out.flags.writeable = False
+    return out
+
+
+def expected_min(a_offset: int, a_pmf: np.ndarray, b_offset: int, b_pmf: np.ndarray) -> float:
+    """E[min(a_offset + A, b_offset + B)] for independent A, B with the given pmfs over 0..BINS-1."""
+    lo = min(a_offset, b_offset)
+    n = BINS + abs(a_offset - b_offset)
+    a, b = np.zeros(n), np.zeros(n)
+    a[a_offset - lo:a_offset - lo + BINS] = a_pmf
+    b[b_offset - lo:b_offset - lo + BINS] = b_pmf
+    a_surv = np.cumsum(a[::-1])[::-1]                    # P(≥ lo + i)
+    b_surv = np.cumsum(b[::-1])[::-1]
+    return lo + float(a_surv[1:] @ b_surv[1:])
+
+
+def min_distribution(a_offset: int, a_pmf: np.ndarray, b_offset: int, b_pmf: np.ndarray) -> Tuple[int, np.ndarray]:
+    """(lo, pmf) of min(a_offset + A, b_offset + B): pmf[i] = P(min = lo + i)."""
+    lo = min(a_offset, b_offset)
+    n = BINS + abs(a_offset - b_offset)
+    a, b = np.zeros(n), np.zeros(n)
+    a[a_offset - lo:a_offset - lo + BINS] = a_pmf
+    b[b_offset - lo:b_offset - lo + BINS] = b_pmf
+    surv = np.cumsum(a[::-1])[::-1] * np.cumsum(b[::-1])[::-1]
+    return lo, surv - np.append(surv[1:], 0.0)
+
+
+class ExactModel:
+    """One course's remaining-stroke tables plus one handicap pair's strokes per hole."""
+
+    def __init__(self, course: Course, matt_hcp: int, mike_hcp: int):
+        self.course = course
+        self.tables = course_tables(course)
+        self.strokes = tuple((course.strokes_for(matt_hcp, h), course.strokes_for(mike_hcp, h))
+                             for h in range(N_HOLES))
+        self.needed = tuple(needed_steps(p) for p in course.par)
+
+    def position(self, player: int, hole_idx: int, role: int, shots: Sequence[int]) -> Tuple[int, np.ndarray]:
+        """(net strokes so far, distribution of strokes to come) for one player's graded shots."""
+        prog = sum(HALF_STEPS[s - 1] for s in shots)
+        so_far = len(shots) + sum(PENALTY[s - 1] for s in shots) - self.strokes[hole_idx][player]
+        if prog >= self.needed[hole_idx]:
+            return so_far, PUTTS[shots[-1] - 1]
+        if len(shots) >= MAX_SHOTS:
+            return so_far, PUTTS[PICKUP_GRADE]
+        return so_far, self.tables[player, hole_idx, role, prog, len(shots)]
+
+    def team_net(self, state: HoleState, attacker: Optional[str] = None) -> float:
+        """Expected team net score for the hole; `attacker` attacks, everyone else plays in control."""
+        h = state.hole_idx
+        matt = self.position(0, h, int(attacker == "Matt"), state.matt_shots)
+        mike = self.position(1, h, int(attacker == "Mike"), state.mike_shots)
+        return expected_min(*matt, *mike)
+
+    def ev(self, state: HoleState, attacker: str) -> float:
+        return self.team_net(state) - self.team_net(state, attacker)
+
+
+@functools.lru_cache(maxsize=256)
+def exact_model(course: Course, matt_hcp: int, mike_hcp: int) -> ExactModel:
+    return ExactModel(course, matt_hcp, mike_hcp)
+
+
+def exact_ev(state: HoleState, attacker: Optional[str]) -> Optional[float]:
+    """E[team net | ANCHOR] − E[team net | `attacker` ATTACKs], in strokes; None without an attacker."""
+    if attacker is None:
+        return None
+    return exact_model(state.course, state.matt_hcp, state.mike_hcp).ev(state, attacker)
+
+
+# --- Verification ---
+def monte_carlo(state: HoleState, attacker: Optional[str], samples: int, rng: np.random.Generator) -> Tuple[float, float]:
+    """(mean, standard error) of the team net score, playing the shot model shot by shot."""
+    course = state.course
+    cdf = grade_cdf(SimConfig(course=course))
+    h, needed = state.hole_idx, needed_steps(course.par[state.hole_idx])
+    nets = []
+    for player, (shots, who) in enumerate(((state.matt_shots, "Matt"), (state.mike_shots, "Mike"))):
+        mode = ATTACK if attacker == who else CONTROL
+        prog = np.full(samples, sum(HALF_STEPS[s - 1] for s in shots))
+        count = np.full(samples, len(shots))
+        pen = np.full(samples, sum(PENALTY[s - 1] for s in shots))
+        green = np.full(samples, shots[-1] - 1 if shots else PICKUP_GRADE)
+        done = (prog >= needed) | (count >= MAX_SHOTS)
+        green = np.where(prog >= needed, green, PICKUP_GRADE)
+        while not done.all():
+            g = np.minimum((rng.random(samples)[:, None] > cdf[player, h, mode]).sum(axis=1), 4)
+            live = ~done
+            count[live] += 1
+            pen[live] += PENALTY[g[live]]
+            prog[live] += HALF_STEPS[g[live]]
+            reached = live & (prog >= needed)
+            green[reached] = g[reached]
+            done |= reached | (count >= MAX_SHOTS)
+        u = rng.random(samples)
+        putts = 2 - (u < ONE_PUTT[green]) + (u > 1 - THREE_PUTT[green])
+        nets.append(count + pen + putts - course.strokes_for(state.matt_hcp if player == 0 else state.mike_hcp, h))
+    team = np.minimum(*nets)
+    return float(team.mean()), float(team.std(ddof=1) / np.sqrt(samples))
+
+
+def _random_state(rng: np.random.Generator) -> HoleState:
+    shots = [tuple(int(g) for g in rng.integers(1, 6, rng.integers(0, 4))) for _ in range(2)]
+    return HoleState(hole=int(rng.integers(1, 19)), matt_shots=shots[0], mike_shots=shots[1],
+                     matt_hcp=int(rng.integers(0, 37)), mike_hcp=int(rng.integers(0, 37)))
+
+
+def verify(states: int = 40, samples: int = 20_000, seed: int = 0, z: float = 4.5) -> Tuple[int, float]:
+    """Exact team net vs Monte Carlo on random states and roles; returns (failures, lookup µs)."""
+    rng = np.random.default_rng(seed)
+    failures = 0
+    for _ in range(states):
+        state = _random_state(rng)
+        attacker = (None, "Matt", "Mike")[int(rng.integers(0, 3))]
+        exact = exact_model(state.course, state.matt_hcp, state.mike_hcp).team_net(state, attacker)
+        mean, se = monte_carlo(state, attacker, samples, rng)
+        if abs(exact - mean) > z * se + 1e-9:
+            failures += 1
+            print(f"MISMATCH {state} attacker={attacker}: exact {exact:.4f} vs MC {mean:.4f} ± {se:.4f}")
+    probes = [_random_state(rng) for _ in range(2000)]
+    t0 = time.perf_counter()
+    for state in probes:
+        exact_ev(state, "Matt")
+    return failures, (time.perf_counter() - t0) / len(probes) * 1e6
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m caddie.exact", description="Exact Markov EV engine.")
+    ap.add_argument("command", choices=["verify"])
+    ap.add_argument("--states", type=int, default=40)
+    ap.add_argument("--samples", type=int, default=20_000, help="Monte Carlo plays per state")
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args(argv)
+
+    failures, lookup_us = verify(args.states, args.samples, args.seed)
+    print(f"{failures} mismatches in {args.states} states (Monte Carlo, {args.samples} plays each); "
+          f"exact_ev lookup {lookup_us:.1f} µs")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
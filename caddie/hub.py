@@ -0,0 +1,77 @@
+# === ROUND HUB ================================================================
+# Change feed for one shared round, so every phone showing it sees the others'
+# taps. Each open RoundLog owns one hub and publishes every batch it appends as
+# versioned deltas naming what changed and which session wrote it:
+#
+#   Delta(version, kind, hole, player, origin)     kind/hole/player as in the log
+#   version      deltas published for this round so far (per process)
+#   since(v)     the deltas after v, or None once they have aged out (resync fully)
+#
+# Readers check `version` (a single int read). The hub also notes which sessions
+# are showing the round (`seen`), so a phone polls for a partner's changes only
+# while `partners()` says another phone is there. The hub is in-process: phones
+# sharing a round must reach the same server process.
+import threading
+import time
+from collections import deque
+from itertools import islice
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+DELTAS_KEPT = 256
+SESSIONS_KEPT = 16                   # most recently seen sessions per round
+
+Record = Tuple[int, int, int, int]   # (kind, hole, player, value), as in caddie.roundlog
+
+
+class Delta(NamedTuple):
+    version: int
+    kind: int
+    hole: int
+    player: int
+    origin: str      # session id of the writer ("" when unknown)
+
+
+class RoundHub:
+    """Versioned deltas for one round, and the sessions showing it."""
+
+    def __init__(self, keep: int = DELTAS_KEPT):
+        self.version = 0
+        self._deltas: deque = deque(maxlen=keep)
+        self._sessions: Dict[str, float] = {}          # origin -> last seen (monotonic), oldest first
+        self._lock = threading.Lock()
+
+    def publish(self, records: Iterable[Record], origin: str = "") -> int:
+        """Record one appended batch (its writer counts as seen); returns the new version."""
+        with self._lock:
+            for kind, hole, player, _ in records:
+                self.version += 1
+                self._deltas.append(Delta(self.version, kind, hole, player, origin))
+            if origin:
+                self._seen(origin)
+            return self.version
+
+    def seen(self, origin: str) -> None:
+        """Note that session `origin` is showing the round now."""
+        with self._lock:
+            self._seen(origin)
+
+    def _seen(self, origin: str) -> None:
+        self._sessions.pop(origin, None)
+        self._sessions[origin] = time.monotonic()
+        while len(self._sessions) > SESSIONS_KEPT:
+            del self._sessions[next(iter(self._sessions))]
+
+    def partners(self, origin: str, within: float) -> bool:
+        """Whether another session has shown the round in the last `within` seconds."""
+        cutoff = time.monotonic() - within
+        with self._lock:
+            return any(t >= cutoff for o, t in self._sessions.items() if o != origin)
+
+    def since(self, version: int) -> Optional[List[Delta]]:
+        """Deltas newer than `version`; None when some of them are no longer kept."""
+        with self._lock:
+            if version >= self.version:
+                return []
+            if not self._deltas or self._deltas[0].version > version + 1:
+                return None
+            return list(islice(self._deltas, version + 1 - self._deltas[0].version, None))
@@ -0,0 +1,126 @@
+# === ONLINE WEIGHTS ===========================================================
+# Per-hole strength weights for Matt & Mike that follow how they actually play.
+# When the pair leaves a hole for the next one, each player's grades on it give an
+# implied weight (simulate.implied_weight: the strength whose grade mix fits them
+# best), and the stored weight moves toward it by LEARN_ALPHA:
+#
+#   w[player][hole] ← w + α · (implied − w)
+#
+# That is an exponentially weighted average with constant state: two rows of 18
+# weights and hole counts. Which holes of a round were already counted is kept in
+# that round's log (RoundLog.claim_learn), so going back and forth over a hole
+# counts it once however many rounds share the learner, and a hole left with no
+# grades counts once it is graded. An update is O(1), writes a file of constant
+# size, and runs in the "Next Hole" callback.
+#
+# Learned weights start from the course's tuned weights and are kept per course
+# next to the round logs (ROUND_LOG_DIR/weights-<course>.json). After each update
+# `learner.course` is a new Course with the learned weights, which the app passes
+# to the engine, so advice follows without a restart.
+#
+#   python -m caddie.learn show [--course KEY] [--params OUT]
+import argparse
+import json
+import os
+import sys
+import threading
+from typing import Optional, Sequence
+
+import numpy as np
+
+from .config import LEARN_ALPHA, ROUND_LOG_DIR, current_params
+from .courses import N_HOLES, Course, get_course, with_weights
+from .simulate import implied_weight
+from .tune import write_params
+
+LEARN_FORMAT = 1
+
+
+def learned_path(course_key: str, directory: str = ROUND_LOG_DIR) -> str:
+    return os.path.join(directory, f"weights-{course_key}.json")
+
+
+class WeightLearner:
+    """EWMA per-hole weights for one course, shared by every session in the process (thread-safe)."""
+
+    def __init__(self, course: Course, path: Optional[str] = None, alpha: float = LEARN_ALPHA):
+        self.base = course
+        self.path = path or learned_path(course.key)
+        self.alpha = alpha
+        self.weights = [list(course.matt_w), list(course.mike_w)]
+        self.holes = [[0] * N_HOLES, [0] * N_HOLES]
+        self.version = 0
+        self._lock = threading.Lock()
+        self._load()
+        self.course = with_weights(course, *self.weights)
+
+    def _load(self) -> None:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return
+        if saved.get("format") != LEARN_FORMAT or saved.get("course") != self.base.key:
+            return
+        self.weights = [list(map(float, saved["matt_w"])), list(map(float, saved["mike_w"]))]
+        self.holes = [list(saved["holes"][0]), list(saved["holes"][1])]
+        self.version = int(saved["version"])
+
+    def observe(self, hole: int, shots: Sequence[Sequence[int]]) -> bool:
+        """Fold in Matt's and Mike's grades (scores) on a finished hole; False when there are none.
+
+        The caller counts each hole of a round once (RoundLog.claim_learn).
+        """
+        if not any(shots):
+            return False
+        h = hole - 1
+        with self._lock:
+            for player, scores in enumerate(shots[:2]):
+                if scores:
+                    implied = implied_weight(np.bincount(np.asarray(scores) - 1, minlength=5))
+                    w = self.weights[player][h]
+                    self.weights[player][h] = round(w + self.alpha * (implied - w), 4)
+                    self.holes[player][h] += 1
+            self.version += 1
+            self.course = with_weights(self.base, *self.weights)
+            self._save()
+        return True
+
+    def _save(self) -> None:
+        # Atomic but not fsynced: losing the last update to a power cut only loses one hole's nudge.
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(dict(format=LEARN_FORMAT, course=self.base.key, alpha=self.alpha, version=self.version,
+                           matt_w=self.weights[0], mike_w=self.weights[1], holes=self.holes), f)
+        os.replace(tmp, self.path)
+
+    def label(self) -> str:
+        return f"learned v{self.version}"
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m caddie.learn", description="Inspect learned per-hole weights.")
+    ap.add_argument("command", choices=["show"])
+    ap.add_argument("--course", default=None)
+    ap.add_argument("--params", default=None, help="write the learned weights to this params file")
+    args = ap.parse_args(argv)
+
+    course = get_course(args.course) if args.course else get_course()
+    learner = WeightLearner(course)
+    print(f"{course.label} · {learner.label()} · {learner.path}")
+    tuned = (course.matt_w, course.mike_w)
+    for h in range(N_HOLES):
+        print(f"  hole {h + 1:2d}: " + " · ".join(
+            f"{name} {learner.weights[p][h]:.2f} (tuned {tuned[p][h]:.2f}, {learner.holes[p][h]} holes)"
+            for p, name in enumerate(("Matt", "Mike"))))
+    if args.params:
+        version = write_params(dict(matt_w=learner.weights[0], mike_w=learner.weights[1],
+                                    coefficients=current_params()["coefficients"]),
+                               args.params, dict(source="learn", course=course.key, updates=learner.version))
+        print(f"wrote {args.params} (version {version})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,82 @@
+# === SPECULATIVE LOOKAHEAD ====================================================
+# The next tap on a hole is one of (players × 5 grades) states. After each
+# render the app asks a Lookahead for the advice on all of them. When the tap
+# arrives, its advice is already known and is a dict hit, so only the next batch
+# is computed. That batch is computed in the last panel on the page, after the
+# recommendation has been sent. The same batch feeds the "what if" grid.
+#
+#   successors(state)                  {(player, score): next state}
+#   Lookahead.advice(state, advise)    cached advise(state)
+#   Lookahead.speculate(state, advise) {(player, score): advice}; keeps only this batch
+#
+# States are frozen dataclasses, so they key the cache directly. `advise` is the
+# caller's evaluator (decision table, team engine, ...), which keeps this module
+# free of UI and storage choices.
+from dataclasses import replace
+from typing import Callable, Dict, Tuple, TypeVar
+
+from .config import BAD_SCORE, SCORE_TO_GRADE
+from .engine import HoleState
+from .team import TeamState
+
+State = TypeVar("State", HoleState, TeamState)
+Tap = Tuple[int, int]               # (player index, score)
+
+# Recommendation phrases that give the attacker a green light (engine and team engine)
+GO_PHRASES = ("ATTACK", "medium risk", "flag-hunts", "aims for inside")
+
+
+def successor(state: State, player: int, score: int) -> State:
+    """The state after `player` (0-based, Matt = 0 for a HoleState) taps `score`."""
+    if isinstance(state, HoleState):
+        if player == 0:
+            return replace(state, matt_shots=tuple(state.matt_shots) + (score,),
+                           matt_streak=state.matt_streak + 1 if score <= BAD_SCORE else 0)
+        return replace(state, mike_shots=tuple(state.mike_shots) + (score,),
+                       mike_streak=state.mike_streak + 1 if score <= BAD_SCORE else 0)
+    shots = list(state.shots)
+    streaks = list(state.streaks)
+    shots[player] += (score,)
+    streaks[player] = streaks[player] + 1 if score <= BAD_SCORE else 0
+    return replace(state, shots=tuple(shots), streaks=tuple(streaks))
+
+
+def successors(state: State) -> Dict[Tap, State]:
+    players = 2 if isinstance(state, HoleState) else len(state.names)
+    return {(p, score): successor(state, p, score) for p in range(players) for score in sorted(SCORE_TO_GRADE)}
+
+
+def plan_label(rec: str, ev: float, attacker) -> str:
+    """One-line summary of a recommendation for the what-if grid."""
+    if attacker is None:
+        return "anchor"
+    verb = "attacks" if any(p in rec for p in GO_PHRASES) else "plays safe"
+    return f"{attacker} {verb} ({ev:+.2f})"
+
+
+class Lookahead:
+    """Advice for the current state and every possible next tap (one session's cache)."""
+
+    def __init__(self):
+        self._known: Dict[object, tuple] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def advice(self, state, advise: Callable) -> tuple:
+        known = self._known.get(state)
+        if known is None:
+            self.misses += 1
+            known = self._known[state] = advise(state)
+        else:
+            self.hits += 1
+        return known
+
+    def speculate(self, state, advise: Callable) -> Dict[Tap, tuple]:
+        """Advice for each successor of `state`; drops everything not in this batch."""
+        known = {state: self.advice(state, advise)}
+        batch = {}
+        for tap, nxt in successors(state).items():
+            result = self._known.get(nxt)
+            batch[tap] = known[nxt] = result if result is not None else advise(nxt)
+        self._known = known
+        return batch
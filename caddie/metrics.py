@@ -0,0 +1,155 @@
+# === PROFILING ================================================================
+# Opt-in timing of where a rerun's time goes (CADDIE_PROFILE=1). A Profiler holds
+# counters and named spans for one session:
+#
+#   with profiler.span("engine"): ...        time one section (nestable)
+#   start = profiler.start(); ...; profiler.stop("run", start)   for code that can't be indented
+#   profiler.count("taps")                   plain counter
+#
+# Each span keeps a count, total, max and a log2 histogram of durations (1 µs to
+# ~16 s, 25 buckets), so its memory is fixed and percentiles are within a factor
+# of two. Off, span() returns one shared no-op context manager and start/stop do
+# nothing. On, a span costs one to two microseconds, far below 1% of a rerun.
+#
+# export() appends a snapshot as one JSON line to PROFILE_PATH; the app does so
+# every PROFILE_EXPORT_EVERY full reruns and shows the same rows in a hidden
+# diagnostics panel (?diag=1).
+#
+#   python -m caddie.metrics [metrics.jsonl]        summarize exported snapshots
+import argparse
+import contextlib
+import json
+import os
+import sys
+import time
+from typing import Dict, Iterable, List
+
+from .config import PROFILE, PROFILE_PATH
+
+BUCKETS = 25                       # bucket b holds durations in [2^(b-1), 2^b) µs; bucket 0 is < 1 µs
+_OFF = contextlib.nullcontext()
+
+
+class _Stat:
+    __slots__ = ("count", "total_ns", "max_ns", "hist")
+
+    def __init__(self):
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+        self.hist = [0] * BUCKETS
+
+    def add(self, ns: int) -> None:
+        self.count += 1
+        self.total_ns += ns
+        if ns > self.max_ns:
+            self.max_ns = ns
+        self.hist[min((ns // 1000).bit_length(), BUCKETS - 1)] += 1
+
+    def percentile(self, q: float) -> float:
+        """Upper edge (ms) of the bucket holding the q-th percentile."""
+        need, seen = q / 100 * self.count, 0
+        for b, n in enumerate(self.hist):
+            seen += n
+            if n and seen >= need:
+                return round(min((1 << b) / 1000, self.max_ns / 1e6), 3)
+        return round(self.max_ns / 1e6, 3)
+
+
+class _Span:
+    __slots__ = ("stat", "t0")
+
+    def __init__(self, stat: _Stat):
+        self.stat = stat
+
+    def __enter__(self):
+        self.t0 = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.stat.add(time.perf_counter_ns() - self.t0)
+        return False
+
+
+class Profiler:
+    """Counters and span timings for one session (not thread-safe; a session runs one script at a time)."""
+
+    def __init__(self, enabled: bool = PROFILE):
+        self.enabled = enabled
+        self.counters: Dict[str, int] = {}
+        self.spans: Dict[str, _Stat] = {}
+
+    def _stat(self, name: str) -> _Stat:
+        stat = self.spans.get(name)
+        if stat is None:
+            stat = self.spans[name] = _Stat()
+        return stat
+
+    def span(self, name: str):
+        return _Span(self._stat(name)) if self.enabled else _OFF
+
+    def start(self) -> int:
+        return time.perf_counter_ns() if self.enabled else 0
+
+    def stop(self, name: str, start: int) -> None:
+        if self.enabled:
+            self._stat(name).add(time.perf_counter_ns() - start)
+
+    def count(self, name: str, n: int = 1) -> None:
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def rows(self) -> List[dict]:
+        """One row per span, slowest total first."""
+        return [dict(span=name, count=s.count, total_ms=round(s.total_ns / 1e6, 3),
+                     mean_ms=round(s.total_ns / s.count / 1e6, 3), p50_ms=s.percentile(50),
+                     p95_ms=s.percentile(95), max_ms=round(s.max_ns / 1e6, 3))
+                for name, s in sorted(self.spans.items(), key=lambda kv: -kv[1].total_ns) if s.count]
+
+    def snapshot(self, **meta) -> dict:
+        return dict(meta, time=time.time(), counters=dict(self.counters), spans=self.rows())
+
+    def export(self, path: str = PROFILE_PATH, **meta) -> None:
+        """Append a snapshot as one JSON line (a single write, so concurrent sessions don't interleave)."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        line = json.dumps(self.snapshot(**meta)) + "\n"
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(line)
+
+
+def read_snapshots(path: str) -> Iterable[dict]:
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m caddie.metrics", description="Summarize exported profiles.")
+    ap.add_argument("path", nargs="?", default=PROFILE_PATH)
+    args = ap.parse_args(argv)
+
+    latest = {}
+    for snap in read_snapshots(args.path):
+        latest[snap.get("session", "")] = snap           # snapshots are cumulative per session
+    print(f"{len(latest)} sessions in {args.path}")
+    counters: Dict[str, int] = {}
+    spans: Dict[str, dict] = {}
+    for snap in latest.values():
+        for k, v in snap["counters"].items():
+            counters[k] = counters.get(k, 0) + v
+        for row in snap["spans"]:
+            acc = spans.setdefault(row["span"], dict(count=0, total_ms=0.0, p95_ms=0.0, max_ms=0.0))
+            acc["count"] += row["count"]
+            acc["total_ms"] += row["total_ms"]
+            acc["p95_ms"] = max(acc["p95_ms"], row["p95_ms"])
+            acc["max_ms"] = max(acc["max_ms"], row["max_ms"])
+    print("  " + " · ".join(f"{k} {v}" for k, v in sorted(counters.items())))
+    for name, acc in sorted(spans.items(), key=lambda kv: -kv[1]["total_ms"]):
+        print(f"  {name:<14} n={acc['count']:<7d} mean {acc['total_ms'] / acc['count']:8.3f} ms · "
+              f"worst session p95 ≤ {acc['p95_ms']:.3f} ms · max {acc['max_ms']:.3f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,174 @@
+# === ROUND PLANNER ============================================================
+# Chooses how aggressively Matt & Mike play each remaining hole so the
+# round-level goal is served, instead of deciding each hole on its own.
+#
+# On each hole the team plays one policy from the tee: ANCHOR (both in control),
+# or one player attacks the whole hole while the partner plays in control.
+# caddie.exact gives the team's net-score distribution for every policy, using
+# the hole's par, its strokes received (strokes_for) and the players' per-hole
+# weights. The goal decides what a hole is worth:
+#
+#   stroke   expected team net to par over the rest of the round (lower is better)
+#   ringer   Day-2 Ringer: a hole counts min(Day-1 team net, today's team net)
+#   match    better-ball match against a pair of average players (0.55 on every
+#            hole, normal play) with the given handicaps; standing = holes up.
+#            The value is P(win) + ½ P(halve)
+#
+#   V(h, s) = max over policies of Σ_outcomes P(outcome | policy, h) · (reward + V(h + 1, s + Δs))
+#
+# V is memoized over (hole, standing) on a planner built once per set of inputs
+# (cached). Each hole change only queries the suffix from the new hole: a handful of
+# new (hole, standing) entries, or memo hits. Planning takes a few milliseconds
+# once the course's caddie.exact tables exist.
+#
+#   python -m caddie.planner --goal match --up 1 --hole 10
+import argparse
+import functools
+import sys
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .courses import N_HOLES, NEUTRAL_WEIGHT, Course, get_course
+from .exact import exact_model, min_distribution, needed_steps, remaining_table
+from .simulate import default_grade_dist
+
+ANCHOR, MATT_ATTACKS, MIKE_ATTACKS = 0, 1, 2
+POLICIES = ("anchor", "Matt attacks", "Mike attacks")
+GOALS = ("stroke", "ringer", "match")
+
+Outcome = Tuple[float, int, float]          # (probability, change in standing, reward)
+
+
+@functools.lru_cache(maxsize=None)
+def opponent_tee_pmf(course_key: str) -> np.ndarray:
+    """Gross strokes (pmf over 0..BINS-1) per hole for an average player in normal play."""
+    course = get_course(course_key)
+    pmf = default_grade_dist(NEUTRAL_WEIGHT)
+    return np.array([remaining_table(pmf, needed_steps(par))[0, 0] for par in course.par])
+
+
+def _expected(lo: int, pmf: np.ndarray) -> float:
+    return lo + float(np.arange(len(pmf)) @ pmf)
+
+
+class RoundPlanner:
+    """Memoized DP over (hole, standing) for one course, handicap pair and goal."""
+
+    def __init__(self, course: Course, matt_hcp: int, mike_hcp: int, goal: str = "stroke",
+                 opponent_hcps: Tuple[int, int] = (18, 18), ringer: Optional[Sequence[int]] = None):
+        if goal not in GOALS:
+            raise ValueError(f"unknown goal {goal!r}; expected one of {GOALS}")
+        if goal == "ringer" and (ringer is None or len(ringer) != N_HOLES):
+            raise ValueError(f"the ringer goal needs a Day-1 team net score for each of the {N_HOLES} holes")
+        self.course = course
+        self.goal = goal
+        self.model = exact_model(course, matt_hcp, mike_hcp)
+        self.opponent_hcps = opponent_hcps
+        self.ringer = None if ringer is None else tuple(ringer)
+        self._outcomes: Dict[int, List[List[Outcome]]] = {}
+        self._memo: Dict[Tuple[int, int], Tuple[float, int]] = {}
+
+    def team_pmf(self, h: int, policy: int) -> Tuple[int, np.ndarray]:
+        """(lo, pmf) of the team net score on hole index h from the tee under `policy`."""
+        tables, (ms, ks) = self.model.tables, self.model.strokes[h]
+        return min_distribution(-ms, tables[0, h, int(policy == MATT_ATTACKS), 0, 0],
+                                -ks, tables[1, h, int(policy == MIKE_ATTACKS), 0, 0])
+
+    def outcomes(self, h: int) -> List[List[Outcome]]:
+        """Per policy: the (probability, Δ standing, reward) outcomes of hole index h."""
+        if h in self._outcomes:
+            return self._outcomes[h]
+        par = self.course.par[h]
+        per_policy = []
+        for policy in range(len(POLICIES)):
+            lo, pmf = self.team_pmf(h, policy)
+            if self.goal == "stroke":
+                per_policy.append([(1.0, 0, par - _expected(lo, pmf))])
+            elif self.goal == "ringer":
+                counted = np.minimum(lo + np.arange(len(pmf)), self.ringer[h])
+                per_policy.append([(1.0, 0, par - float(counted @ pmf))])
+            else:
+                per_policy.append(self._match_outcomes(h, lo, pmf))
+        self._outcomes[h] = per_policy
+        return per_policy
+
+    def _match_outcomes(self, h: int, lo: int, pmf: np.ndarray) -> List[Outcome]:
+        gross = opponent_tee_pmf(self.course.key)[h]
+        first, second = (self.course.strokes_for(hcp, h) for hcp in self.opponent_hcps)
+        o_lo, o_pmf = min_distribution(-first, gross, -second, gross)
+        # P(opponent net > t) and P(opponent net = t) on the team's support lo .. lo + len(pmf) - 1
+        scores = lo + np.arange(len(pmf)) - o_lo
+        inside = (scores >= 0) & (scores < len(o_pmf))
+        o_surv = np.append(np.cumsum(o_pmf[::-1])[::-1], 0.0)
+        equal = np.where(inside, o_pmf[np.clip(scores, 0, len(o_pmf) - 1)], 0.0)
+        above = np.where(scores < 0, 1.0, o_surv[np.clip(scores + 1, 0, len(o_pmf))])
+        win, halve = float(pmf @ above), float(pmf @ equal)
+        return [(win, 1, 0.0), (halve, 0, 0.0), (max(0.0, 1.0 - win - halve), -1, 0.0)]
+
+    def value(self, h: int, standing: int = 0) -> Tuple[float, int]:
+        """(best value of holes h..17 from `standing`, best policy on hole index h)."""
+        if h >= N_HOLES or (self.goal == "match" and abs(standing) > N_HOLES - h):
+            if self.goal != "match":
+                return 0.0, ANCHOR
+            return (1.0 if standing > 0 else 0.5 if standing == 0 else 0.0), ANCHOR
+        key = (h, standing)
+        if key not in self._memo:
+            best = None
+            for policy, outcomes in enumerate(self.outcomes(h)):
+                v = sum(p * (reward + self.value(h + 1, standing + ds)[0]) for p, ds, reward in outcomes)
+                if best is None or v > best[0] + 1e-12:       # ties keep the steadier policy (anchor first)
+                    best = (v, policy)
+            self._memo[key] = best
+        return self._memo[key]
+
+    def plan(self, hole: int, standing: int = 0) -> List[Tuple[int, str]]:
+        """Policy for each hole from `hole` (1-based) to 18, holding the current standing."""
+        return [(h + 1, POLICIES[self.value(h, standing)[1]]) for h in range(hole - 1, N_HOLES)]
+
+    def describe(self, hole: int, standing: int = 0) -> str:
+        """The goal's value from `hole` on, in words."""
+        value = self.value(hole - 1, standing)[0]
+        if self.goal == "match":
+            return f"P(win match) {value:.0%} (halves count ½)"
+        return f"expected team net {-value:+.2f} to par over holes {hole}–{N_HOLES}"
+
+
+@functools.lru_cache(maxsize=64)
+def round_planner(course: Course, matt_hcp: int, mike_hcp: int, goal: str = "stroke",
+                  opponent_hcps: Tuple[int, int] = (18, 18), ringer: Optional[Tuple[int, ...]] = None) -> RoundPlanner:
+    """One planner (and its memo) per set of inputs, shared across holes and sessions.
+
+    Keyed by the Course instance, so learned weights get their own planner.
+    """
+    return RoundPlanner(course, matt_hcp, mike_hcp, goal, opponent_hcps, ringer)
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m caddie.planner", description="Whole-round strategy planner.")
+    ap.add_argument("--goal", choices=GOALS, default="stroke")
+    ap.add_argument("--hole", type=int, default=1)
+    ap.add_argument("--up", type=int, default=0, help="match standing: holes up (negative = down)")
+    ap.add_argument("--matt-hcp", type=int, default=19)
+    ap.add_argument("--mike-hcp", type=int, default=13)
+    ap.add_argument("--opponents", type=int, nargs=2, default=(18, 18), metavar="HCP")
+    ap.add_argument("--ringer", type=int, nargs=N_HOLES, metavar="NET", help="Day-1 team net per hole")
+    ap.add_argument("--course", default=None)
+    args = ap.parse_args(argv)
+
+    course = get_course(args.course) if args.course else get_course()
+    exact_model(course, args.matt_hcp, args.mike_hcp).tables            # build the course tables first
+    t0 = time.perf_counter()
+    planner = RoundPlanner(course, args.matt_hcp, args.mike_hcp, args.goal, tuple(args.opponents),
+                           tuple(args.ringer) if args.ringer else None)
+    plan = planner.plan(args.hole, args.up)
+    elapsed = time.perf_counter() - t0
+    print(f"{course.label} · {args.goal} · {planner.describe(args.hole, args.up)} · planned in {elapsed * 1e3:.1f} ms")
+    for hole, policy in plan:
+        print(f"  hole {hole:2d} (par {course.par[hole - 1]}): {policy}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
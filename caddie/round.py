@@ -0,0 +1,143 @@
+# === ROUND STATE ==============================================================
+# One compact, event-sourced structure per round. Grade taps are two bytes each
+# in a single array; per (player, hole) slot the running shot count, last grade
+# and trailing D/F streak are updated on every tap, so building a HoleState never
+# rescans shots for them. Undo and redo of the last tap are O(1): each tap keeps
+# the slot's previous last grade and streak alongside it.
+#
+#   event code  = slot * 5 + (score - 1),  slot = player * 18 + hole_idx
+#                 (player 0..MAX_PLAYERS-1; the app's Matt/Mike pair is 0 and 1)
+#   undo entry  = prev_last << 8 | min(prev_streak, 255)
+#   shot count  = u2 per slot (a u1 overflowed on a hole's 256th tap)
+from array import array
+from typing import Iterator, Optional, Sequence, Tuple
+
+from .config import BAD_SCORE, MAX_PLAYERS, PAR
+from .courses import Course
+from .engine import HoleState
+from .team import TeamState
+
+PLAYERS = ("matt", "mike")      # player ids of the two-player HoleState (and the offline component)
+N_HOLES = len(PAR)
+N_SLOTS = MAX_PLAYERS * N_HOLES
+
+Tap = Tuple[int, int, int]   # (player index, hole, score)
+
+
+class RoundState:
+    """Grade events for a whole round plus incremental per-slot counters."""
+
+    __slots__ = ("hole", "acked", "learned", "_events", "_undo", "_redo", "_count", "_last", "_streak")
+
+    def __init__(self):
+        self.hole = 1
+        self.acked = 0                       # last offline-mode event applied (app.sync_offline)
+        self.learned = 0                     # bitmask of holes the weight learner took (caddie.learn)
+        self._events = array("H")
+        self._undo = array("H")
+        self._redo = array("H")
+        self._count = array("H", bytes(2 * N_SLOTS))
+        self._last = array("B", bytes(N_SLOTS))
+        self._streak = array("B", bytes(N_SLOTS))
+
+    # --- Taps ---
+    def _push(self, code: int) -> Tap:
+        slot, score = divmod(code, 5)
+        score += 1
+        self._events.append(code)
+        self._undo.append(self._last[slot] << 8 | self._streak[slot])
+        self._count[slot] += 1
+        self._last[slot] = score
+        self._streak[slot] = min(self._streak[slot] + 1, 255) if score <= BAD_SCORE else 0
+        return slot // N_HOLES, slot % N_HOLES + 1, score
+
+    def add(self, player: int, hole: int, score: int) -> None:
+        self._push((player * N_HOLES + hole - 1) * 5 + score - 1)
+        del self._redo[:]
+
+    def undo(self) -> Optional[Tap]:
+        """Take back the last tap; returns (player, hole, score) or None."""
+        if not self._events:
+            return None
+        code = self._events.pop()
+        prev = self._undo.pop()
+        slot, score = divmod(code, 5)
+        self._count[slot] -= 1
+        self._last[slot] = prev >> 8
+        self._streak[slot] = prev & 0xFF
+        self._redo.append(code)
+        return slot // N_HOLES, slot % N_HOLES + 1, score + 1
+
+    def redo(self) -> Optional[Tap]:
+        if not self._redo:
+            return None
+        return self._push(self._redo.pop())
+
+    @property
+    def can_undo(self) -> bool:
+        return bool(self._events)
+
+    @property
+    def can_redo(self) -> bool:
+        return bool(self._redo)
+
+    def reset(self, hole: int) -> None:
+        """Clear every player on a hole (drops its taps from the undo history)."""
+        slots = {p * N_HOLES + hole - 1 for p in range(MAX_PLAYERS)}
+        keep = [i for i, c in enumerate(self._events) if c // 5 not in slots]
+        self._events = array("H", (self._events[i] for i in keep))
+        self._undo = array("H", (self._undo[i] for i in keep))
+        del self._redo[:]
+        for s in slots:
+            self._count[s] = self._last[s] = self._streak[s] = 0
+
+    # --- Reads ---
+    def shots(self, player: int, hole: int) -> Tuple[int, ...]:
+        slot = player * N_HOLES + hole - 1
+        if not self._count[slot]:
+            return ()
+        lo = slot * 5
+        return tuple(c - lo + 1 for c in self._events if lo <= c < lo + 5)
+
+    def taps(self) -> Iterator[Tap]:
+        """Live taps in the order they were made (undone and reset taps excluded)."""
+        for code in self._events:
+            slot, score = divmod(code, 5)
+            yield slot // N_HOLES, slot % N_HOLES + 1, score + 1
+
+    def streak(self, player: int, hole: int) -> int:
+        return self._streak[player * N_HOLES + hole - 1]
+
+    def hole_state(self, hole: int, matt_hcp: int = 19, mike_hcp: int = 13, day2: bool = False,
+                   improve_list: Sequence[int] = (), course: Optional[Course] = None) -> HoleState:
+        return HoleState(hole=hole, matt_shots=self.shots(0, hole), mike_shots=self.shots(1, hole),
+                         matt_hcp=matt_hcp, mike_hcp=mike_hcp, day2=day2, improve_list=tuple(improve_list),
+                         matt_streak=self.streak(0, hole), mike_streak=self.streak(1, hole), course=course)
+
+    def team_state(self, hole: int, names: Sequence[str], hcps: Sequence[int], day2: bool = False,
+                   improve_list: Sequence[int] = (), format: str = "best_ball",
+                   course: Optional[Course] = None) -> TeamState:
+        """TeamState for players 0..len(names)-1."""
+        players = range(len(names))
+        return TeamState(hole=hole, names=tuple(names), shots=tuple(self.shots(p, hole) for p in players),
+                         hcps=tuple(hcps), day2=day2, improve_list=tuple(improve_list), format=format,
+                         streaks=tuple(self.streak(p, hole) for p in players), course=course)
+
+    # --- Snapshots ---
+    def to_dict(self) -> dict:
+        return dict(hole=self.hole, acked=self.acked, learned=self.learned, events=self._events.tolist(),
+                    undo=self._undo.tolist(), redo=self._redo.tolist(),
+                    count=self._count.tolist(), last=self._last.tobytes().hex(),
+                    streak=self._streak.tobytes().hex())
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "RoundState":
+        rs = cls()
+        rs.hole, rs.acked, rs.learned = d["hole"], d["acked"], d.get("learned", 0)
+        rs._events = array("H", d["events"])
+        rs._undo = array("H", d["undo"])
+        rs._redo = array("H", d["redo"])
+        rs._count = array("H", d["count"])
+        rs._last = array("B", bytes.fromhex(d["last"]))
+        rs._streak = array("B", bytes.fromhex(d["streak"]))
+        return rs
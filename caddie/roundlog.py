@@ -0,0 +1,293 @@
+# === ROUND LOG ================================================================
+# Append-only, crash-safe record of one round, so a browser refresh or server
+# restart resumes where the group left off.
+#
+#   <round>.log        fixed 12-byte records: kind u1, hole u1, player i1, pad,
+#                      value u4, crc32 u4 (CRC over the first 8 bytes)
+#   <round>.snap.json  periodic snapshot: replayed RoundState + log offset it covers
+#
+# Each append is one os.write straight to the file (no user-space buffer, so a
+# process crash loses nothing); fsync is batched to every ROUND_LOG_FSYNC_EVERY
+# events or ROUND_LOG_FSYNC_SECONDS, whichever comes first. The first unsynced
+# append arms a timer for the deadline, so an event written just before the group
+# goes idle is still synced within ROUND_LOG_FSYNC_SECONDS. Resume loads the
+# snapshot and replays only the records after it. A torn or corrupt tail (power
+# loss mid-write) ends the replay and is truncated before the next append.
+#
+# Every append is also published to the round's hub (caddie.hub), tagged with
+# the writing session, so other phones showing the round pick up the change.
+#
+#   python -m caddie.roundlog show <round.log>
+import argparse
+import glob
+import json
+import os
+import re
+import struct
+import sys
+import threading
+import time
+import zlib
+from typing import Iterable, List, Optional, Tuple
+
+from .config import (
+    MAX_PLAYERS, PAR, ROUND_LOG_DIR, ROUND_LOG_FSYNC_EVERY, ROUND_LOG_FSYNC_SECONDS, ROUND_LOG_SNAPSHOT_EVERY,
+    format_grades,
+)
+from .hub import RoundHub
+from .round import RoundState, Tap
+
+LOG_FORMAT = 4
+
+# Record kinds
+GRADE = 1     # player, hole, value = score
+RESET = 2     # hole: clear every player's shots
+HOLE = 3      # hole: current hole changed
+ACK = 4       # value = last offline-mode event applied (see app.sync_offline)
+UNDO = 5      # take back the last grade
+REDO = 6      # put back the last undone grade
+LEARN = 7     # hole: the weight learner took this hole's grades (caddie.learn)
+
+_BODY = struct.Struct("<BBbxI")
+RECORD_SIZE = _BODY.size + 4
+
+Record = Tuple[int, int, int, int]   # (kind, hole, player, value)
+
+
+def apply(state: RoundState, record: Record) -> Optional[Tap]:
+    """Fold one record into a replayed state (the only place events take effect)."""
+    kind, hole, player, value = record
+    if kind == GRADE:
+        state.add(player, hole, value)
+    elif kind == RESET:
+        state.reset(hole)
+    elif kind == HOLE:
+        state.hole = hole
+    elif kind == ACK:
+        state.acked = value
+    elif kind == UNDO:
+        return state.undo()
+    elif kind == REDO:
+        return state.redo()
+    elif kind == LEARN:
+        state.learned |= 1 << (hole - 1)
+    return None
+
+
+def pack(record: Record) -> bytes:
+    body = _BODY.pack(*record)
+    return body + struct.pack("<I", zlib.crc32(body))
+
+
+def read_records(data: bytes, start: int = 0) -> Tuple[List[Record], int]:
+    """Decode records from `start`; returns them and the offset just past the last valid one."""
+    out, pos = [], start
+    while pos + RECORD_SIZE <= len(data):
+        body = data[pos:pos + _BODY.size]
+        (crc,) = struct.unpack_from("<I", data, pos + _BODY.size)
+        if crc != zlib.crc32(body):
+            break
+        out.append(_BODY.unpack(body))
+        pos += RECORD_SIZE
+    return out, pos
+
+
+def round_path(round_id: str, directory: str = ROUND_LOG_DIR) -> str:
+    return os.path.join(directory, round_id + ".log")
+
+
+def find_round(code: str, directory: str = ROUND_LOG_DIR) -> Optional[str]:
+    """Round id for a full id or a unique prefix of one (the code a partner types in)."""
+    code = code.strip().lower()
+    if not re.fullmatch(r"[0-9a-f]{6,32}", code):
+        return None
+    ids = {os.path.basename(p)[:-len(".log")] for p in glob.glob(os.path.join(directory, code + "*.log"))}
+    return ids.pop() if len(ids) == 1 else None
+
+
+def _snapshot_path(path: str) -> str:
+    return path[:-len(".log")] + ".snap.json" if path.endswith(".log") else path + ".snap.json"
+
+
+def replay(path: str) -> Tuple[RoundState, int, int]:
+    """Rebuild a round: (state, events, offset of the end of the valid log)."""
+    state, events, end, _ = _replay(path)
+    return state, events, end
+
+
+def _replay(path: str) -> Tuple[RoundState, int, int, int]:
+    """replay() plus the number of events the snapshot covered."""
+    try:
+        size = os.path.getsize(path)
+    except FileNotFoundError:
+        return RoundState(), 0, 0, 0
+    try:
+        with open(_snapshot_path(path), encoding="utf-8") as f:
+            snap = json.load(f)
+        if snap.get("format") != LOG_FORMAT or snap["offset"] > size:
+            return replay_full(path) + (0,)    # snapshot does not describe this log
+        state, events, offset = RoundState.from_dict(snap["state"]), snap["events"], snap["offset"]
+    except (OSError, ValueError, KeyError):
+        return replay_full(path) + (0,)
+    with open(path, "rb") as f:
+        f.seek(offset)
+        records, end = read_records(f.read())
+    for r in records:
+        apply(state, r)
+    return state, events + len(records), offset + end, events
+
+
+def replay_full(path: str) -> Tuple[RoundState, int, int]:
+    """Replay from the first record, ignoring any snapshot."""
+    with open(path, "rb") as f:
+        records, end = read_records(f.read())
+    state = RoundState()
+    for r in records:
+        apply(state, r)
+    return state, len(records), end
+
+
+class RoundLog:
+    """One open round: replayed state, an append handle on its log (thread-safe appends) and its hub."""
+
+    def __init__(self, path: str, fsync_every: int = ROUND_LOG_FSYNC_EVERY,
+                 fsync_seconds: float = ROUND_LOG_FSYNC_SECONDS, snapshot_every: int = ROUND_LOG_SNAPSHOT_EVERY):
+        self.path = path
+        self.fsync_every = fsync_every
+        self.fsync_seconds = fsync_seconds
+        self.snapshot_every = snapshot_every
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.state, self.events, end, snapped = _replay(path)
+        self._fd = os.open(path, os.O_WRONLY | os.O_CREAT, 0o644)
+        os.ftruncate(self._fd, end)            # drop a torn tail so appends follow valid records
+        os.lseek(self._fd, end, os.SEEK_SET)
+        self._offset = end
+        self._unsynced = 0
+        self._synced_at = time.monotonic()
+        self._timer: Optional[threading.Timer] = None        # pending deadline flush
+        self._since_snapshot = self.events - snapped
+        self._lock = threading.RLock()
+        self.hub = RoundHub()
+
+    # --- Writes ---
+    def append(self, records: Iterable[Record], origin: str = "") -> List[Optional[Tap]]:
+        """Apply and write records as one batch (a single write call); returns apply() results.
+
+        `origin` identifies the writing session in the hub's deltas.
+        """
+        records = list(records)
+        if not records:
+            return []
+        data = b"".join(pack(r) for r in records)
+        with self._lock:
+            os.write(self._fd, data)
+            self._offset += len(data)
+            results = [apply(self.state, r) for r in records]
+            self.events += len(records)
+            self._unsynced += len(records)
+            self._since_snapshot += len(records)
+            if self._unsynced >= self.fsync_every or time.monotonic() - self._synced_at >= self.fsync_seconds:
+                self.flush()
+            elif self._timer is None:
+                self._timer = threading.Timer(self.fsync_seconds, self._flush_due)
+                self._timer.daemon = True
+                self._timer.start()
+            if self._since_snapshot >= self.snapshot_every:
+                self.snapshot()
+            self.hub.publish(records, origin)
+        return results
+
+    def grade(self, player: int, hole: int, score: int, origin: str = "") -> None:
+        self.append([(GRADE, hole, player, score)], origin)
+
+    def reset(self, hole: int, origin: str = "") -> None:
+        self.append([(RESET, hole, -1, 0)], origin)
+
+    def goto(self, hole: int, origin: str = "") -> None:
+        with self._lock:
+            if hole != self.state.hole:
+                self.append([(HOLE, hole, -1, 0)], origin)
+
+    def undo(self, origin: str = "") -> Optional[Tap]:
+        """Take back the last grade; returns (player, hole, score) or None when there is none."""
+        with self._lock:
+            return self.append([(UNDO, 0, -1, 0)], origin)[0] if self.state.can_undo else None
+
+    def redo(self, origin: str = "") -> Optional[Tap]:
+        with self._lock:
+            return self.append([(REDO, 0, -1, 0)], origin)[0] if self.state.can_redo else None
+
+    def claim_learn(self, hole: int, origin: str = "") -> bool:
+        """Mark `hole` as taken by the weight learner; False when an earlier call already did."""
+        with self._lock:
+            if self.state.learned >> (hole - 1) & 1:
+                return False
+            self.append([(LEARN, hole, -1, 0)], origin)
+            return True
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._unsynced:
+                os.fsync(self._fd)
+                self._unsynced = 0
+            self._synced_at = time.monotonic()
+
+    def _flush_due(self) -> None:
+        with self._lock:
+            self._timer = None
+            if self._fd is not None:
+                self.flush()
+
+    def snapshot(self) -> None:
+        """Persist the replayed state so resume only replays records after this point."""
+        with self._lock:
+            self.flush()                       # the snapshot may not cover records a crash could lose
+            tmp = _snapshot_path(self.path) + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(dict(format=LOG_FORMAT, events=self.events, offset=self._offset,
+                               state=self.state.to_dict()), f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, _snapshot_path(self.path))
+            self._since_snapshot = 0
+
+    def close(self) -> None:
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if self._fd is not None:
+                self.flush()
+                os.close(self._fd)
+                self._fd = None
+
+    def __del__(self):
+        try:
+            self.close()
+        except OSError:
+            pass
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m caddie.roundlog", description="Inspect a round log.")
+    ap.add_argument("command", choices=["show"])
+    ap.add_argument("path", help="<round>.log")
+    args = ap.parse_args(argv)
+
+    t0 = time.perf_counter()
+    state, events, offset = replay(args.path)
+    elapsed = time.perf_counter() - t0
+    size = os.path.getsize(args.path) if os.path.exists(args.path) else 0
+    print(f"{events} events, {offset} of {size} bytes valid, replayed in {elapsed * 1e3:.2f} ms")
+    print(f"current hole {state.hole}, offline events acked {state.acked}")
+    for hole in range(1, len(PAR) + 1):
+        grades = [state.shots(p, hole) for p in range(MAX_PLAYERS)]
+        while grades and not grades[-1]:
+            grades.pop()
+        if grades:
+            print(f"  hole {hole:2d}: " + " · ".join(f"P{p + 1} {format_grades(g)}" for p, g in enumerate(grades)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
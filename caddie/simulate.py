@@ -0,0 +1,322 @@
+# === ROUND SIMULATOR ==========================================================
+# Monte Carlo better-ball rounds that follow the engine's advice, for checking
+# whether the EV coefficients help or hurt.
+#
+# Shot model (per player, per hole): the player needs PAR - 2 "progress" to reach
+# the green. Each graded shot is drawn from that player's grade distribution for
+# the hole, tilted by the role the engine gave them (attack / control):
+#   A, B, C → +1 progress   D → +0.5 (recovery)   F → +0 and a penalty stroke
+# Putts depend on the grade of the shot that reached the green. Gross score is
+# shots + penalties + putts; the team scores min(net) per hole. Par, strokes
+# received and the default weights come from SimConfig.course (the default course
+# when not given), as HoleState.course does for the engine.
+#
+# Control is a trade, not a free edge: it swaps A/B shots for C and only slightly
+# cuts F/D, so a player alone scores about the same in control as in normal play
+# (role_cost measures it; --compare prints it). The engine's gain over "none"
+# therefore comes from pairing roles, plus whatever cost the tilts still carry.
+#
+# Rounds are simulated in lockstep as numpy arrays (one row per round), chunks
+# are spread over a process pool, and only fixed-size aggregates come back.
+#
+#   python -m caddie.simulate --rounds 1000000 --workers 8
+import argparse
+import os
+import sys
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field, replace
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .batch import (
+    ATTACKER_COEF, BOTH_SAFE_ATTACK, EV_COEF, MATT, MATT_SAFE_ATTACK, MIKE_SAFE_ATTACK, ONE_AVERAGE_MEDIUM,
+    ONE_SAFE_ATTACK, TEE_FIRST, TEE_MIXED_ATTACK, TEE_SAFE_ATTACK, evaluate,
+)
+from .config import BAD_SCORE
+from .courses import Course, get_course
+
+NORMAL, ATTACK, CONTROL = 0, 1, 2
+ATTACK_CODES = np.array([ONE_SAFE_ATTACK, ONE_AVERAGE_MEDIUM, TEE_SAFE_ATTACK, TEE_MIXED_ATTACK,
+                         MATT_SAFE_ATTACK, MIKE_SAFE_ATTACK, BOTH_SAFE_ATTACK])
+
+# Grade columns are ordered by score: F, D, C, B, A  (score = column + 1)
+PROGRESS = np.array([0.0, 0.5, 1.0, 1.0, 1.0])
+PENALTY = np.array([1, 0, 0, 0, 0])
+ONE_PUTT = np.array([0.00, 0.02, 0.05, 0.15, 0.45])
+THREE_PUTT = np.array([0.30, 0.25, 0.15, 0.05, 0.02])
+MAX_SHOTS = 10           # pick up after this many graded shots on a hole
+SCORE_MIN, SCORE_MAX = -40, 80   # histogram range for round net-to-par
+
+
+@dataclass(frozen=True)
+class SimConfig:
+    """Inputs for a simulation run. Weights default to the course's, coefficients to the live config."""
+    matt_hcp: int = 19
+    mike_hcp: int = 13
+    day2: bool = False
+    improve_list: Tuple[int, ...] = ()
+    policy: str = "engine"                       # "engine" follows advice, "none" plays every shot normal
+    ev_coef: Tuple[float, ...] = tuple(EV_COEF)
+    attacker_coef: Tuple[float, ...] = tuple(ATTACKER_COEF)
+    matt_w: Optional[Tuple[float, ...]] = None     # None: the course's weights
+    mike_w: Optional[Tuple[float, ...]] = None
+    # Grade mix is derived from strength weights unless given explicitly: [player][hole][F..A].
+    # When tuning weights, pin this so the engine's weights and the players' skill stay separate.
+    grade_dist: Optional[Tuple] = None
+    attack_tilt: Tuple[float, ...] = (1.6, 1.3, 0.7, 0.8, 1.8)    # F..A multipliers when attacking
+    control_tilt: Tuple[float, ...] = (0.9, 1.0, 1.2, 0.8, 0.3)   # F..A multipliers when playing safe
+    # Par and stroke allocation; the default course when not given.
+    course: Optional[Course] = field(default=None, repr=False)
+
+    def __post_init__(self):
+        if self.course is None:
+            object.__setattr__(self, "course", get_course())
+        if self.matt_w is None:
+            object.__setattr__(self, "matt_w", tuple(self.course.matt_w))
+        if self.mike_w is None:
+            object.__setattr__(self, "mike_w", tuple(self.course.mike_w))
+
+
+def default_grade_dist(w: float) -> List[float]:
+    """Normal-play grade mix (F..A) for a player with per-hole strength w in 0..1."""
+    a = 0.03 + 0.08 * w
+    b = 0.10 + 0.15 * w
+    d = 0.36 - 0.12 * w
+    f = 0.16 - 0.08 * w
+    return [f, d, 1.0 - (a + b + d + f), b, a]
+
+
+_DIST_BASE = np.array(default_grade_dist(0.0))
+_DIST_SLOPE = np.array(default_grade_dist(1.0)) - _DIST_BASE
+
+
+def implied_weight(counts: Sequence[float]) -> float:
+    """Strength w whose default_grade_dist(w) best fits observed grade counts (F..A), clipped to 0..1.
+
+    default_grade_dist is linear in w, so this is a one-dimensional least-squares fit.
+    """
+    counts = np.asarray(counts, dtype=np.float64)
+    w = _DIST_SLOPE @ (counts / counts.sum() - _DIST_BASE) / (_DIST_SLOPE @ _DIST_SLOPE)
+    return float(np.clip(w, 0.0, 1.0))
+
+
+def grade_cdf(cfg: SimConfig) -> np.ndarray:
+    """Cumulative grade probabilities, shape (player, hole, mode, 5)."""
+    if cfg.grade_dist is not None:
+        base = np.asarray(cfg.grade_dist, dtype=np.float64)
+    else:
+        base = np.array([[default_grade_dist(w) for w in ws] for ws in (cfg.matt_w, cfg.mike_w)])
+    modes = np.stack([base, base * np.asarray(cfg.attack_tilt), base * np.asarray(cfg.control_tilt)], axis=2)
+    modes /= modes.sum(axis=-1, keepdims=True)
+    return np.cumsum(modes, axis=-1)
+
+
+@dataclass
+class SimStats:
+    """Streaming aggregate; merging two of these is the same as one bigger run."""
+    rounds: int = 0
+    total: float = 0.0
+    total_sq: float = 0.0
+    hist: np.ndarray = field(default_factory=lambda: np.zeros(SCORE_MAX - SCORE_MIN + 1, dtype=np.int64))
+    hole_total: np.ndarray = field(default_factory=lambda: np.zeros(18))
+
+    def add_rounds(self, net_to_par: np.ndarray, per_hole: np.ndarray) -> None:
+        self.rounds += len(net_to_par)
+        self.total += float(net_to_par.sum())
+        self.total_sq += float((net_to_par.astype(np.float64) ** 2).sum())
+        idx = np.clip(net_to_par, SCORE_MIN, SCORE_MAX) - SCORE_MIN
+        self.hist += np.bincount(idx, minlength=len(self.hist))
+        self.hole_total += per_hole.sum(axis=0)
+
+    def merge(self, other: "SimStats") -> "SimStats":
+        self.rounds += other.rounds
+        self.total += other.total
+        self.total_sq += other.total_sq
+        self.hist += other.hist
+        self.hole_total += other.hole_total
+        return self
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.rounds if self.rounds else 0.0
+
+    @property
+    def std(self) -> float:
+        if self.rounds < 2:
+            return 0.0
+        var = (self.total_sq - self.total ** 2 / self.rounds) / (self.rounds - 1)
+        return max(var, 0.0) ** 0.5
+
+    def percentile(self, q: float) -> int:
+        """q in 0..100, from the histogram (exact for integer scores inside the range)."""
+        cum = np.cumsum(self.hist)
+        return int(np.searchsorted(cum, q / 100 * self.rounds)) + SCORE_MIN
+
+    def summary(self) -> str:
+        pct = " ".join(f"p{q}={self.percentile(q):+d}" for q in (5, 25, 50, 75, 95))
+        return (f"{self.rounds} rounds · team net to par mean {self.mean:+.3f} (sd {self.std:.3f}) · {pct}")
+
+
+def _play_hole(rng: np.random.Generator, cfg: SimConfig, cdf: np.ndarray, h: int, n: int) -> np.ndarray:
+    """Play hole index h for n rounds; returns team net score (strokes) per round."""
+    needed = cfg.course.par[h] - 2
+    strokes = np.array([cfg.course.strokes_for(cfg.matt_hcp, h), cfg.course.strokes_for(cfg.mike_hcp, h)])
+    bias = cfg.day2 and (h + 1) in cfg.improve_list
+    coef = np.asarray(cfg.ev_coef)
+    mw = np.asarray(cfg.matt_w); kw = np.asarray(cfg.mike_w)
+
+    count = np.zeros((2, n), dtype=np.int64)
+    last = np.zeros((2, n), dtype=np.int64)
+    streak = np.zeros((2, n), dtype=np.int64)
+    progress = np.zeros((2, n))
+    penalty = np.zeros((2, n), dtype=np.int64)
+    green_grade = np.full((2, n), 2)            # column index; default C if picked up
+    done = np.zeros((2, n), dtype=bool)
+    rows = np.arange(n)
+
+    while not done.all():
+        if cfg.policy == "engine":
+            res = evaluate(h, last[0], last[1], streak[0], streak[1], count[0], count[1],
+                           strokes[0], strokes[1], bias, coef=coef, matt_w=mw, mike_w=kw,
+                           attacker_coef=np.asarray(cfg.attacker_coef))
+            code, attacker, lead = res.code, res.attacker, res.lead
+        else:
+            code = np.full(n, TEE_FIRST); attacker = np.full(n, -1); lead = np.full(n, MATT)
+
+        # Next shooter: whoever is behind on shots; ties go to the engine's tee order, else Matt.
+        tie_break = np.where(code == TEE_FIRST, lead, MATT)
+        shooter = np.where(count[0] < count[1], 0, np.where(count[1] < count[0], 1, tie_break))
+        shooter = np.where(done[shooter, rows], 1 - shooter, shooter)
+        active = ~done[shooter, rows]
+
+        attacking = np.isin(code, ATTACK_CODES)
+        mode = np.where(code == TEE_FIRST, NORMAL,
+                        np.where(attacking & (attacker == shooter), ATTACK, CONTROL))
+
+        u = rng.random(n)
+        grade = (u[:, None] > cdf[shooter, h, mode]).sum(axis=1)   # 0..4 = F..A
+        grade = np.minimum(grade, 4)
+
+        s, r = shooter[active], rows[active]
+        g = grade[active]
+        count[s, r] += 1
+        last[s, r] = g + 1
+        streak[s, r] = np.where(g + 1 <= BAD_SCORE, streak[s, r] + 1, 0)
+        progress[s, r] += PROGRESS[g]
+        penalty[s, r] += PENALTY[g]
+        reached = progress[s, r] >= needed
+        green_grade[s, r] = np.where(reached, g, green_grade[s, r])
+        done[s, r] = reached | (count[s, r] >= MAX_SHOTS)
+
+    u = rng.random((2, n))
+    putts = 2 - (u < ONE_PUTT[green_grade]) + (u > 1 - THREE_PUTT[green_grade])
+    net = count + penalty + putts - strokes[:, None]
+    return net.min(axis=0)
+
+
+def role_cost(cfg: SimConfig, n: int = 20_000, seed: int = 0) -> Tuple[float, float]:
+    """Mean strokes per hole that attack and control cost a player alone, vs normal play."""
+    rng = np.random.default_rng(seed)
+    cdf = grade_cdf(cfg)
+    score = np.zeros((3, 2, 18))
+    for mode, p, h in np.ndindex(score.shape):
+        count = np.zeros(n, dtype=np.int64)
+        progress = np.zeros(n)
+        penalty = np.zeros(n, dtype=np.int64)
+        green_grade = np.full(n, 2)
+        done = np.zeros(n, dtype=bool)
+        while not done.all():
+            g = np.minimum((rng.random(n)[:, None] > cdf[p, h, mode]).sum(axis=1), 4)
+            count += ~done
+            progress += np.where(done, 0.0, PROGRESS[g])
+            penalty += np.where(done, 0, PENALTY[g])
+            reached = ~done & (progress >= cfg.course.par[h] - 2)
+            green_grade = np.where(reached, g, green_grade)
+            done |= reached | (count >= MAX_SHOTS)
+        u = rng.random(n)
+        score[mode, p, h] = (count + penalty + 2 - (u < ONE_PUTT[green_grade])
+                             + (u > 1 - THREE_PUTT[green_grade])).mean()
+    return float((score[ATTACK] - score[NORMAL]).mean()), float((score[CONTROL] - score[NORMAL]).mean())
+
+
+def simulate_chunk(cfg: SimConfig, n: int, seed: np.random.SeedSequence) -> SimStats:
+    """n rounds with their own generator; safe to run in a worker process."""
+    rng = np.random.default_rng(seed)
+    cdf = grade_cdf(cfg)
+    per_hole = np.empty((n, 18), dtype=np.int64)
+    for h in range(18):
+        per_hole[:, h] = _play_hole(rng, cfg, cdf, h, n) - cfg.course.par[h]
+    stats = SimStats()
+    stats.add_rounds(per_hole.sum(axis=1), per_hole)
+    return stats
+
+
+def _chunks(rounds: int, chunk: int, seed: int) -> Iterator[Tuple[int, np.random.SeedSequence]]:
+    """(size, seed) per chunk. Seeds come from one SeedSequence, so results do not
+    depend on the number of workers."""
+    n_chunks = -(-rounds // chunk)
+    for i, ss in enumerate(np.random.SeedSequence(seed).spawn(n_chunks)):
+        yield min(chunk, rounds - i * chunk), ss
+
+
+def run(cfg: SimConfig, rounds: int, workers: Optional[int] = None, chunk: int = 4096,
+        seed: int = 0) -> SimStats:
+    """Simulate `rounds` rounds across a process pool, merging results as they arrive."""
+    stats = SimStats()
+    jobs = _chunks(rounds, chunk, seed)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        for n, ss in jobs:
+            stats.merge(simulate_chunk(cfg, n, ss))
+        return stats
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # Keep a bounded number of chunks in flight so memory does not grow with `rounds`.
+        pending = set()
+        for n, ss in jobs:
+            pending.add(pool.submit(simulate_chunk, cfg, n, ss))
+            if len(pending) >= 2 * workers:
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for fut in finished:
+                    stats.merge(fut.result())
+        for fut in pending:
+            stats.merge(fut.result())
+    return stats
+
+
+def main(argv: Sequence[str] = None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m caddie.simulate", description="Monte Carlo better-ball rounds.")
+    ap.add_argument("--rounds", type=int, default=100_000)
+    ap.add_argument("--workers", type=int, default=None, help="default: all cores")
+    ap.add_argument("--chunk", type=int, default=4096, help="rounds per task")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--matt-hcp", type=int, default=19)
+    ap.add_argument("--mike-hcp", type=int, default=13)
+    ap.add_argument("--day2", action="store_true")
+    ap.add_argument("--improve", type=int, nargs="*", default=[], help="holes to improve (Day-2)")
+    ap.add_argument("--policy", choices=["engine", "none"], default="engine")
+    ap.add_argument("--ev-coef", type=float, nargs=len(EV_COEF), default=None,
+                    help="strength day2 safe stroke streak-risk streak-cap no-safe-risk deadband")
+    ap.add_argument("--compare", action="store_true", help="also run policy=none on the same seeds")
+    ap.add_argument("--course", default=None, help="course key (default: the default course)")
+    args = ap.parse_args(argv)
+
+    cfg = SimConfig(matt_hcp=args.matt_hcp, mike_hcp=args.mike_hcp, day2=args.day2,
+                    improve_list=tuple(args.improve), policy=args.policy,
+                    course=get_course(args.course) if args.course else None)
+    if args.ev_coef:
+        cfg = replace(cfg, ev_coef=tuple(args.ev_coef))
+    stats = run(cfg, args.rounds, args.workers, args.chunk, args.seed)
+    print(f"[{cfg.policy}] {stats.summary()}")
+    if args.compare:
+        base = run(replace(cfg, policy="none"), args.rounds, args.workers, args.chunk, args.seed)
+        print(f"[none]   {base.summary()}")
+        print(f"engine − none: {stats.mean - base.mean:+.3f} strokes per round")
+        attack, control = role_cost(cfg, seed=args.seed)
+        print(f"role cost for a player alone vs normal: attack {attack:+.3f}, control {control:+.3f} "
+              f"strokes per hole (the tilts' built-in edge, not the engine's)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
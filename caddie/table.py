@@ -0,0 +1,276 @@
+# === DECISION TABLE ===========================================================
+# role_advice_and_rules only looks at a handful of features per player, so every
+# reachable hole state falls into one of a small number of equivalence classes:
+#
+#   hole (18) × Matt strokes (0..2) × Mike strokes (0..2) × day-2 bias (2)
+#     × Matt class (15) × Mike class (15)
+#
+# Handicaps collapse to strokes received on the hole, and the Day-2 flag plus the
+# improve list collapse to "day2 and hole in improve_list". A player class is
+# (no shots) | (one shot, grade) | (2+ shots, last grade, D/F streak capped at 3).
+# The only uncapped value the engine prints is the bad-streak count in the
+# guardrail rules, which lookup() formats from the live state.
+#
+# Each course gets its own table (its stroke allocation and weights are baked
+# in); the default course lives at DEFAULT_PATH, others at DEFAULT_PATH-<key>.
+#
+#   python -m caddie.table build  [path] [--course KEY]   write <path>.npy + <path>.json
+#   python -m caddie.table verify [path]                  prove the table matches the engine
+import argparse
+import hashlib
+import json
+import math
+import os
+import random
+import struct
+import sys
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from . import config
+from .config import BAD_SCORE, BAD_STREAK_THRESHOLD, DEFAULT_COURSE, GRADE_TO_SCORE, SAFE_SCORE
+from .courses import Course, get_course
+from .engine import HoleState, bad_streak, role_advice_and_rules
+
+TABLE_VERSION = 1
+DEFAULT_PATH = os.path.join(os.path.dirname(__file__), "data", "decision_table")
+
+N_HOLES = 18
+N_STROKES = 3        # 0, 1 or 2 strokes received on a hole (HCP 0..54)
+N_CLASSES = 15       # see player_class()
+SHAPE = (N_HOLES, N_STROKES, N_STROKES, 2, N_CLASSES, N_CLASSES)
+
+ENTRY_DTYPE = np.dtype([
+    ("ev", "<f8"),        # stored as-is so rounding and -0.0 survive the round trip
+    ("outcome", "<u2"),   # index into DecisionTable.outcomes
+    ("attacker", "i1"),   # -1 none, 0 Matt, 1 Mike
+    ("safe", "i1"),       # index into SAFE_LABELS
+])
+_ENTRY = struct.Struct("<dHbb")   # same packed layout, for scalar reads without numpy overhead
+ATTACKERS = ("Matt", "Mike")
+SAFE_LABELS = ("N/A", "Yes", "No")
+
+
+def player_class(shots, streak: Optional[int] = None) -> Tuple[int, int]:
+    """Return (class index, uncapped bad streak) for one player's shots on a hole.
+
+    Pass `streak` when it is already known to skip rescanning the shots.
+    """
+    n = len(shots)
+    if n == 0:
+        return 0, 0
+    g = shots[-1]
+    if n == 1:
+        return g, (1 if g <= BAD_SCORE else 0)              # 1..5
+    if g > BAD_SCORE:
+        return 6 + (g - BAD_SCORE - 1), 0                   # 6..8: C, B, A
+    if streak is None:
+        streak = bad_streak(shots)
+    return 9 + (g - 1) * 3 + min(streak, 3) - 1, streak     # 9..14: F/D × streak 1..3+
+
+
+def class_representative(cls: int) -> Tuple[int, ...]:
+    """Shortest shot list that lands in class `cls`."""
+    if cls == 0:
+        return ()
+    if cls <= 5:
+        return (cls,)
+    if cls <= 8:
+        return (SAFE_SCORE + 1, cls - 6 + BAD_SCORE + 1)
+    g, streak = divmod(cls - 9, 3)
+    return (SAFE_SCORE + 1,) + (g + 1,) * (streak + 1)
+
+
+def hcp_for_strokes(strokes: int, hole_idx: int, course: Optional[Course] = None) -> int:
+    """Smallest handicap that receives `strokes` on this hole."""
+    rating = (course or get_course()).hole_handicap[hole_idx]
+    return (0, rating, 18 + rating)[strokes]
+
+
+def table_path(course_key: str = DEFAULT_COURSE) -> str:
+    return DEFAULT_PATH if course_key == DEFAULT_COURSE else f"{DEFAULT_PATH}-{course_key}"
+
+
+def fingerprint(course: Optional[Course] = None) -> str:
+    """Hash of every config input baked into the table; a mismatch means rebuild."""
+    course = course or get_course()
+    payload = json.dumps([TABLE_VERSION, course.hole_handicap, course.matt_w, course.mike_w,
+                          SAFE_SCORE, BAD_SCORE, BAD_STREAK_THRESHOLD,
+                          [getattr(config, k) for k in config.COEFFICIENT_NAMES]])
+    return hashlib.sha1(payload.encode()).hexdigest()[:16]
+
+
+def _streak_rules(m_streak: int, k_streak: int) -> List[str]:
+    rules = []
+    if m_streak >= BAD_STREAK_THRESHOLD: rules.append(f"Matt bad streak {m_streak} → no green light.")
+    if k_streak >= BAD_STREAK_THRESHOLD: rules.append(f"Mike bad streak {k_streak} → no green light.")
+    return rules
+
+
+class DecisionTable:
+    """Flat lookup table with one entry per equivalence class."""
+
+    def __init__(self, entries: np.ndarray, outcomes: List[Tuple[str, Tuple[str, ...]]], meta: dict):
+        self.entries = entries            # ENTRY_DTYPE, shape SHAPE (possibly a read-only memmap)
+        self.outcomes = outcomes          # (recommendation, branch rules)
+        self.meta = meta
+        if entries.flags.owndata:
+            entries.flags.writeable = False   # shared by every session: never mutated after build
+        self._buf = memoryview(entries.reshape(-1).view(np.uint8))
+
+    def index(self, state: HoleState) -> Tuple[int, int, int]:
+        """Flat table index for a state, plus both players' uncapped bad streaks."""
+        mc, m_streak = player_class(state.matt_shots, state.matt_streak)
+        kc, k_streak = player_class(state.mike_shots, state.mike_streak)
+        h = state.hole_idx
+        bias = int(state.day2 and state.hole in state.improve_list)
+        flat = (((((h * N_STROKES + state.matt_strokes) * N_STROKES
+                   + state.mike_strokes) * 2 + bias) * N_CLASSES + mc) * N_CLASSES + kc)
+        return flat, m_streak, k_streak
+
+    def lookup(self, state: HoleState):
+        """Same return value as role_advice_and_rules(state), in O(1) (state.course must be this table's)."""
+        flat, m_streak, k_streak = self.index(state)
+        ev, outcome, att, safe = _ENTRY.unpack_from(self._buf, flat * _ENTRY.size)
+        rec, branch_rules = self.outcomes[outcome]
+        attacker = ATTACKERS[att] if att >= 0 else None
+        h = state.hole_idx
+        smart_peek = dict(attacker=attacker, ev=ev, safe=SAFE_LABELS[safe],
+                          matt_w=state.course.matt_w[h], mike_w=state.course.mike_w[h])
+        return rec, _streak_rules(m_streak, k_streak) + list(branch_rules), ev, attacker, smart_peek
+
+    def save(self, path: str = DEFAULT_PATH) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        np.save(path + ".npy", np.ascontiguousarray(self.entries))
+        with open(path + ".json", "w", encoding="utf-8") as f:
+            json.dump(dict(meta=self.meta, outcomes=[[r, list(rs)] for r, rs in self.outcomes]),
+                      f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_PATH, mmap: bool = True) -> "DecisionTable":
+        with open(path + ".json", encoding="utf-8") as f:
+            side = json.load(f)
+        entries = np.load(path + ".npy", mmap_mode="r" if mmap else None)
+        if entries.dtype != ENTRY_DTYPE or entries.shape != SHAPE:
+            raise ValueError(f"{path}.npy has unexpected layout {entries.dtype} {entries.shape}")
+        outcomes = [(r, tuple(rs)) for r, rs in side["outcomes"]]
+        return cls(entries, outcomes, side["meta"])
+
+
+def _representative_state(idx: tuple, course: Course) -> HoleState:
+    h, ms, ks, bias, mc, kc = idx
+    return HoleState(hole=h + 1,
+                     matt_shots=class_representative(mc), mike_shots=class_representative(kc),
+                     matt_hcp=hcp_for_strokes(ms, h, course), mike_hcp=hcp_for_strokes(ks, h, course),
+                     day2=bool(bias), improve_list=(h + 1,) if bias else (), course=course)
+
+
+def build_table(course: Optional[Course] = None) -> DecisionTable:
+    """Run the live engine once per equivalence class."""
+    course = course or get_course()
+    entries = np.zeros(SHAPE, dtype=ENTRY_DTYPE)
+    outcomes: List[Tuple[str, Tuple[str, ...]]] = []
+    outcome_ids = {}
+    for idx in np.ndindex(*SHAPE):
+        state = _representative_state(idx, course)
+        rec, rules, ev, attacker, peek = role_advice_and_rules(state)
+        n_streak_rules = len(_streak_rules(state.matt_streak, state.mike_streak))
+        key = (rec, tuple(rules[n_streak_rules:]))
+        if key not in outcome_ids:
+            outcome_ids[key] = len(outcomes)
+            outcomes.append(key)
+        entries[idx] = (ev, outcome_ids[key],
+                        ATTACKERS.index(attacker) if attacker else -1,
+                        SAFE_LABELS.index(peek["safe"]))
+    return DecisionTable(entries, outcomes,
+                         dict(version=TABLE_VERSION, fingerprint=fingerprint(course), course=course.key))
+
+
+def load_or_build(path: Optional[str] = None, course: Optional[Course] = None, save: bool = False) -> DecisionTable:
+    """Memory-map the saved table if it matches the current config, else build in memory.
+
+    With `save`, a rebuilt table is written to `path` and memory-mapped from there, so
+    every process serving the same files shares one read-only copy in the page cache.
+    """
+    course = course or get_course()
+    path = path or table_path(course.key)
+    try:
+        table = DecisionTable.load(path)
+        if table.meta.get("fingerprint") == fingerprint(course):
+            return table
+    except (OSError, ValueError, KeyError):
+        pass
+    table = build_table(course)
+    if save:
+        try:
+            table.save(path)
+            return DecisionTable.load(path)
+        except OSError:
+            pass                              # read-only deploy: keep the in-memory table
+    return table
+
+
+def verify_table(table: DecisionTable, samples: int = 50_000, seed: int = 0) -> List[str]:
+    """Compare the table with the live engine. Returns a list of mismatch descriptions.
+
+    Every equivalence class is checked through its representative, then `samples`
+    random states (arbitrary handicaps, improve lists and long shot sequences)
+    check that the class mapping itself is sound.
+    """
+    problems = []
+    course = get_course(table.meta.get("course", DEFAULT_COURSE))
+    if table.meta.get("fingerprint") != fingerprint(course):
+        problems.append(f"fingerprint {table.meta.get('fingerprint')} != current config {fingerprint(course)}")
+
+    def check(state: HoleState):
+        want = role_advice_and_rules(state)
+        got = table.lookup(state)
+        if got != want or math.copysign(1, got[2]) != math.copysign(1, want[2]):
+            problems.append(f"{state}: table {got[0]!r} / {got[2]} vs engine {want[0]!r} / {want[2]}")
+
+    for idx in np.ndindex(*SHAPE):
+        check(_representative_state(idx, course))
+    rng = random.Random(seed)
+    grades = list(GRADE_TO_SCORE.values())
+    for _ in range(samples):
+        check(HoleState(hole=rng.randint(1, 18),
+                        matt_shots=tuple(rng.choices(grades, k=rng.randint(0, 8))),
+                        mike_shots=tuple(rng.choices(grades, k=rng.randint(0, 8))),
+                        matt_hcp=rng.randint(0, 54), mike_hcp=rng.randint(0, 54),
+                        day2=rng.random() < 0.5, improve_list=tuple(rng.sample(range(1, 19), rng.randint(0, 6))),
+                        course=course))
+    return problems
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m caddie.table", description="Build or verify the precomputed decision table.")
+    ap.add_argument("command", choices=["build", "verify"])
+    ap.add_argument("path", nargs="?", help="table path without extension (default: the course's table)")
+    ap.add_argument("--course", default=DEFAULT_COURSE, help="course key (build only; verify reads it from the table)")
+    ap.add_argument("--samples", type=int, default=50_000, help="random states checked by verify")
+    args = ap.parse_args(argv)
+
+    if args.command == "build":
+        args.path = args.path or table_path(args.course)
+        table = build_table(get_course(args.course))
+        table.save(args.path)
+        print(f"wrote {args.path}.npy ({table.entries.nbytes} bytes, {len(table.outcomes)} outcomes)")
+        return 0
+
+    path = args.path or table_path(args.course)
+    try:
+        table = DecisionTable.load(path)
+    except (OSError, ValueError) as e:
+        build = "python -m caddie.table build" + (f" {args.path}" if args.path else f" --course {args.course}")
+        print(f"cannot read a table at {path}: {e}\nrun `{build}` first", file=sys.stderr)
+        return 2
+    problems = verify_table(table, samples=args.samples)
+    for p in problems[:20]:
+        print(p)
+    print(f"{len(problems)} mismatches ({table.entries.size} classes + {args.samples} random states)")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
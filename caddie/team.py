@@ -0,0 +1,279 @@
+# === TEAM ENGINE ==============================================================
+# Advice for any team of 2..MAX_PLAYERS, best ball or scramble. State is
+# player-indexed (names, shots, handicaps, streaks, strokes, weights) and every
+# branch scores the whole team in one pass over those arrays, picking the
+# attacker by argmax instead of pairwise if/else, so a recommendation costs
+# O(team size).
+#
+# Scramble: every player receives the team's strokes, from a team handicap of
+# SCRAMBLE_ALLOWANCE shares of the players' handicaps (lowest handicap first).
+#
+# For a two-player best-ball team this makes the same decisions (attacker, EV,
+# safe label) as role_advice_and_rules; only the wording, which that engine
+# writes for Matt and Mike, differs. The app keeps the decision table for that pair.
+#
+#   python -m caddie.team verify    two-player team engine vs role_advice_and_rules
+import argparse
+import random
+import sys
+from dataclasses import dataclass, field
+from typing import List, Optional, Sequence, Tuple
+
+from .config import (
+    BAD_SCORE, BAD_STREAK_THRESHOLD, FORMATS, GRADE_TO_SCORE, MAX_PLAYERS, SAFE_SCORE, SCRAMBLE_ALLOWANCE,
+)
+from .courses import MAX_HCP, Course, get_course
+from .engine import (
+    HoleState, attacker_score, bad_streak, is_deadband, net_advantage, role_advice_and_rules,
+)
+
+
+def team_handicap(hcps: Sequence[int]) -> int:
+    """Scramble team handicap: allowance shares of the handicaps, lowest first, rounded half up."""
+    allowance = SCRAMBLE_ALLOWANCE[len(hcps)]
+    return int(sum(a * h for a, h in zip(allowance, sorted(hcps))) + 0.5)
+
+
+@dataclass(frozen=True)
+class TeamState:
+    """Everything the team engine needs to advise on one hole."""
+    hole: int                                   # 1..18
+    names: Tuple[str, ...]
+    shots: Tuple[Tuple[int, ...], ...]          # per player, same order as names
+    hcps: Tuple[int, ...]
+    day2: bool = False
+    improve_list: Sequence[int] = field(default_factory=tuple)
+    format: str = "best_ball"                   # one of FORMATS
+    streaks: Optional[Tuple[int, ...]] = field(default=None, compare=False, repr=False)
+    course: Optional[Course] = field(default=None, repr=False)
+    # Derived per player for this hole
+    strokes: Tuple[int, ...] = field(init=False, compare=False, repr=False)
+    weights: Tuple[float, ...] = field(init=False, compare=False, repr=False)
+
+    def __post_init__(self):
+        n = len(self.names)
+        if not 2 <= n <= MAX_PLAYERS or len(self.shots) != n or len(self.hcps) != n:
+            raise ValueError(f"a team needs 2..{MAX_PLAYERS} players with shots and handicaps for each")
+        if self.format not in FORMATS:
+            raise ValueError(f"unknown format {self.format!r}; expected one of {FORMATS}")
+        if self.course is None:
+            object.__setattr__(self, "course", get_course())
+        if self.streaks is None:
+            object.__setattr__(self, "streaks", tuple(bad_streak(s) for s in self.shots))
+        h, course = self.hole_idx, self.course
+        if self.format == "scramble":
+            strokes = (course.strokes_for(team_handicap(self.hcps), h),) * n
+        else:
+            strokes = tuple(course.strokes_for(hcp, h) for hcp in self.hcps)
+        object.__setattr__(self, "strokes", strokes)
+        object.__setattr__(self, "weights", tuple(course.weights_for(name)[h] for name in self.names))
+
+    @property
+    def hole_idx(self) -> int:
+        return self.hole - 1
+
+
+def _argmax(values, among: Sequence[int]) -> int:
+    """Index in `among` with the largest value; the earliest player wins ties."""
+    best = among[0]
+    for i in among[1:]:
+        if values[i] > values[best]:
+            best = i
+    return best
+
+def _join(names: Sequence[str]) -> str:
+    return names[0] if len(names) == 1 else ", ".join(names[:-1]) + " and " + names[-1]
+
+def team_advice(state: TeamState):
+    """Return (recommendation, rules, EV, attacker, smart_peek_dict), as role_advice_and_rules does."""
+    names, n = state.names, len(state.names)
+    streaks, strokes, w = state.streaks, state.strokes, state.weights
+    counts = [len(s) for s in state.shots]
+    lasts = [s[-1] if s else 0 for s in state.shots]
+    everyone = list(range(n))
+    day2_bias = state.day2 and (state.hole in state.improve_list)
+
+    def peek(attacker, ev, safe):
+        return dict(attacker=None if attacker is None else names[attacker], ev=ev, safe=safe, weights=w)
+
+    def evs(safe_ball: bool, among: Sequence[int]) -> List[float]:
+        out = [0.0] * n
+        for i in among:
+            out[i] = net_advantage(w[i], streaks[i], strokes[i], safe_ball, day2_bias)
+        return out
+
+    def held_back(i: int, ev: float) -> bool:
+        return streaks[i] >= BAD_STREAK_THRESHOLD or ev <= 0 or is_deadband(ev)
+
+    def rest(among: Sequence[int], role: int, advice: str) -> str:
+        """Advice for the players in `among` other than `role` (nobody, on a two-player team)."""
+        others = [names[i] for i in among if i != role]
+        return f" {_join(others)}: {advice}." if others else ""
+
+    # Bad-streak guardrails
+    rules = [f"{names[i]} bad streak {streaks[i]} → no green light."
+             for i in everyone if streaks[i] >= BAD_STREAK_THRESHOLD]
+
+    # Tee order: prefer strokes/comfort to secure a safe ball early
+    if max(counts) == 0:
+        first = n - 1
+        for i in range(n - 2, -1, -1):
+            if strokes[i] > strokes[first] or w[i] > w[first]:
+                first = i
+        rules.append(f"Tee order by strokes/comfort → {names[first]} tees first.")
+        return (f"{names[first]} tees first. First player: put a ball in play. "
+                f"{'Partner adjusts' if n == 2 else 'Partners adjust'} based on result.",
+                rules, 0.0, None, peek(None, 0.0, "N/A"))
+
+    # Tee shots in progress: the best ball so far sets the waiting players' roles
+    if max(counts) == 1 and min(counts) == 0:
+        teed = [i for i in everyone if counts[i]]
+        waiting = [i for i in everyone if not counts[i]]
+        lead = _argmax(lasts, teed)
+        if lasts[lead] >= SAFE_SCORE:
+            rules.append(f"{names[lead]} safe (≥B).")
+            ev_by = evs(True, waiting)
+            att = _argmax(ev_by, waiting)
+            ev = ev_by[att]
+            others = rest(waiting, att, "fairway first, then free to score")
+            if held_back(att, ev):
+                rules.append(f"{names[att]} attack downgraded (bad-streak or EV≤0 or deadband).")
+                return (f"{names[lead]} is safe. {names[att]}: controlled target; no hero shots.{others}",
+                        rules, ev, names[att], peek(att, ev, "Yes"))
+            return (f"{names[lead]} is safe. {names[att]}: ATTACK for a birdie look.{others}",
+                    rules, ev, names[att], peek(att, ev, "Yes"))
+
+        if lasts[lead] <= BAD_SCORE:
+            trouble = _join([names[i] for i in teed])
+            anchor = min(waiting, key=lambda i: streaks[i])            # steadiest waiting player
+            rules.append(f"{trouble} in trouble (≤D).")
+            return (f"{trouble} {'is' if len(teed) == 1 else 'are'} in trouble. "
+                    f"{names[anchor]}: ANCHOR (fairway finder; center green)."
+                    f"{rest(waiting, anchor, 'swing freely once a ball is safe')}",
+                    rules, 0.0, None, peek(None, 0.0, "No"))
+
+        rules.append(f"{names[lead]} average (C).")
+        ev_by = evs(False, waiting)
+        att = _argmax(ev_by, waiting)
+        ev = ev_by[att]
+        others = rest(waiting, att, "fairway first")
+        if ev <= 0 or is_deadband(ev):
+            return (f"{names[lead]} is average. {names[att]}: conservative line; favor fairway/center.{others}",
+                    rules, ev, names[att], peek(att, ev, "No"))
+        return (f"{names[lead]} is average. {names[att]}: medium risk line toward best angle.{others}",
+                rules, ev, names[att], peek(att, ev, "No"))
+
+    scores = [attacker_score(lasts[i], w[i], streaks[i]) for i in everyone]
+    safe = [i for i in everyone if lasts[i] >= SAFE_SCORE]
+    unsafe = [i for i in everyone if lasts[i] < SAFE_SCORE]
+    all_ = "Both" if n == 2 else "All"
+
+    # Every tee shot hit
+    if max(counts) == 1:
+        if safe:
+            rules.append("At least one safe tee ball.")
+            att = _argmax(scores, everyone)
+            ev = net_advantage(w[att], streaks[att], strokes[att], True, day2_bias)
+            partners = _join([names[i] for i in everyone if i != att])
+            if held_back(att, ev):
+                rules.append(f"{names[att]} attack downgraded (bad-streak or EV≤0 or deadband).")
+                return (f"Team has a safe ball. {names[att]}: controlled target. {partners}: easy two-putt.",
+                        rules, ev, names[att], peek(att, ev, "Yes"))
+            return (f"Team has a safe ball. {names[att]}: ATTACK. {partners}: easy two-putt.",
+                    rules, ev, names[att], peek(att, ev, "Yes"))
+
+        if all(lasts[i] <= BAD_SCORE for i in everyone):
+            better = _argmax(lasts, everyone)
+            rules.append(f"{all_} tee balls in trouble.")
+            return (f"{all_} in trouble. Play from {names[better]}'s better lie. Advance safely; protect bogey "
+                    f"(often net par on stroke holes).",
+                    rules, 0.0, names[better], peek(better, 0.0, "No"))
+
+        att = _argmax(scores, everyone)
+        ev = net_advantage(w[att], streaks[att], strokes[att], False, day2_bias)
+        rules.append("Mixed tee outcomes; attacker chosen by grades + hole strength.")
+        if ev <= 0 or is_deadband(ev):
+            return (f"Mixed results. Favor {names[att]}'s lie but avoid high-risk lines; set up inside-15 ft if easy.",
+                    rules, ev, names[att], peek(att, ev, "No"))
+        return (f"Mixed results. Favor {names[att]}'s lie; attacker aims for inside-15 ft.",
+                rules, ev, names[att], peek(att, ev, "No"))
+
+    # Approaches and beyond
+    if safe and unsafe:
+        safe_names = _join([names[i] for i in safe])
+        verb = "is" if len(safe) == 1 else "are"
+        rules.append(f"{safe_names} safe; {_join([names[i] for i in unsafe])} not safe.")
+        ev_by = evs(True, unsafe)
+        att = _argmax(ev_by, unsafe)
+        ev = ev_by[att]
+        others = rest(unsafe, att, "advance to a comfortable yardage")
+        if held_back(att, ev):
+            rules.append(f"{names[att]} attack downgraded.")
+            return (f"{safe_names} {verb} safe. {names[att]}: smart center-green. {safe_names}: avoid short-siding.{others}",
+                    rules, ev, names[att], peek(att, ev, "Yes"))
+        return (f"{safe_names} {verb} safe. {names[att]}: ATTACK pin if angle allows. "
+                f"{safe_names}: avoid short-siding.{others}",
+                rules, ev, names[att], peek(att, ev, "Yes"))
+
+    if safe:
+        rules.append(f"{all_} safe.")
+        att = _argmax(scores, everyone)
+        ev = net_advantage(w[att], streaks[att], strokes[att], True, day2_bias)
+        if ev <= 0 or is_deadband(ev):
+            return (f"{all_} are safe. Choose best birdie look; everyone plays a controlled line.",
+                    rules, ev, names[att], peek(att, ev, "Yes"))
+        lock = [names[i] for i in everyone if i != att]
+        return (f"{all_} are safe. Choose best birdie look; {names[att]} flag-hunts, "
+                f"{_join(lock)} lock{'s' if len(lock) == 1 else ''} par.",
+                rules, ev, names[att], peek(att, ev, "Yes"))
+
+    rules.append("No one safe yet → damage-control bias.")
+    return (f"{'Neither' if n == 2 else 'Nobody'} is safe yet. Advance to comfortable yardage; "
+            f"prioritize bogey (often net par on stroke holes).",
+            rules, 0.0, None, peek(None, 0.0, "No"))
+
+def team_targets_text(state: TeamState) -> str:
+    par = state.course.par[state.hole_idx]
+    if state.format == "scramble":
+        s = state.strokes[0]
+        return (f"Par {par}. Scramble team handicap {team_handicap(state.hcps)}: "
+                f"{s} stroke{'' if s == 1 else 's'} here.")
+    return f"Par {par}. Strokes — " + ", ".join(f"{a}: {s}" for a, s in zip(state.names, state.strokes)) + "."
+
+
+def verify_pair(samples: int = 50_000, seed: int = 0) -> List[str]:
+    """Two-player best ball vs role_advice_and_rules: same attacker, EV (bit for bit) and safe label."""
+    rng = random.Random(seed)
+    grades = list(GRADE_TO_SCORE.values())
+    problems = []
+    for _ in range(samples):
+        pair = HoleState(hole=rng.randint(1, 18),
+                         matt_shots=tuple(rng.choices(grades, k=rng.randint(0, 6))),
+                         mike_shots=tuple(rng.choices(grades, k=rng.randint(0, 6))),
+                         matt_hcp=rng.randint(0, MAX_HCP), mike_hcp=rng.randint(0, MAX_HCP),
+                         day2=rng.random() < 0.5, improve_list=tuple(rng.sample(range(1, 19), rng.randint(0, 6))))
+        team = TeamState(hole=pair.hole, names=("Matt", "Mike"), shots=(pair.matt_shots, pair.mike_shots),
+                         hcps=(pair.matt_hcp, pair.mike_hcp), day2=pair.day2, improve_list=pair.improve_list)
+        _, _, want_ev, want_att, want_peek = role_advice_and_rules(pair)
+        _, _, ev, att, peek = team_advice(team)
+        if (att, ev.hex(), peek["safe"]) != (want_att, want_ev.hex(), want_peek["safe"]):
+            problems.append(f"{pair}: team {att} / {ev} / {peek['safe']} vs engine "
+                            f"{want_att} / {want_ev} / {want_peek['safe']}")
+    return problems
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m caddie.team", description="Check the team engine.")
+    ap.add_argument("command", choices=["verify"])
+    ap.add_argument("--samples", type=int, default=50_000)
+    args = ap.parse_args(argv)
+
+    problems = verify_pair(args.samples)
+    for p in problems[:20]:
+        print(p)
+    print(f"{len(problems)} mismatches in {args.samples} random two-player states")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
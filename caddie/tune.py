@@ -0,0 +1,243 @@
+# === PARAMETER TUNING =========================================================
+# Search MATT_W / MIKE_W and the EV / attacker coefficients for the values that
+# minimise simulated team net-to-par, then write a versioned params file that
+# caddie.config loads at startup.
+#
+# The players' true shot quality comes from a corpus of logged holes when one is
+# given (JSON lines: {"hole": 7, "matt": "BCA", "mike": "DD"}), shrunk toward the
+# mix of the embedded baseline weights; otherwise from those baseline weights
+# alone, so a run never takes an earlier run's tuned weights as the truth. Every
+# candidate is simulated with the same seed, so their differences are not
+# sampling noise on that seed.
+#
+# The best of many candidates on one seed is also the luckiest, so before writing
+# it is re-scored against the incumbent params on a fresh seed (--holdout-rounds);
+# params are written only when it wins there by more than twice the standard error.
+#
+# Candidate scores are cached one file per candidate, so an interrupted search
+# picks up where it stopped.
+#
+#   python -m caddie.tune --corpus season.jsonl --random 200 --rounds 8192
+#   python -m caddie.tune --grid EV_STRENGTH=0.25,0.35,0.45 EV_SAFE_BONUS=0.1,0.2,0.3
+import argparse
+import copy
+import datetime as dt
+import hashlib
+import itertools
+import json
+import math
+import os
+import random
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from . import config
+from .batch import EV_COEF_NAMES
+from .config import COEFFICIENT_NAMES, GRADE_TO_SCORE, PARAMS_FORMAT, PARAMS_PATH, current_params
+from .simulate import SimConfig, default_grade_dist, run
+
+DEFAULT_CACHE = ".tune_cache"
+RANDOM_FIXED = ("EV_STREAK_CAP", "EV_DEADBAND")   # structural; only searched via --grid
+
+
+def read_corpus(path: str) -> Iterable[dict]:
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def _scores(shots) -> List[int]:
+    return [GRADE_TO_SCORE[g] for g in shots] if isinstance(shots, str) else list(shots)
+
+
+def fit_grade_dist(records: Iterable[dict], weights=None, prior: float = 20.0) -> List:
+    """Per-player, per-hole grade mix (F..A) from logged holes.
+
+    Counts are smoothed with `prior` pseudo-shots from default_grade_dist(w) of the
+    baseline weights (or `weights`), so holes with little data stay close to that mix.
+    """
+    weights = weights or config.BASELINE_W
+    counts = np.array([[default_grade_dist(w) for w in ws] for ws in weights]) * prior
+    for rec in records:
+        h = int(rec["hole"]) - 1
+        for p, name in enumerate(("matt", "mike")):
+            for s in _scores(rec.get(name, ())):
+                counts[p, h, s - 1] += 1
+    return (counts / counts.sum(axis=-1, keepdims=True)).tolist()
+
+
+def candidate_key(candidate: dict, objective: dict) -> str:
+    payload = json.dumps(dict(c=candidate, o=objective), sort_keys=True)
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+
+def sim_config(candidate: dict, objective: dict) -> SimConfig:
+    coef = candidate["coefficients"]
+    return SimConfig(
+        matt_hcp=objective["matt_hcp"], mike_hcp=objective["mike_hcp"],
+        day2=objective.get("day2", False), improve_list=tuple(objective.get("improve_list", ())),
+        ev_coef=tuple(coef[k] for k in EV_COEF_NAMES),
+        attacker_coef=(coef["ATTACKER_STRENGTH"], coef["ATTACKER_STREAK_PENALTY"]),
+        matt_w=tuple(candidate["matt_w"]), mike_w=tuple(candidate["mike_w"]),
+        grade_dist=objective["grade_dist"],
+    )
+
+
+def score_candidate(candidate: dict, objective: dict) -> float:
+    """Mean team net-to-par over the objective's rounds (lower is better)."""
+    stats = run(sim_config(candidate, objective), objective["rounds"], workers=1, seed=objective["seed"])
+    return stats.mean
+
+
+def baseline_candidate() -> dict:
+    p = current_params()
+    return dict(matt_w=p["matt_w"], mike_w=p["mike_w"], coefficients=p["coefficients"])
+
+
+def _clean(candidate: dict) -> dict:
+    """Clamp to valid ranges and round so equivalent candidates share a cache key."""
+    c = copy.deepcopy(candidate)
+    c["matt_w"] = [round(min(max(w, 0.0), 1.0), 3) for w in c["matt_w"]]
+    c["mike_w"] = [round(min(max(w, 0.0), 1.0), 3) for w in c["mike_w"]]
+    for k, v in c["coefficients"].items():
+        c["coefficients"][k] = max(int(round(v)), 0) if k == "EV_STREAK_CAP" else round(max(v, 0.0), 4)
+    return c
+
+
+def grid_candidates(base: dict, grid: Dict[str, List[float]]) -> List[dict]:
+    names = list(grid)
+    out = []
+    for values in itertools.product(*(grid[n] for n in names)):
+        c = copy.deepcopy(base)
+        c["coefficients"].update(zip(names, values))
+        out.append(_clean(c))
+    return out
+
+
+def random_candidates(base: dict, n: int, sigma: float, seed: int, tune_weights: bool = True) -> List[dict]:
+    rng = random.Random(seed)
+    out = []
+    for _ in range(n):
+        c = copy.deepcopy(base)
+        if tune_weights:
+            c["matt_w"] = [w + rng.gauss(0, sigma) for w in c["matt_w"]]
+            c["mike_w"] = [w + rng.gauss(0, sigma) for w in c["mike_w"]]
+        for k, v in c["coefficients"].items():
+            if k not in RANDOM_FIXED:
+                c["coefficients"][k] = v * (1 + rng.gauss(0, sigma))
+        out.append(_clean(c))
+    return out
+
+
+def search(candidates: List[dict], objective: dict, cache_dir: str = DEFAULT_CACHE,
+           workers: Optional[int] = None, progress=print) -> List[dict]:
+    """Score every candidate (cached ones are read back, not re-run); best first."""
+    os.makedirs(cache_dir, exist_ok=True)
+    results, todo = {}, {}
+    for c in candidates:
+        key = candidate_key(c, objective)
+        path = os.path.join(cache_dir, key + ".json")
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                results[key] = json.load(f)
+        else:
+            todo[key] = c
+    progress(f"{len(results)} cached, {len(todo)} to evaluate")
+
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1) as pool:
+        futures = {pool.submit(score_candidate, c, objective): key for key, c in todo.items()}
+        for i, fut in enumerate(as_completed(futures), 1):
+            key = futures[fut]
+            rec = dict(key=key, score=fut.result(), candidate=todo[key])
+            tmp = os.path.join(cache_dir, key + ".tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(rec, f)
+            os.replace(tmp, os.path.join(cache_dir, key + ".json"))   # never leave a half-written entry
+            results[key] = rec
+            progress(f"[{i}/{len(todo)}] {rec['score']:+.3f}")
+    return sorted(results.values(), key=lambda r: r["score"])
+
+
+def write_params(candidate: dict, path: str, meta: dict) -> str:
+    version = f"{dt.date.today().isoformat()}-{candidate_key(candidate, {})[:8]}"
+    out = dict(format=PARAMS_FORMAT, version=version, matt_w=candidate["matt_w"],
+               mike_w=candidate["mike_w"], coefficients=candidate["coefficients"], tuned=meta)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(out, f, indent=1)
+    os.replace(tmp, path)
+    return version
+
+
+def _parse_grid(specs: List[str]) -> Dict[str, List[float]]:
+    grid = {}
+    for spec in specs:
+        name, _, values = spec.partition("=")
+        if name not in COEFFICIENT_NAMES:
+            raise SystemExit(f"unknown coefficient {name!r}; choose from {', '.join(COEFFICIENT_NAMES)}")
+        grid[name] = [float(v) for v in values.split(",")]
+    return grid
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m caddie.tune", description="Fit weights and EV coefficients.")
+    ap.add_argument("--corpus", help="JSON-lines logged holes used to fit each player's grade mix")
+    ap.add_argument("--grid", nargs="*", default=[], metavar="NAME=v1,v2", help="coefficient grid")
+    ap.add_argument("--random", type=int, default=0, help="random candidates around the current params")
+    ap.add_argument("--sigma", type=float, default=0.1, help="random perturbation scale")
+    ap.add_argument("--coefficients-only", action="store_true", help="keep weights fixed in random search")
+    ap.add_argument("--rounds", type=int, default=8192, help="simulated rounds per candidate")
+    ap.add_argument("--holdout-rounds", type=int, default=32768,
+                    help="rounds on a fresh seed re-scoring the best candidate against the incumbent")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--matt-hcp", type=int, default=19)
+    ap.add_argument("--mike-hcp", type=int, default=13)
+    ap.add_argument("--workers", type=int, default=None)
+    ap.add_argument("--cache", default=DEFAULT_CACHE)
+    ap.add_argument("--out", default=PARAMS_PATH, help="params file to write")
+    ap.add_argument("--dry-run", action="store_true", help="report the best candidate without writing")
+    args = ap.parse_args(argv)
+
+    base = _clean(baseline_candidate())
+    records = list(read_corpus(args.corpus)) if args.corpus else []
+    objective = dict(rounds=args.rounds, seed=args.seed, matt_hcp=args.matt_hcp, mike_hcp=args.mike_hcp,
+                     grade_dist=fit_grade_dist(records))
+
+    candidates = [base] + grid_candidates(base, _parse_grid(args.grid)) if args.grid else [base]
+    candidates += random_candidates(base, args.random, args.sigma, args.seed, not args.coefficients_only)
+    ranked = search(candidates, objective, args.cache, args.workers)
+
+    base_score = next(r["score"] for r in ranked if r["key"] == candidate_key(base, objective))
+    best = ranked[0]
+    print(f"baseline {base_score:+.3f} · best {best['score']:+.3f} ({len(ranked)} candidates)")
+    if best["key"] == candidate_key(base, objective):
+        return 0
+    held = dict(objective, rounds=args.holdout_rounds, seed=args.seed + 1)    # a seed the search never used
+    new, old = (run(sim_config(c, held), held["rounds"], args.workers, seed=held["seed"])
+                for c in (best["candidate"], base))
+    gain = old.mean - new.mean
+    noise = 2 * math.hypot(new.std, old.std) / math.sqrt(held["rounds"])
+    print(f"held out (seed {held['seed']}, {held['rounds']} rounds): baseline {old.mean:+.3f} · "
+          f"best {new.mean:+.3f} · gain {gain:+.3f} (noise {noise:.3f})")
+    if gain <= noise:
+        print("best is not better than the incumbent beyond noise; params unchanged")
+        return 0
+    if args.dry_run:
+        return 0
+    meta = dict(objective={k: v for k, v in objective.items() if k != "grade_dist"},
+                corpus=os.path.basename(args.corpus) if args.corpus else None, corpus_holes=len(records),
+                score=best["score"], baseline_score=base_score, candidates=len(ranked),
+                holdout=dict(seed=held["seed"], rounds=held["rounds"], score=new.mean, baseline_score=old.mean,
+                             noise=noise))
+    version = write_params(best["candidate"], args.out, meta)
+    print(f"wrote {args.out} (version {version})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+// === OFFLINE EVALUATOR ========================================================
+// Browser/node twin of DecisionTable.lookup over an exported bundle
+// (python -m caddie.bundle export). Only the class mapping lives here; every
+// recommendation, rule and EV comes from the bundle, so answers match the
+// Python engine as long as playerClass/index match caddie/table.py.
+(function (root, factory) {
+  if (typeof module === "object" && module.exports) module.exports = factory();
+  else root.Caddie = factory();
+})(typeof self !== "undefined" ? self : this, function () {
+  "use strict";
+
+  // columns: outcome u2 LE × n, EV index u1 × n, attacker i1 × n, safe u1 × n
+  function fromBundle(bundle, columns) {
+    const n = bundle.shape.reduce((a, b) => a * b, 1);
+    if (columns.length !== 5 * n) throw new Error("bundle entries have unexpected size " + columns.length);
+    const view = new DataView(columns.buffer, columns.byteOffset, columns.byteLength);
+    const outcome = (i) => view.getUint16(2 * i, true);
+    const evIdx = (i) => columns[2 * n + i];
+    const attacker = (i) => view.getInt8(3 * n + i);
+    const safe = (i) => columns[4 * n + i];
+    const [, nStrokes, , , nClasses] = bundle.shape;
+    const bad = bundle.bad_score;
+
+    function badStreak(shots) {
+      let s = 0;
+      for (let i = shots.length - 1; i >= 0 && shots[i] <= bad; i--) s++;
+      return s;
+    }
+
+    // [class index, uncapped bad streak], see caddie.table.player_class
+    function playerClass(shots) {
+      const n = shots.length;
+      if (n === 0) return [0, 0];
+      const g = shots[n - 1];
+      if (n === 1) return [g, g <= bad ? 1 : 0];
+      if (g > bad) return [6 + (g - bad - 1), 0];
+      const streak = badStreak(shots);
+      return [9 + (g - 1) * 3 + Math.min(streak, 3) - 1, streak];
+    }
+
+    function streakRules(m, k) {
+      const rules = [];
+      if (m >= bundle.bad_streak_threshold) rules.push(`Matt bad streak ${m} → no green light.`);
+      if (k >= bundle.bad_streak_threshold) rules.push(`Mike bad streak ${k} → no green light.`);
+      return rules;
+    }
+
+    // state: {hole, matt_shots, mike_shots, matt_hcp, mike_hcp, day2, improve_list}
+    function lookup(state) {
+      const h = state.hole - 1;
+      const [mc, mStreak] = playerClass(state.matt_shots);
+      const [kc, kStreak] = playerClass(state.mike_shots);
+      const mStrokes = bundle.strokes[h][state.matt_hcp];
+      const kStrokes = bundle.strokes[h][state.mike_hcp];
+      const bias = state.day2 && state.improve_list.includes(state.hole) ? 1 : 0;
+      const flat = ((((h * nStrokes + mStrokes) * nStrokes + kStrokes) * 2 + bias) * nClasses + mc) * nClasses + kc;
+      const [rec, branchRules] = bundle.outcomes[outcome(flat)];
+      const att = attacker(flat);
+      const par = bundle.par[h];
+      return {
+        rec,
+        rules: streakRules(mStreak, kStreak).concat(branchRules),
+        ev: bundle.evs[evIdx(flat)],
+        attacker: att >= 0 ? bundle.attackers[att] : null,
+        safe: bundle.safe_labels[safe(flat)],
+        targets: `Par ${par}. Strokes — Matt: ${mStrokes}, Mike: ${kStrokes}. Matt bogey often equals net ${par}.`,
+      };
+    }
+
+    return { bundle, lookup, playerClass };
+  }
+
+  function base64Bytes(b64) {
+    if (typeof Buffer !== "undefined") return new Uint8Array(Buffer.from(b64, "base64"));
+    const bin = atob(b64);
+    const out = new Uint8Array(bin.length);
+    for (let i = 0; i < bin.length; i++) out[i] = bin.charCodeAt(i);
+    return out;
+  }
+
+  // Browser: zlib via DecompressionStream ("deflate" is the zlib-wrapped format).
+  async function load(bundle) {
+    const stream = new Blob([base64Bytes(bundle.entries)]).stream().pipeThrough(new DecompressionStream("deflate"));
+    return fromBundle(bundle, new Uint8Array(await new Response(stream).arrayBuffer()));
+  }
+
+  return { fromBundle, load, base64Bytes };
+});
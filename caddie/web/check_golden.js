@@ -0,0 +1,32 @@
+// node caddie/web/check_golden.js <bundle.json> <golden.json>
+// Runs the offline evaluator over the golden corpus; exit 1 on any mismatch.
+"use strict";
+const fs = require("fs");
+const path = require("path");
+const zlib = require("zlib");
+const Caddie = require("./caddie.js");
+
+const [bundlePath, goldenPath] = process.argv.slice(2).map((p) => path.resolve(p));
+const bundle = JSON.parse(fs.readFileSync(bundlePath, "utf8"));
+const golden = JSON.parse(fs.readFileSync(goldenPath, "utf8"));
+if (bundle.fingerprint !== golden.fingerprint) {
+  console.log(`bundle fingerprint ${bundle.fingerprint} != corpus ${golden.fingerprint}`);
+  process.exit(1);
+}
+const evaluator = Caddie.fromBundle(bundle, new Uint8Array(zlib.inflateSync(Caddie.base64Bytes(bundle.entries))));
+const scores = (s) => Array.from(s, (g) => bundle.grades[g]);
+
+let bad = 0;
+golden.cases.forEach((c, i) => {
+  const got = evaluator.lookup({
+    hole: c.hole, matt_shots: scores(c.matt), mike_shots: scores(c.mike),
+    matt_hcp: c.matt_hcp, mike_hcp: c.mike_hcp, day2: c.day2, improve_list: c.improve,
+  });
+  const want = c.expect;
+  const same = got.rec === want.rec && JSON.stringify(got.rules) === JSON.stringify(want.rules)
+    && Object.is(got.ev, want.ev) && got.attacker === want.attacker && got.safe === want.safe
+    && got.targets === want.targets;
+  if (!same && bad++ < 20) console.log(`case ${i}: ${JSON.stringify(got.rec)} / ${got.ev} vs corpus ${JSON.stringify(want.rec)} / ${want.ev}`);
+});
+console.log(`${bad} mismatches (${golden.cases.length} cases)`);
+process.exit(bad ? 1 : 0);